@@ -0,0 +1,98 @@
+"""
+Per-request audio decode latency: temporary file vs in-memory decoding
+
+For each input, compares
+- tempfile:  write upload to a NamedTemporaryFile, torchaudio.load(path), unlink (old path)
+- in_memory: torchaudio.load(BytesIO(data))
+- decode_audio: services.audio_io.decode_audio (zero-copy fast path for PCM WAV)
+
+Inputs are synthetic recordings (8/16/44.1/48 kHz, mono/stereo, 10 s) plus any audio
+files passed on the command line.
+
+Usage:
+    python benchmarks/audio_decode.py [--repeat 50] [--json results.json] [files...]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+import torch
+import torchaudio
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.audio_io import decode_audio, sniff_format  # noqa: E402
+
+
+def synthetic_inputs(seconds: float = 10.0):
+    for sample_rate, channels in ((8000, 1), (16000, 1), (44100, 2), (48000, 2)):
+        wav = (torch.rand(channels, int(sample_rate * seconds)) * 2 - 1) * 0.3
+        buffer = BytesIO()
+        torchaudio.save(buffer, wav, sample_rate, format="wav", encoding="PCM_S", bits_per_sample=16)
+        yield f"wav_{sample_rate // 1000}k_{channels}ch", buffer.getvalue()
+        buffer = BytesIO()
+        torchaudio.save(buffer, wav, sample_rate, format="flac")
+        yield f"flac_{sample_rate // 1000}k_{channels}ch", buffer.getvalue()
+
+
+def decode_tempfile(data: bytes):
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
+        tmp_file.write(data)
+        tmp_path = tmp_file.name
+    try:
+        return torchaudio.load(tmp_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def decode_in_memory(data: bytes):
+    return torchaudio.load(BytesIO(data), format=sniff_format(data))
+
+
+def measure(func, data: bytes, repeat: int) -> float:
+    func(data)  # warm up codecs
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    inputs = list(synthetic_inputs())
+    for path in args.files:
+        with open(path, "rb") as f:
+            inputs.append((os.path.basename(path), f.read()))
+
+    results = {}
+    print(f"{'input':<22}{'tempfile':>12}{'in_memory':>12}{'decode_audio':>14}")
+    for name, data in inputs:
+        row = {
+            "tempfile_ms": measure(decode_tempfile, data, args.repeat),
+            "in_memory_ms": measure(decode_in_memory, data, args.repeat),
+            "decode_audio_ms": measure(decode_audio, data, args.repeat),
+        }
+        results[name] = row
+        print(f"{name:<22}{row['tempfile_ms']:>10.2f}ms{row['in_memory_ms']:>10.2f}ms{row['decode_audio_ms']:>12.2f}ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
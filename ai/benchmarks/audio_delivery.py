@@ -0,0 +1,67 @@
+"""
+Bytes per reminder: original WAV vs. Opus and low-bitrate MP3 variants
+
+Renders medication reminders for the first N dataset drugs in every template language
+through the phrase bank (Sarvam/gTTS as configured in .env), transcodes each with ffmpeg
+and reports the average size per reminder and the bytes a client saves per download.
+
+Usage:
+    python benchmarks/audio_delivery.py [--drugs 10] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.audio_transcode import AudioTranscoder  # noqa: E402
+from services.drug_service import DrugService  # noqa: E402
+from services.phrase_bank import REMINDER_TEMPLATES  # noqa: E402
+from services.tts_service import TTSService  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drugs", type=int, default=10)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    tts = TTSService()
+    transcoder = AudioTranscoder(tts.output_dir, codecs="opus,mp3")
+    if not transcoder.enabled:
+        sys.exit("ffmpeg not found")
+    drug_names = [drug["name"] for drug in DrugService().drugs[:args.drugs]]
+
+    sizes = {"wav": [], "opus": [], "mp3": []}
+    for language in REMINDER_TEMPLATES:
+        for drug_name in drug_names:
+            path = tts.phrase_bank.reminder_audio(drug_name, language)
+            if not path.endswith(".wav"):
+                continue
+            transcoder.transcode(path)
+            key = Path(path).stem
+            sizes["wav"].append(os.path.getsize(path))
+            for codec in ("opus", "mp3"):
+                sizes[codec].append(os.path.getsize(transcoder.variant_path(key, codec)))
+
+    if not sizes["wav"]:
+        sys.exit("No WAV reminders were produced (gTTS fallback only returns MP3)")
+    wav_avg = statistics.mean(sizes["wav"])
+    results = {"reminders": len(sizes["wav"])}
+    print(f"{len(sizes['wav'])} reminders")
+    print(f"{'format':<8}{'avg size':>12}{'saved/reminder':>16}{'ratio':>8}")
+    for fmt, values in sizes.items():
+        avg = statistics.mean(values)
+        results[fmt] = {"avg_bytes": avg, "saved_bytes": wav_avg - avg, "ratio": avg / wav_avg}
+        print(f"{fmt:<8}{avg / 1024:>9.1f} KB{(wav_avg - avg) / 1024:>13.1f} KB{avg / wav_avg:>8.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Audio preprocessing cost: per-request Resample construction vs cached kernels
+
+For phone-style inputs (8 / 44.1 / 48 kHz, mono and stereo, 10 s) compares
+- per_request: mean downmix + a new torchaudio Resample per call (old STTService path)
+- cached:      services.audio_preprocess.AudioPreprocessor (kernel cached per source rate)
+and prints the per-stage breakdown of the cached path. Run with different
+STT_TORCH_THREADS values to tune the thread count.
+
+Usage:
+    python benchmarks/audio_preprocess.py [--repeat 30] [--json results.json]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import torch
+import torchaudio
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.audio_preprocess import AudioPreprocessor  # noqa: E402
+
+
+def per_request(wav: torch.Tensor, sample_rate: int) -> torch.Tensor:
+    if wav.shape[0] > 1:
+        wav = torch.mean(wav, dim=0, keepdim=True)
+    if sample_rate != 16000:
+        wav = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=16000)(wav)
+    return wav
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    preprocessor = AudioPreprocessor()
+    results = {"torch_threads": torch.get_num_threads(), "inputs": {}}
+    print(f"torch threads: {results['torch_threads']}")
+    print(f"{'input':<12}{'per_request':>13}{'cached':>10}{'downmix':>10}{'resample':>10}")
+
+    for sample_rate, channels in ((8000, 1), (44100, 1), (44100, 2), (48000, 2)):
+        wav = torch.rand(channels, int(sample_rate * args.seconds)) * 2 - 1
+        old, new, stages = [], [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            per_request(wav, sample_rate)
+            old.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            _, timings = preprocessor.process(wav, sample_rate)
+            new.append((time.perf_counter() - start) * 1000)
+            stages.append(timings)
+
+        name = f"{sample_rate // 1000}k_{channels}ch"
+        row = {
+            "per_request_ms": statistics.median(old),
+            "cached_ms": statistics.median(new),
+            "downmix_ms": statistics.median(t["downmix_ms"] for t in stages),
+            "resample_ms": statistics.median(t["resample_ms"] for t in stages),
+        }
+        results["inputs"][name] = row
+        print(f"{name:<12}{row['per_request_ms']:>11.2f}ms{row['cached_ms']:>8.2f}ms"
+              f"{row['downmix_ms']:>8.2f}ms{row['resample_ms']:>8.2f}ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
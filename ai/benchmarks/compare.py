@@ -0,0 +1,76 @@
+"""
+Compare two benchmark result files (microbench.py, loadtest.py or serialization.py --json output)
+
+Prints every shared metric with its relative change and marks regressions larger than
+--threshold: latencies (*_ms, *_us) and response sizes (*_bytes) going up, throughput
+(*_rps, ops_per_s) going down, error rates going up. Exits with status 1 when there is a
+regression, so it can gate CI.
+
+Usage:
+    python benchmarks/compare.py baseline.json current.json [--threshold 0.10]
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import Optional
+
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit, recorded with every result file"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def direction(metric: str) -> Optional[int]:
+    """+1 if higher is better, -1 if lower is better, None if not compared"""
+    if metric.endswith(("_rps", "ops_per_s")):
+        return 1
+    if metric.endswith(("_ms", "_us", "_bytes")) or metric == "error_rate":
+        return -1
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline.get("benchmark") != current.get("benchmark"):
+        parser.error(f"different benchmarks: {baseline.get('benchmark')} vs {current.get('benchmark')}")
+
+    print(f"{baseline.get('benchmark')}: {baseline.get('commit')} ({baseline.get('timestamp')}) -> "
+          f"{current.get('commit')} ({current.get('timestamp')})")
+    print(f"{'result':<22}{'metric':<16}{'baseline':>12}{'current':>12}{'change':>10}")
+    regressions = 0
+    for name, old in baseline["results"].items():
+        new = current["results"].get(name)
+        if new is None:
+            continue
+        for metric, old_value in old.items():
+            better = direction(metric)
+            new_value = new.get(metric)
+            if better is None or old_value is None or new_value is None:
+                continue
+            if old_value:
+                change = (new_value - old_value) / old_value
+            else:
+                change = 0.0 if not new_value else float("inf")
+            regressed = change * better < -args.threshold
+            regressions += regressed
+            print(f"{name:<22}{metric:<16}{old_value:>12.2f}{new_value:>12.2f}{change:>+9.1%}{'  <-' if regressed else ''}")
+
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
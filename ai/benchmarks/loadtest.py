@@ -0,0 +1,286 @@
+"""
+Concurrent load test of the AI service endpoints against stubbed upstreams
+
+Starts the local upstream stubs (benchmarks/stubs.py) and the service itself (python main.py,
+pointed at the stubs, with caches and the translation memory off so every request does its
+full work), then drives each scenario with --concurrency closed-loop clients for --duration
+seconds. Every request carries unique text/audio. Reports throughput, error rate and
+p50/p95/p99 latency per endpoint; --json writes them with the git commit for
+benchmarks/compare.py. --target skips starting anything and loads an already running service.
+
+Scenarios: drug_lookup, analyze_skip, translate, translate_batch, voice_transcribe (English,
+via the Whisper stub), voice_synthesize, voice_query (streamed to the end).
+
+Usage:
+    python benchmarks/loadtest.py [--concurrency 8] [--duration 20] [--scenarios analyze_skip,translate]
+                                  [--latency ollama_generate=800] [--errors sarvam_tts=0.05] [--json out.json]
+"""
+import argparse
+import io
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.compare import git_commit  # noqa: E402
+from benchmarks.stubs import StubUpstreams, parse_profiles  # noqa: E402
+
+AI_DIR = Path(__file__).resolve().parent.parent
+
+# Names from data/drug_data.json
+DRUGS = ["Aldonil Tablet", "Axonet 150mg Tablet", "Alrista SR Tablet", "Aztogold 20 Capsule", "Accentrix Solution for Injection"]
+CONDITIONS = [["Type 2 Diabetes"], ["Hypertension", "Heart Failure"], [], ["Atrial Fibrillation"]]
+LANGUAGES = ["hi", "ta", "te", "bn", "mr"]
+
+# (method, path, request kwargs) for the n-th request of a scenario
+RequestBuilder = Callable[[int], Tuple[str, str, Dict]]
+
+
+def _noise_wav(seed: int, seconds: float = 2.0) -> bytes:
+    rng = random.Random(seed)
+    frames = bytearray()
+    for _ in range(int(16000 * seconds)):
+        frames += int(rng.gauss(0, 300)).to_bytes(2, "little", signed=True)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+def build_scenarios() -> Dict[str, RequestBuilder]:
+    clips = [_noise_wav(seed) for seed in range(16)]
+
+    def sentence(n: int) -> str:
+        return f"Please take your {DRUGS[n % len(DRUGS)]} after dinner, reminder number {n}."
+
+    return {
+        "drug_lookup": lambda n: ("GET", f"/drugs/{DRUGS[n % len(DRUGS)]}", {}),
+        "analyze_skip": lambda n: ("POST", "/analyze_skip", {"json": {
+            "drug_name": DRUGS[n % len(DRUGS)],
+            "skips": 1 + n % 3,
+            # Unique per request so nothing downstream can serve it from a cache
+            "patient_age": 40 + n % 50,
+            "conditions": CONDITIONS[n % len(CONDITIONS)] + [f"note {n}"]
+        }}),
+        "translate": lambda n: ("POST", "/translate", {"json": {
+            "text": sentence(n), "target_language": LANGUAGES[n % len(LANGUAGES)], "source_language": "en"
+        }}),
+        "translate_batch": lambda n: ("POST", "/translate/batch", {"json": {
+            "texts": [sentence(n), f"Drink water. {sentence(n + 1)}", "Drink water."],
+            "target_language": LANGUAGES[n % len(LANGUAGES)], "source_language": "en"
+        }}),
+        "voice_transcribe": lambda n: ("POST", "/voice/transcribe?language=en", {
+            "files": {"file": (f"q{n}.wav", clips[n % len(clips)], "audio/wav")}
+        }),
+        "voice_synthesize": lambda n: ("POST", "/voice/synthesize", {"json": {
+            "text": sentence(n), "language": LANGUAGES[n % len(LANGUAGES)]
+        }}),
+        "voice_query": lambda n: ("POST", f"/voice/query?language=en&response_language={LANGUAGES[n % len(LANGUAGES)]}", {
+            "files": {"file": (f"q{n}.wav", clips[n % len(clips)], "audio/wav")}
+        }),
+    }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))]
+
+
+def run_scenario(base_url: str, builder: RequestBuilder, concurrency: int, duration: float, warmup: int, timeout: float) -> Dict:
+    """Closed loop: each client sends its next request as soon as the previous one completes"""
+    session = requests.Session()
+    for n in range(warmup):
+        method, path, kwargs = builder(-1 - n)
+        try:
+            session.request(method, base_url + path, timeout=timeout, **kwargs).content
+        except requests.RequestException:
+            pass
+
+    counter = iter(range(10 ** 9))
+    lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        local_session = requests.Session()
+        local_latencies, local_statuses = [], Counter()
+        while time.perf_counter() < stop_at:
+            with lock:
+                n = next(counter)
+            method, path, kwargs = builder(n)
+            start = time.perf_counter()
+            try:
+                response = local_session.request(method, base_url + path, timeout=timeout, **kwargs)
+                response.content  # the whole body, including streamed responses
+                status = str(response.status_code)
+            except requests.RequestException as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            local_statuses[status] += 1
+            if status.startswith("2"):
+                local_latencies.append(elapsed)
+        with lock:
+            latencies.extend(local_latencies)
+            statuses.update(local_statuses)
+
+    started = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    total = sum(statuses.values())
+    ok = len(latencies)
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "requests": total,
+        "errors": total - ok,
+        "error_rate": (total - ok) / total if total else None,
+        "statuses": dict(statuses),
+        "throughput_rps": ok / wall,
+        "mean_ms": ms(sum(latencies) / ok) if ok else None,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(latencies[-1]) if latencies else None,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_service(stubs: StubUpstreams, workers: int, log_path: str, ready_timeout: float) -> Tuple[subprocess.Popen, str]:
+    """python main.py on a free port, pointed at the stubs, with caches off"""
+    port = _free_port()
+    env = {
+        **os.environ,
+        **stubs.env(),
+        "PORT": str(port),
+        "WORKERS": str(workers),
+        "TRANSLATION_MEMORY_PATH": "",
+        "STT_CACHE_SIZE": "0",
+        "PHRASE_BANK_PRERENDER": "false",
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+    }
+    log = open(log_path, "w")
+    process = subprocess.Popen([sys.executable, "main.py"], cwd=AI_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + ready_timeout
+    status = None
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Service exited with {process.returncode}; see {log_path}")
+        try:
+            response = requests.get(f"{base_url}/health/ready", timeout=2)
+            status = response.json()
+            if response.status_code == 200:
+                return process, base_url
+            if any(c.get("state") == "failed" for c in status.get("capabilities", {}).values()):
+                break
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    # Scenarios that need a capability that did not load will show up as 503s
+    print(f"Service not fully ready, continuing: {json.dumps(status and status.get('capabilities'))}")
+    return process, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per scenario")
+    parser.add_argument("--warmup", type=int, default=3, help="Sequential requests before each scenario")
+    parser.add_argument("--scenarios", help="Comma-separated scenario names (default: all)")
+    parser.add_argument("--workers", type=int, default=1, help="WORKERS for the started service")
+    parser.add_argument("--latency", action="append", metavar="NAME=MEDIAN_MS[:SIGMA]", help="Stub latency override")
+    parser.add_argument("--errors", action="append", metavar="NAME=RATE", help="Stub error rate")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every default stub latency")
+    parser.add_argument("--target", help="Load this running service instead of starting stubs and the service")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--ready-timeout", type=float, default=900, help="Seconds to wait for models to load")
+    parser.add_argument("--log", default=os.path.join(tempfile.gettempdir(), "loadtest-service.log"))
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    scenarios = build_scenarios()
+    selected = args.scenarios.split(",") if args.scenarios else list(scenarios)
+    unknown = set(selected) - set(scenarios)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    stubs = process = None
+    base_url = args.target
+    if base_url is None:
+        stubs = StubUpstreams(profiles=parse_profiles(args.latency, args.errors, args.scale)).start()
+        process, base_url = start_service(stubs, args.workers, args.log, args.ready_timeout)
+
+    results = {}
+    try:
+        print(f"{base_url}: {args.concurrency} clients x {args.duration:g}s per scenario")
+        print(f"{'scenario':<18}{'req/s':>8}{'errors':>8}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for name in selected:
+            result = run_scenario(base_url, scenarios[name], args.concurrency, args.duration, args.warmup, args.timeout)
+            results[name] = result
+
+            def fmt(value):
+                return f"{value:>8.0f}ms" if value is not None else f"{'-':>10}"
+
+            print(f"{name:<18}{result['throughput_rps']:>8.1f}{result['errors']:>8}"
+                  f"{fmt(result['p50_ms'])}{fmt(result['p95_ms'])}{fmt(result['p99_ms'])}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        if stubs is not None:
+            stubs.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "benchmark": "loadtest",
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "config": {
+                    "target": args.target or "local",
+                    "concurrency": args.concurrency,
+                    "duration_s": args.duration,
+                    "workers": args.workers,
+                    "upstreams": {name: p.as_dict() for name, p in stubs.profiles.items()} if stubs else None,
+                },
+                "results": results,
+                "upstream_calls": stubs.calls() if stubs else None,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Per-request cost of logging: print() vs. the queue-backed JSON logger
+
+Simulates request threads that log what an Indic transcription request used to print
+(three lines) and measures the time spent in the logging calls themselves, with stdout
+going to /dev/null or to a pipe drained by a slow reader (like a busy log collector).
+Modes:
+    print    - the three print() lines
+    logging  - the same lines through the JSON logger (one queue put each)
+    sampled  - one sampled info line, as STTService logs it now (LOG_SAMPLE_EVERY)
+
+Usage:
+    python benchmarks/logging_overhead.py [--threads 8] [--requests 2000] [--json out.json]
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+MODES = ("print", "logging", "sampled")
+SINKS = ("devnull", "slow_pipe")
+
+
+def _open_sink(sink: str):
+    """Line-buffered text stream for stdout (containers usually run with PYTHONUNBUFFERED)"""
+    if sink == "devnull":
+        return open(os.devnull, "w", buffering=1)
+    read_fd, write_fd = os.pipe()
+
+    def drain():
+        # ~4 MB/s: a reader that keeps up on average but not with bursts
+        while os.read(read_fd, 4096):
+            time.sleep(0.001)
+
+    threading.Thread(target=drain, daemon=True).start()
+    return os.fdopen(write_fd, "w", buffering=1)
+
+
+def _run(mode: str, sink: str, threads: int, requests: int) -> dict:
+    sys.stdout = _open_sink(sink)
+    if mode != "print":
+        from services.logging_config import configure_logging
+        configure_logging()
+    logger = logging.getLogger("services.stt_service")
+    language = "hi"
+
+    def log_request():
+        if mode == "print":
+            print(f"🇮🇳 Using IndicConformer for {language} transcription")
+            print(f"   ⚠️  WARNING: Make sure audio is actually in {language}!")
+            print("   ⚠️  If audio is in a different language, transcription will be poor/incorrect.")
+        elif mode == "logging":
+            logger.info("Using IndicConformer for %s transcription", language)
+            logger.warning("Make sure audio is actually in %s!", language)
+            logger.warning("If audio is in a different language, transcription will be poor/incorrect.")
+        else:
+            logger.info("Using IndicConformer for %s transcription", language, extra={"sampled": True})
+
+    timings = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            log_request()
+            local.append(time.perf_counter() - start)
+        with lock:
+            timings.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    wall = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - wall
+
+    timings.sort()
+    return {
+        "mode": mode,
+        "sink": sink,
+        "mean_us": statistics.mean(timings) * 1e6,
+        "p99_us": timings[int(len(timings) * 0.99)] * 1e6,
+        "max_us": timings[-1] * 1e6,
+        "requests_per_s": len(timings) / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per thread")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--run", nargs=2, metavar=("MODE", "SINK"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        result = _run(args.run[0], args.run[1], args.threads, args.requests)
+        sys.__stdout__.write(json.dumps(result) + "\n")
+        sys.__stdout__.flush()
+        # Skip the logging flush at exit: only the request-side cost is measured
+        os._exit(0)
+
+    # One process per mode and sink, so logging configuration does not carry over
+    results = []
+    print(f"{args.threads} threads x {args.requests} requests")
+    print(f"{'sink':<11}{'mode':<9}{'mean':>10}{'p99':>10}{'max':>11}{'req/s':>11}")
+    for sink in SINKS:
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--run", mode, sink,
+                 "--threads", str(args.threads), "--requests", str(args.requests)],
+                capture_output=True, text=True, check=True,
+                env={**os.environ, "LOG_SAMPLE_EVERY": os.getenv("LOG_SAMPLE_EVERY", "100")}
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            print(f"{sink:<11}{mode:<9}{result['mean_us']:>8.1f}us{result['p99_us']:>8.1f}us"
+                  f"{result['max_us']:>9.1f}us{result['requests_per_s']:>11.0f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"threads": args.threads, "requests": args.requests, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
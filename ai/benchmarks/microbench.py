@@ -0,0 +1,130 @@
+"""
+Microbenchmarks for the CPU-side hot paths of a request
+
+    drug_get_exact / drug_get_partial / drug_get_miss - DrugService.get_drug (a miss scans every drug)
+    drug_resolve_exact / drug_resolve_fuzzy            - DrugService.resolve_drug on a spoken question
+    prompt_format                                      - RiskAnalysisPrompt.from_drug_info(...).format() (pydantic)
+    prompt_render                                      - RiskAnalysisPrompt.render(...), the per-request path
+    risk_parse                                         - strict RiskAssessment validation of an LLM answer
+    cosine_similarity                                  - one 1024-d comparison in BGEService
+    similarity_search                                  - BGEService.find_similar_drugs over --drugs drugs,
+                                                         embeddings served by zero-latency local stubs
+
+Each benchmark is calibrated to ~0.2 s per round and repeated; the median round is reported.
+
+Usage:
+    python benchmarks/microbench.py [--rounds 5] [--drugs 20] [--only prompt_format,...] [--json out.json]
+"""
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.compare import git_commit  # noqa: E402
+from benchmarks.stubs import DEFAULT_LATENCY, RISK_ASSESSMENT, StubUpstreams, UpstreamProfile, _embedding  # noqa: E402
+from models.schemas import RiskAssessment  # noqa: E402
+from prompts.risk_analysis_prompt import RiskAnalysisPrompt  # noqa: E402
+from services.bge_service import BGEService  # noqa: E402
+from services.drug_service import DrugService  # noqa: E402
+
+ROUND_SECONDS = 0.2
+
+
+def measure(func: Callable[[], object], rounds: int) -> Dict[str, float]:
+    """Per-call time of func: median and best of `rounds` calibrated rounds"""
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= ROUND_SECONDS / 10 or iterations >= 1_000_000:
+            break
+        iterations *= 10
+    iterations = max(1, int(iterations * ROUND_SECONDS / max(elapsed, 1e-9)))
+
+    per_call = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        per_call.append((time.perf_counter() - start) / iterations)
+    median = statistics.median(per_call)
+    return {
+        "median_us": median * 1e6,
+        "min_us": min(per_call) * 1e6,
+        "ops_per_s": 1 / median,
+        "iterations": iterations,
+    }
+
+
+def build_benchmarks(drug_service: DrugService, bge: BGEService, n_drugs: int) -> Dict[str, Callable[[], object]]:
+    first = drug_service.drugs[0]
+    last = drug_service.drugs[-1]
+    brand = last["name"].split()[0]
+    answer = json.dumps(RISK_ASSESSMENT)
+    vec1, vec2 = _embedding("a"), _embedding("b")
+    drugs = drug_service.drugs[:n_drugs]
+    return {
+        "drug_get_exact": lambda: drug_service.get_drug(first["name"]),
+        "drug_get_partial": lambda: drug_service.get_drug(brand),
+        "drug_get_miss": lambda: drug_service.get_drug("no such medicine"),
+        "drug_resolve_exact": lambda: drug_service.resolve_drug(f"I forgot to take my {brand} tablet yesterday"),
+        "drug_resolve_fuzzy": lambda: drug_service.resolve_drug(f"I forgot to take my {brand[:-1]}e tablet yesterday"),
+        "prompt_format": lambda: RiskAnalysisPrompt.from_drug_info(
+            patient_age=67, drug_name=first["name"], skips=2,
+            conditions=["Hypertension", "Type 2 Diabetes"], drug_info=first
+        ).format(),
+        "prompt_render": lambda: RiskAnalysisPrompt.render(
+            patient_age=67, drug_name=first["name"], skips=2,
+            conditions=["Hypertension", "Type 2 Diabetes"], drug_info=first
+        ),
+        "risk_parse": lambda: RiskAssessment.model_validate_json(answer),
+        "cosine_similarity": lambda: bge._cosine_similarity(vec1, vec2),
+        "similarity_search": lambda: bge.find_similar_drugs(first["name"], drugs, top_k=3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--drugs", type=int, default=20, help="Drugs compared per similarity search")
+    parser.add_argument("--only", help="Comma-separated benchmark names")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    zero_latency = {name: UpstreamProfile(0.0) for name in DEFAULT_LATENCY}
+    with StubUpstreams(profiles=zero_latency) as stubs:
+        drug_service = DrugService()
+        bge = BGEService(ollama_base_url=stubs.url)
+        benchmarks = build_benchmarks(drug_service, bge, args.drugs)
+        selected = args.only.split(",") if args.only else list(benchmarks)
+
+        results = {}
+        print(f"{len(drug_service.drugs)} drugs loaded")
+        print(f"{'benchmark':<22}{'median':>12}{'min':>12}{'ops/s':>12}")
+        for name in selected:
+            result = measure(benchmarks[name], args.rounds)
+            results[name] = result
+            print(f"{name:<22}{result['median_us']:>10.1f}us{result['min_us']:>10.1f}us{result['ops_per_s']:>12.0f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "benchmark": "microbench",
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "config": {"rounds": args.rounds, "drugs": args.drugs, "dataset_size": len(drug_service.drugs)},
+                "results": results
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Time-to-first-token benchmark for the risk analysis prompt
+
+Compares the original prompt layout (patient data in the middle of the instructions)
+with the static-prefix layout, for a cold model (unloaded before each run) and a warm,
+kept-alive model. Uses the Ollama server from OLLAMA_BASE_URL / GEMMA_MODEL.
+
+Usage:
+    python benchmarks/ollama_ttft.py [--requests 10] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from prompts.risk_analysis_prompt import RiskAnalysisPrompt  # noqa: E402
+
+
+# Layout used before the static-prefix restructuring, kept here for comparison
+LEGACY_TEMPLATE = """You are a medical AI assistant. Analyze the risk of a patient skipping their medication.
+
+Patient Information:
+- Age: {patient_age} years
+- Medical Conditions: {conditions_str}
+- Medication: {drug_name} ({drug_category})
+- Number of skipped doses: {skips}
+- Known risk if skipped: {risk_info}
+
+Please provide:
+1. Risk Level: "Low", "Medium", or "High"
+2. A brief message explaining the immediate concern
+3. A detailed AI explanation of what could happen
+
+Format your response as:
+RISK_LEVEL: [Low/Medium/High]
+MESSAGE: [brief message]
+EXPLANATION: [detailed explanation]"""
+
+PATIENTS = [
+    (72, ["Heart Failure", "Hypertension"], "Furosemide", "Diuretic", 2, "High - Fluid accumulation"),
+    (55, ["Type 2 Diabetes"], "Metformin", "Antidiabetic", 1, "Medium - Elevated blood sugar"),
+    (63, ["Atrial Fibrillation"], "Warfarin", "Anticoagulant", 3, "High - Blood clot risk"),
+    (48, ["High Cholesterol"], "Atorvastatin", "Statin", 1, "Low - Gradual cholesterol increase"),
+    (81, ["Hypertension", "Angina"], "Amlodipine", "Calcium Channel Blocker", 2, "Medium - Chest pain"),
+]
+
+
+def build_prompt(layout: str, patient) -> str:
+    age, conditions, drug, category, skips, risk = patient
+    prompt = RiskAnalysisPrompt(
+        patient_age=age,
+        conditions=conditions,
+        drug_name=drug,
+        drug_category=category,
+        skips=skips,
+        risk_info=risk
+    )
+    if layout == "legacy":
+        return LEGACY_TEMPLATE.format(**prompt.get_variables())
+    return prompt.format()
+
+
+def unload(base_url: str, model: str):
+    requests.post(f"{base_url}/api/generate", json={"model": model, "keep_alive": 0}, timeout=60)
+
+
+def time_to_first_token(base_url: str, model: str, prompt: str, options: dict, keep_alive: str) -> float:
+    start = time.perf_counter()
+    with requests.post(
+        f"{base_url}/api/generate",
+        json={"model": model, "prompt": prompt, "stream": True, "keep_alive": keep_alive, "options": options},
+        stream=True,
+        timeout=300
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line and json.loads(line).get("response"):
+                return time.perf_counter() - start
+    return time.perf_counter() - start
+
+
+def run(base_url: str, model: str, n_requests: int) -> dict:
+    results = {}
+    tuned_options = RiskAnalysisPrompt.model_construct().get_options()
+    legacy_options = {"temperature": 0.1, "top_p": 0.9}
+
+    for layout, options in (("legacy", legacy_options), ("static_prefix", tuned_options)):
+        # Cold: the model is unloaded before every request
+        cold = []
+        for i in range(min(n_requests, 3)):
+            unload(base_url, model)
+            cold.append(time_to_first_token(base_url, model, build_prompt(layout, PATIENTS[i % len(PATIENTS)]), options, "30m"))
+
+        # Warm: model resident, consecutive requests for different patients
+        warm = []
+        for i in range(n_requests):
+            warm.append(time_to_first_token(base_url, model, build_prompt(layout, PATIENTS[i % len(PATIENTS)]), options, "30m"))
+
+        results[layout] = {
+            "cold_ttft_median_s": statistics.median(cold),
+            "warm_ttft_median_s": statistics.median(warm),
+            "warm_ttft_p95_s": sorted(warm)[max(0, int(len(warm) * 0.95) - 1)],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    base_url = os.getenv("OLLAMA_BASE_URL", "http://10.11.7.65:11434")
+    model = os.getenv("GEMMA_MODEL", "gemma3:4b")
+    results = run(base_url, model, args.requests)
+
+    print(f"{'layout':<15}{'cold TTFT':>12}{'warm TTFT':>12}{'warm p95':>12}")
+    for layout, r in results.items():
+        print(f"{layout:<15}{r['cold_ttft_median_s']:>11.3f}s{r['warm_ttft_median_s']:>11.3f}s{r['warm_ttft_p95_s']:>11.3f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"model": model, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
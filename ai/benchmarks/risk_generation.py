@@ -0,0 +1,110 @@
+"""
+Generation-time benchmark for /analyze_skip outputs
+
+Compares the original free-text answer (RISK_LEVEL/MESSAGE/EXPLANATION lines, unbounded)
+with the schema-constrained JSON answer bounded by num_predict. Reports total generation
+time, generated tokens and how many outputs the strict parser rejected.
+Uses the Ollama server from OLLAMA_BASE_URL / GEMMA_MODEL.
+
+Usage:
+    python benchmarks/risk_generation.py [--requests 10] [--json results.json]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.medgemma_service import MedGemmaService  # noqa: E402
+from prompts.risk_analysis_prompt import RiskAnalysisPrompt  # noqa: E402
+from benchmarks.ollama_ttft import PATIENTS  # noqa: E402
+
+
+# Free-text instructions used before structured output, kept here for comparison
+FREE_TEXT_TEMPLATE = """You are a medical AI assistant. Analyze the risk of a patient skipping their medication.
+
+Using the patient information at the end of this prompt, provide:
+1. Risk Level: "Low", "Medium", or "High"
+2. A brief message explaining the immediate concern
+3. A detailed AI explanation of what could happen
+
+Format your response as:
+RISK_LEVEL: [Low/Medium/High]
+MESSAGE: [brief message]
+EXPLANATION: [detailed explanation]
+
+Patient Information:
+- Medication: {drug_name} ({drug_category})
+- Known risk if skipped: {risk_info}
+- Number of skipped doses: {skips}
+- Age: {patient_age} years
+- Medical Conditions: {conditions_str}"""
+
+
+def make_prompt(patient) -> RiskAnalysisPrompt:
+    age, conditions, drug, category, skips, risk = patient
+    return RiskAnalysisPrompt(
+        patient_age=age,
+        conditions=conditions,
+        drug_name=drug,
+        drug_category=category,
+        skips=skips,
+        risk_info=risk
+    )
+
+
+def run(service: MedGemmaService, n_requests: int) -> dict:
+    results = {}
+    for mode in ("free_text", "json_schema"):
+        latencies, tokens = [], []
+        rejected = 0
+        for i in range(n_requests):
+            prompt_obj = make_prompt(PATIENTS[i % len(PATIENTS)])
+            if mode == "free_text":
+                prompt = FREE_TEXT_TEMPLATE.format(**prompt_obj.get_variables())
+                options, response_format = {"temperature": 0.1, "top_p": 0.9}, None
+            else:
+                prompt = prompt_obj.format()
+                options, response_format = prompt_obj.get_options(), prompt_obj.get_format()
+
+            start = time.perf_counter()
+            text, final_chunk = service._generate(prompt, options, response_format)
+            latencies.append(time.perf_counter() - start)
+            tokens.append(final_chunk.get("eval_count", 0))
+            if mode == "json_schema" and service._parse_response(text, final_chunk) is None:
+                rejected += 1
+
+        results[mode] = {
+            "median_latency_s": statistics.median(latencies),
+            "max_latency_s": max(latencies),
+            "median_tokens": statistics.median(tokens),
+            "rejected": rejected,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    service = MedGemmaService()
+    service.warm_up()
+    results = run(service, args.requests)
+
+    print(f"{'mode':<13}{'median':>10}{'max':>10}{'tokens':>8}{'rejected':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<13}{r['median_latency_s']:>9.2f}s{r['max_latency_s']:>9.2f}s"
+              f"{r['median_tokens']:>8.0f}{r['rejected']:>10}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"model": service.model_name, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+CPU per request and bytes on the wire for the JSON endpoints, before and after fast serialization
+
+Each endpoint's typical payload is served by two in-process ASGI apps and requested directly,
+without a socket:
+    before  return the value, FastAPI validates it against response_model, runs jsonable_encoder
+            and renders it with starlette's JSONResponse; no compression
+    after   return FastJSONResponse (pydantic-core / orjson, no revalidation) behind
+            CompressionMiddleware, requested with Accept-Encoding: br, gzip
+Reported per endpoint: process CPU time per request (median of --rounds) and response body
+bytes, plus the encoding the after app chose (br needs the brotli package, else gzip).
+
+Usage:
+    python benchmarks/serialization.py [--requests 2000] [--rounds 5] [--json out.json]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI  # noqa: E402
+
+from benchmarks.compare import git_commit  # noqa: E402
+from benchmarks.stubs import RISK_ASSESSMENT, TRANSCRIPT  # noqa: E402
+from models.schemas import (  # noqa: E402
+    BatchTranslationResponse,
+    RiskAnalysisResponse,
+    TranslationResponse,
+    VoiceTranscribeResponse
+)
+from services import compression  # noqa: E402
+from services.compression import CompressionMiddleware  # noqa: E402
+from services.deadline import abandoned_work  # noqa: E402
+from services.drug_service import DrugService  # noqa: E402
+from services.responses import FastJSONResponse  # noqa: E402
+from services.translation_service import TranslationService  # noqa: E402
+
+
+def build_payloads(drug_service: DrugService) -> Dict[str, Tuple[Optional[type], Any]]:
+    """Endpoint -> (response_model or None, a typical response value)"""
+    drugs = drug_service.drugs
+    sentences = [
+        "Take one tablet after breakfast.",
+        "Do not skip doses even if you feel better.",
+        "Contact your doctor if you feel dizzy or unwell.",
+    ]
+    return {
+        "drugs": (None, {"drugs": drugs, "count": len(drugs)}),
+        "drug": (None, drugs[0]),
+        "analyze_skip": (RiskAnalysisResponse, RiskAnalysisResponse(
+            **RISK_ASSESSMENT, similar_drugs=[drug["name"] for drug in drugs[1:4]]
+        )),
+        "voice_transcribe": (VoiceTranscribeResponse, VoiceTranscribeResponse(text=TRANSCRIPT, language="en")),
+        "translate": (TranslationResponse, TranslationResponse(
+            text=" ".join(sentences), source_language="en", target_language="hi"
+        )),
+        "translate_batch": (BatchTranslationResponse, BatchTranslationResponse(
+            texts=sentences * 10, source_language="en", target_language="hi", segments=30, unique_segments=3
+        )),
+        "stats": (None, {"deadlines": abandoned_work.snapshot(), "translation": TranslationService().get_stats()}),
+    }
+
+
+def build_apps(payloads: Dict[str, Tuple[Optional[type], Any]]) -> Tuple[FastAPI, FastAPI]:
+    before, after = FastAPI(), FastAPI(default_response_class=FastJSONResponse)
+    after.add_middleware(CompressionMiddleware)
+    for name, (model, value) in payloads.items():
+        before.add_api_route(f"/{name}", lambda value=value: value, response_model=model)
+        after.add_api_route(f"/{name}", lambda value=value: FastJSONResponse(value), response_model=model)
+    return before, after
+
+
+async def request(app: FastAPI, path: str, headers: List[Tuple[bytes, bytes]]) -> Tuple[int, Dict[bytes, bytes], bytes]:
+    """One GET straight through the ASGI app: (status, response headers, body)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": headers, "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+    }
+    status, response_headers, chunks = 0, {}, []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = dict(message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, response_headers, b"".join(chunks)
+
+
+async def cpu_per_request(app: FastAPI, path: str, headers, requests: int, rounds: int) -> float:
+    """Median process CPU seconds per request over `rounds` rounds of `requests` requests"""
+    per_request = []
+    for _ in range(rounds):
+        start = time.process_time()
+        for _ in range(requests):
+            await request(app, path, headers)
+        per_request.append((time.process_time() - start) / requests)
+    return statistics.median(per_request)
+
+
+async def run(requests: int, rounds: int) -> Dict[str, Dict[str, Any]]:
+    payloads = build_payloads(DrugService())
+    before, after = build_apps(payloads)
+    plain = [(b"host", b"localhost")]
+    compressed = plain + [(b"accept-encoding", b"br, gzip")]
+
+    results = {}
+    print(f"{'endpoint':<18}{'cpu before':>12}{'cpu after':>12}{'bytes before':>14}{'bytes after':>13}  encoding")
+    for name in payloads:
+        path = f"/{name}"
+        status, _, body_before = await request(before, path, plain)
+        status_after, headers_after, body_after = await request(after, path, compressed)
+        if status != 200 or status_after != 200 or json.loads(body_before) != json.loads(_decode(body_after, headers_after)):
+            raise RuntimeError(f"/{name}: responses differ between the before and after apps")
+
+        before_us = await cpu_per_request(before, path, plain, requests, rounds) * 1e6
+        after_us = await cpu_per_request(after, path, compressed, requests, rounds) * 1e6
+        encoding = headers_after.get(b"content-encoding", b"identity").decode()
+        results[name] = {
+            "before_cpu_us": before_us,
+            "after_cpu_us": after_us,
+            "before_bytes": len(body_before),
+            "after_bytes": len(body_after),
+            "encoding": encoding,
+        }
+        print(f"{name:<18}{before_us:>10.1f}us{after_us:>10.1f}us{len(body_before):>14}{len(body_after):>13}  {encoding}")
+    return results
+
+
+def _decode(body: bytes, headers: Dict[bytes, bytes]) -> bytes:
+    encoding = headers.get(b"content-encoding")
+    if encoding == b"br":
+        return compression.brotli.decompress(body)
+    return gzip.decompress(body) if encoding == b"gzip" else body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    results = asyncio.run(run(args.requests, args.rounds))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "benchmark": "serialization",
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "config": {"requests": args.requests, "rounds": args.rounds},
+                "results": results
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
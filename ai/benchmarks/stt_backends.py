@@ -0,0 +1,127 @@
+"""
+IndicConformer CPU backends: real-time factor, peak RSS and WER against fp32
+
+Each backend (torch fp32, int8, onnx) runs in its own subprocess so peak RSS is not
+shared between them. Every backend transcribes the same fixed sample set with the same
+thread count; transcripts are compared with the fp32 output (word error rate and exact
+agreement).
+
+Usage:
+    python benchmarks/stt_backends.py <files...> [--language hi] [--threads 4] [--json out.json]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def word_errors(reference: str, hypothesis: str) -> int:
+    """Word-level Levenshtein distance"""
+    ref, hyp = reference.split(), hypothesis.split()
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def worker(files, language: str):
+    """Runs inside the subprocess: load the model with STT_BACKEND from the environment and transcribe"""
+    import torch
+    from services.stt_service import STTService
+
+    torch.manual_seed(0)
+    start = time.perf_counter()
+    stt = STTService(use_gpu=False)
+    load_s = time.perf_counter() - start
+    if not stt.is_model_loaded():
+        sys.exit("IndicConformer model not loaded")
+    load_rss = peak_rss_mb()
+
+    waves = []
+    for path in files:
+        with open(path, "rb") as f:
+            wav, _ = stt.preprocessor.prepare(f.read())
+        waves.append(wav)
+    stt.transcribe_waveform(waves[0], language)  # warm up
+
+    transcripts = []
+    audio_s = 0.0
+    start = time.perf_counter()
+    for wav in waves:
+        transcripts.append(stt.transcribe_waveform(wav, language)["text"])
+        audio_s += wav.shape[-1] / 16000
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "backend": stt.backend_info,
+        "load_s": load_s,
+        "rss_after_load_mb": load_rss,
+        "peak_rss_mb": peak_rss_mb(),
+        "audio_s": audio_s,
+        "rtf": elapsed / audio_s,
+        "transcripts": transcripts,
+    }))
+
+
+def run_backend(backend: str, files, language: str, threads: int) -> dict:
+    env = dict(os.environ, STT_BACKEND=backend, STT_TORCH_THREADS=str(threads), STT_INFERENCE_WORKERS="1")
+    proc = subprocess.run(
+        [sys.executable, __file__, "--worker", "--language", language] + list(files),
+        env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{backend} run failed:\n{proc.stderr[-2000:]}")
+    # Model loading prints to stdout; the result is the last line
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--language", default="hi")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    files = sorted(args.files)
+    if args.worker:
+        worker(files, args.language)
+        return
+
+    results = {backend: run_backend(backend, files, args.language, args.threads) for backend in BACKENDS}
+    reference = results["torch"]["transcripts"]
+    ref_words = sum(len(text.split()) for text in reference)
+
+    print(f"{'backend':<9}{'RTF':>8}{'load':>8}{'RSS load':>11}{'RSS peak':>11}{'WER':>8}{'agree':>8}")
+    for backend, r in results.items():
+        errors = sum(word_errors(ref, hyp) for ref, hyp in zip(reference, r["transcripts"]))
+        r["wer"] = errors / ref_words if ref_words else 0.0
+        r["agreement"] = sum(ref == hyp for ref, hyp in zip(reference, r["transcripts"])) / len(reference)
+        print(f"{backend:<9}{r['rtf']:>8.3f}{r['load_s']:>7.1f}s{r['rss_after_load_mb']:>8.0f} MB{r['peak_rss_mb']:>8.0f} MB"
+              f"{r['wer'] * 100:>7.1f}%{r['agreement'] * 100:>7.0f}%")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"files": files, "threads": args.threads, "results": results}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
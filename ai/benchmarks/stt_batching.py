@@ -0,0 +1,93 @@
+"""
+Throughput / latency of the IndicConformer inference worker at batch sizes 1, 4 and 8
+
+Submits N utterances concurrently to an IndicBatchWorker and reports utterances per second
+and p50/p95 end-to-end latency (queue wait + inference). Runs on CPU with the model from
+INDIC_CONFORMER_MODEL; pass audio files to use real recordings instead of synthetic noise.
+
+Usage:
+    python benchmarks/stt_batching.py [--utterances 32] [--language hi] [--json out.json] [files...]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.stt_batcher import IndicBatchWorker  # noqa: E402
+from services.stt_service import STTService  # noqa: E402
+
+
+def load_utterances(stt: STTService, files, count: int):
+    if files:
+        waves = []
+        for path in files:
+            with open(path, "rb") as f:
+                wav, _ = stt.preprocessor.prepare(f.read())
+            waves.append(wav)
+    else:
+        # 2-8 s of low-level noise at 16 kHz
+        waves = [torch.rand(1, 16000 * (2 + i % 7)) * 0.02 for i in range(8)]
+    return [waves[i % len(waves)] for i in range(count)]
+
+
+def run(stt: STTService, utterances, language: str, batch_size: int, max_wait_ms: float) -> dict:
+    worker = IndicBatchWorker(stt._run_model, device="cpu", max_batch_size=batch_size, max_wait_ms=max_wait_ms)
+    worker.submit(utterances[0], language, "ctc").result()  # warm up
+
+    start = time.perf_counter()
+    submitted = []
+    for wav in utterances:
+        submitted.append((time.perf_counter(), worker.submit(wav, language, "ctc")))
+    latencies = []
+    for submitted_at, future in submitted:
+        future.result()
+        latencies.append(time.perf_counter() - submitted_at)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    stats = worker.get_stats()
+    return {
+        "throughput_utt_per_s": len(utterances) / elapsed,
+        "p50_latency_s": statistics.median(latencies),
+        "p95_latency_s": latencies[max(0, int(len(latencies) * 0.95) - 1)],
+        "avg_batch_size": stats["avg_batch_size"],
+        "batched_supported": stats["batched_supported"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--utterances", type=int, default=32)
+    parser.add_argument("--language", default="hi")
+    parser.add_argument("--max-wait-ms", type=float, default=20)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    stt = STTService(use_gpu=False)
+    if not stt.is_model_loaded():
+        sys.exit("IndicConformer model not loaded")
+    utterances = load_utterances(stt, args.files, args.utterances)
+
+    results = {}
+    print(f"{'batch':>6}{'utt/s':>10}{'p50':>10}{'p95':>10}{'avg batch':>11}")
+    for batch_size in (1, 4, 8):
+        r = run(stt, utterances, args.language, batch_size, args.max_wait_ms)
+        results[str(batch_size)] = r
+        avg_batch = r["avg_batch_size"] or 0
+        print(f"{batch_size:>6}{r['throughput_utt_per_s']:>10.2f}{r['p50_latency_s']:>9.2f}s"
+              f"{r['p95_latency_s']:>9.2f}s{avg_batch:>11.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"threads": torch.get_num_threads(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Silence trimming and long-audio chunking on a corpus of recorded patient queries
+
+For every recording in the corpus directory, transcribes
+- baseline: full decoded waveform, no trimming, no chunking
+- optimized: VAD-trimmed, split into overlapping chunks over STT_CHUNK_SECONDS
+and reports audio seconds saved, end-to-end latency, speedup and whether the
+transcripts match.
+
+Usage:
+    python benchmarks/stt_vad_chunking.py <corpus_dir> [--language hi] [--json out.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.stt_service import STTService  # noqa: E402
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".ogg", ".flac")
+
+
+def transcribe(stt: STTService, data: bytes, language: str, trim: bool, chunk_seconds: float):
+    stt.vad_trim = trim
+    stt.chunk_seconds = chunk_seconds
+    start = time.perf_counter()
+    result = stt.transcribe_audio(data, language)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus_dir")
+    parser.add_argument("--language", default="hi")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    stt = STTService(use_gpu=False)
+    if not stt.is_model_loaded():
+        sys.exit("IndicConformer model not loaded")
+    chunk_seconds = stt.chunk_seconds
+
+    files = sorted(p for p in Path(args.corpus_dir).iterdir() if p.suffix.lower() in AUDIO_EXTENSIONS)
+    rows = []
+    print(f"{'file':<28}{'audio':>8}{'saved':>8}{'chunks':>8}{'baseline':>10}{'optimized':>11}{'speedup':>9}  match")
+    for path in files:
+        data = path.read_bytes()
+        baseline, baseline_s = transcribe(stt, data, args.language, trim=False, chunk_seconds=float("inf"))
+        optimized, optimized_s = transcribe(stt, data, args.language, trim=True, chunk_seconds=chunk_seconds)
+        wav, _ = stt.preprocessor.prepare(data)
+        row = {
+            "file": path.name,
+            "audio_s": wav.shape[-1] / 16000,
+            "saved_s": optimized["timings"]["audio_seconds_trimmed"],
+            "chunks": optimized["timings"]["chunks"],
+            "baseline_s": baseline_s,
+            "optimized_s": optimized_s,
+            "speedup": baseline_s / optimized_s if optimized_s else None,
+            "same_text": baseline["text"] == optimized["text"],
+        }
+        rows.append(row)
+        print(f"{row['file'][:27]:<28}{row['audio_s']:>7.1f}s{row['saved_s']:>7.1f}s{row['chunks']:>8}"
+              f"{row['baseline_s']:>9.2f}s{row['optimized_s']:>10.2f}s{row['speedup']:>8.2f}x  {row['same_text']}")
+
+    if rows:
+        total_baseline = sum(r["baseline_s"] for r in rows)
+        total_optimized = sum(r["optimized_s"] for r in rows)
+        summary = {
+            "files": len(rows),
+            "audio_s": sum(r["audio_s"] for r in rows),
+            "saved_s": sum(r["saved_s"] for r in rows),
+            "speedup": total_baseline / total_optimized if total_optimized else None,
+            "same_text": sum(r["same_text"] for r in rows),
+        }
+        print(f"\n{summary['files']} files, {summary['audio_s']:.1f}s audio, {summary['saved_s']:.1f}s trimmed, "
+              f"overall speedup {summary['speedup']:.2f}x, {summary['same_text']} identical transcripts")
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"summary": summary, "files": rows, "workers": os.getenv("STT_INFERENCE_WORKERS", "2")}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
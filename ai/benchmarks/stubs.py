@@ -0,0 +1,265 @@
+"""
+Local stand-ins for the upstream services, with configurable latency and errors
+
+One HTTP server answers the calls the AI service makes to:
+    ollama_generate    POST /api/generate                      (streamed RiskAssessment JSON)
+    ollama_embeddings  POST /api/embeddings                    (deterministic 1024-d vectors)
+    sarvam_translate   POST /api/v1/translation/translate
+    sarvam_tts         POST /v1/audio/speech                   (silent WAV, length ~ text)
+    whisper            POST /v1/audio/transcriptions
+Each upstream's latency is log-normal around a median (--latency NAME=MEDIAN_MS[:SIGMA]) and a
+fraction of its calls fail with HTTP 500 (--errors NAME=RATE). Point the service at it with the
+printed OLLAMA_BASE_URL / SARVAM_BASE_URL / WHISPER_API_URL, or use StubUpstreams from a script.
+
+Usage:
+    python benchmarks/stubs.py [--port 18500] [--latency ollama_generate=1500:0.3] [--errors sarvam_tts=0.05]
+"""
+import argparse
+import hashlib
+import io
+import json
+import math
+import random
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+# Median latency (ms) and log-normal sigma per upstream, roughly what the real services show
+DEFAULT_LATENCY: Dict[str, Tuple[float, float]] = {
+    "ollama_generate": (1500.0, 0.3),
+    "ollama_embeddings": (30.0, 0.2),
+    "sarvam_translate": (250.0, 0.3),
+    "sarvam_tts": (400.0, 0.3),
+    "whisper": (700.0, 0.25),
+}
+
+ROUTES = {
+    "/api/generate": "ollama_generate",
+    "/api/embeddings": "ollama_embeddings",
+    "/api/v1/translation/translate": "sarvam_translate",
+    "/v1/audio/speech": "sarvam_tts",
+    "/v1/audio/transcriptions": "whisper",
+}
+
+# What the Whisper stub "hears": a question naming a drug from data/drug_data.json
+TRANSCRIPT = "I forgot to take my Aldonil tablet yesterday, is that dangerous?"
+
+RISK_ASSESSMENT = {
+    "risk_level": "Medium",
+    "message": "Missing one dose can raise your blood sugar. Take the next dose at the usual time.",
+    "ai_explanation": "A single missed dose usually causes a short rise in blood glucose. Do not double "
+                      "the next dose; check your sugar levels and contact your doctor if you feel unwell."
+}
+
+# Streamed generate responses are cut into this many chunks
+GENERATE_CHUNKS = 12
+
+
+class UpstreamProfile:
+    """Latency distribution and error rate of one stubbed upstream"""
+
+    def __init__(self, median_ms: float, sigma: float = 0.0, error_rate: float = 0.0):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+
+    def sample(self, rng: random.Random) -> Tuple[float, bool]:
+        """(seconds to wait, whether this call fails)"""
+        seconds = self.median_ms / 1000 * math.exp(rng.gauss(0, self.sigma)) if self.sigma else self.median_ms / 1000
+        return seconds, rng.random() < self.error_rate
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"median_ms": self.median_ms, "sigma": self.sigma, "error_rate": self.error_rate}
+
+
+def parse_profiles(latency: Optional[list] = None, errors: Optional[list] = None, scale: float = 1.0) -> Dict[str, UpstreamProfile]:
+    """Defaults overridden by NAME=MEDIAN_MS[:SIGMA] and NAME=RATE options; scale multiplies every median"""
+    profiles = {name: UpstreamProfile(median * scale, sigma) for name, (median, sigma) in DEFAULT_LATENCY.items()}
+    for item in latency or []:
+        name, value = item.split("=", 1)
+        median, _, sigma = value.partition(":")
+        profiles[name].median_ms = float(median)
+        if sigma:
+            profiles[name].sigma = float(sigma)
+    for item in errors or []:
+        name, rate = item.split("=", 1)
+        profiles[name].error_rate = float(rate)
+    return profiles
+
+
+def _silent_wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(b"\x00\x00" * int(16000 * seconds))
+    return buffer.getvalue()
+
+
+def _embedding(text: str) -> list:
+    # Same text -> same vector, so similarity rankings are stable across runs
+    rng = random.Random(hashlib.sha256(text.encode()).digest())
+    return [rng.gauss(0, 1) for _ in range(1024)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_StubServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload: Dict, status: int = 200):
+        self._send(status, json.dumps(payload).encode())
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "gemma3:4b"}, {"name": "bge-m3:latest"}]})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        upstream = ROUTES.get(self.path.split("?", 1)[0])
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if upstream is None:
+            self._send_json({"error": "not found"}, 404)
+            return
+
+        delay, fail = self.server.sample(upstream)
+        if fail:
+            time.sleep(delay)
+            self._send_json({"error": f"stubbed {upstream} failure"}, 500)
+            return
+
+        if upstream == "ollama_generate":
+            self._generate(json.loads(body), delay)
+            return
+
+        time.sleep(delay)
+        if upstream == "ollama_embeddings":
+            self._send_json({"embedding": _embedding(json.loads(body).get("prompt", ""))})
+        elif upstream == "sarvam_translate":
+            request = json.loads(body)
+            self._send_json({"translated_text": f"[{request.get('target_language')}] {request.get('text', '')}"})
+        elif upstream == "sarvam_tts":
+            text = json.loads(body).get("text", "")
+            self._send(200, _silent_wav(min(0.06 * len(text), 30.0)), "audio/wav")
+        else:
+            self._send_json({"text": TRANSCRIPT})
+
+    def _generate(self, request: Dict, delay: float):
+        """Ollama's NDJSON stream: the answer in chunks spread over the latency, then a done chunk"""
+        text = json.dumps(RISK_ASSESSMENT)
+        final = {"done": True, "done_reason": "stop", "eval_count": len(text) // 4, "total_duration": int(delay * 1e9)}
+        if not request.get("stream", True):
+            time.sleep(delay)
+            self._send_json({"response": text, **final})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        size = math.ceil(len(text) / GENERATE_CHUNKS)
+        pieces = [{"response": text[i:i + size], "done": False} for i in range(0, len(text), size)]
+        try:
+            for piece in pieces + [{"response": "", **final}]:
+                time.sleep(delay / (len(pieces) + 1))
+                line = (json.dumps(piece) + "\n").encode()
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading (deadline or disconnect), as it would with Ollama
+            self.close_connection = True
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, profiles: Dict[str, UpstreamProfile], seed: Optional[int]):
+        super().__init__(address, _Handler)
+        self.profiles = profiles
+        self.calls: Dict[str, int] = {name: 0 for name in profiles}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, upstream: str) -> Tuple[float, bool]:
+        with self._lock:
+            self.calls[upstream] += 1
+            return self.profiles[upstream].sample(self._rng)
+
+
+class StubUpstreams:
+    """All stubbed upstreams on one local port, served from a background thread"""
+
+    def __init__(self, port: int = 0, profiles: Dict[str, UpstreamProfile] = None, seed: Optional[int] = 0):
+        self._server = _StubServer(("127.0.0.1", port), profiles or parse_profiles(), seed)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def profiles(self) -> Dict[str, UpstreamProfile]:
+        return self._server.profiles
+
+    def env(self) -> Dict[str, str]:
+        """Environment that points the AI service at these stubs"""
+        return {"OLLAMA_BASE_URL": self.url, "SARVAM_BASE_URL": self.url, "WHISPER_API_URL": self.url}
+
+    def calls(self) -> Dict[str, int]:
+        with self._server._lock:
+            return dict(self._server.calls)
+
+    def start(self) -> "StubUpstreams":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-upstreams", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubUpstreams":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=18500)
+    parser.add_argument("--latency", action="append", metavar="NAME=MEDIAN_MS[:SIGMA]", help="Override an upstream's latency")
+    parser.add_argument("--errors", action="append", metavar="NAME=RATE", help="Fraction of an upstream's calls that fail")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every default median latency")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stubs = StubUpstreams(args.port, parse_profiles(args.latency, args.errors, args.scale), args.seed)
+    for name, profile in stubs.profiles.items():
+        print(f"{name:<18} median {profile.median_ms:>7.0f}ms  sigma {profile.sigma:.2f}  errors {profile.error_rate:.1%}")
+    for key, value in stubs.env().items():
+        print(f"{key}={value}")
+    stubs.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stubs.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Memory per uvicorn worker with and without model preloading
+
+Starts the service (python main.py) with WORKERS=1, 4 and 8, once with PRELOAD_MODELS=true
+(parent loads models, workers are forked and share the pages) and once with
+PRELOAD_MODELS=false (every worker loads its own copy). After all workers report ready,
+reads /proc/<pid>/smaps_rollup of each worker and reports RSS, PSS (RSS with shared pages
+divided among the processes sharing them) and the private bytes per worker. Linux only.
+
+Usage:
+    python benchmarks/worker_rss.py [--workers 1 4 8] [--audio sample.wav] [--json out.json]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+AI_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def children(pid: int):
+    pids = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            pids.extend(int(p) for p in f.read().split())
+    workers = []
+    for child in pids:
+        with open(f"/proc/{child}/cmdline", "rb") as f:
+            cmdline = f.read()
+        # uvicorn's multiprocess mode may also start a multiprocessing resource tracker
+        if b"resource_tracker" not in cmdline:
+            workers.append(child)
+    return workers
+
+
+def smaps_rollup_mb(pid: int) -> dict:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": fields.get("Rss", 0.0),
+        "pss_mb": fields.get("Pss", 0.0),
+        "shared_mb": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+        "private_mb": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def wait_ready(base_url: str, workers: int, timeout: float):
+    # Connections are spread over the workers by the kernel: require a run of ready answers
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while streak < workers * 3:
+        if time.monotonic() > deadline:
+            raise TimeoutError("service did not become ready")
+        try:
+            ok = requests.get(f"{base_url}/health/ready", timeout=5).status_code == 200
+        except requests.RequestException:
+            ok = False
+        streak = streak + 1 if ok else 0
+        if not ok:
+            time.sleep(1)
+
+
+def run(workers: int, preload: bool, audio: bytes, requests_per_worker: int, timeout: float) -> dict:
+    port = free_port()
+    env = dict(os.environ, WORKERS=str(workers), PORT=str(port), PRELOAD_MODELS=str(preload).lower())
+    proc = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=AI_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        start = time.perf_counter()
+        wait_ready(base_url, workers, timeout)
+        ready_s = time.perf_counter() - start
+
+        if audio:
+            # Touch the model in every worker so copy-on-write faults show up
+            for _ in range(workers * requests_per_worker):
+                requests.post(
+                    f"{base_url}/voice/transcribe?language=hi",
+                    files={"file": ("sample.wav", audio, "audio/wav")},
+                    timeout=120
+                )
+
+        pids = children(proc.pid) if workers > 1 else [proc.pid]
+        per_worker = [smaps_rollup_mb(pid) for pid in pids]
+        parent = smaps_rollup_mb(proc.pid) if workers > 1 else None
+        total_pss = sum(w["pss_mb"] for w in per_worker) + (parent["pss_mb"] if parent else 0.0)
+        return {
+            "workers": len(per_worker),
+            "ready_s": ready_s,
+            "rss_per_worker_mb": statistics.mean(w["rss_mb"] for w in per_worker),
+            "pss_per_worker_mb": statistics.mean(w["pss_mb"] for w in per_worker),
+            "private_per_worker_mb": statistics.mean(w["private_mb"] for w in per_worker),
+            "total_pss_mb": total_pss,
+            "parent": parent,
+        }
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--audio", help="WAV file posted to /voice/transcribe before measuring")
+    parser.add_argument("--requests-per-worker", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=900)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    audio = Path(args.audio).read_bytes() if args.audio else b""
+    results = []
+    print(f"{'workers':>8}{'preload':>9}{'ready':>8}{'RSS/worker':>12}{'PSS/worker':>12}{'private':>10}{'total PSS':>11}")
+    for workers in args.workers:
+        for preload in (False, True):
+            if workers == 1 and preload:
+                continue  # a single worker is never forked
+            r = run(workers, preload, audio, args.requests_per_worker, args.timeout)
+            r["preload"] = preload
+            results.append(r)
+            print(f"{workers:>8}{str(preload):>9}{r['ready_s']:>7.1f}s{r['rss_per_worker_mb']:>9.0f} MB"
+                  f"{r['pss_per_worker_mb']:>9.0f} MB{r['private_per_worker_mb']:>7.0f} MB{r['total_pss_mb']:>8.0f} MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
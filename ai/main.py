@@ -1,31 +1,60 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import asyncio
+import logging
+import re
+from collections import deque
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import os
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# JSON logs written by a background thread (LOG_LEVEL, LOG_LEVELS, LOG_FORMAT)
+from services.logging_config import RequestIdMiddleware, configure_logging
+configure_logging()
+logger = logging.getLogger("main")
+
 from models.schemas import (
     SkipDoseRequest,
     RiskAnalysisResponse,
     VoiceTranscribeResponse,
     VoiceSynthesizeRequest,
     VoiceSynthesizeResponse,
+    ReminderAudioRequest,
     TranslationRequest,
     TranslationResponse,
+    BatchTranslationRequest,
+    BatchTranslationResponse,
     VoiceTranscribeWithTranslationResponse
 )
-from services.medgemma_service import MedGemmaService
-from services.bge_service import BGEService
+from prompts.registry import registry as prompt_registry
+from services.capabilities import CapabilityRegistry, CapabilityUnavailable, LOADING, READY
+from services.compression import CompressionMiddleware, PrecompressedBody
 from services.drug_service import DrugService
-from services.stt_service import STTService
-from services.tts_service import TTSService
 from services.translation_service import TranslationService
+from services.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    DeadlineMiddleware,
+    abandoned_work,
+    call_with_deadline,
+    current_deadline,
+    get_default_budget,
+    run_cancellable
+)
+from services.audio_transcode import CODECS
+from services import profiling
+from services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, cache_metrics, registry as metrics, span
+from services.responses import FastJSONResponse, dumps
+from services.text_segmentation import split_sentences
+from services.voice_query import VoiceQueryPipeline
 
-app = FastAPI(title="MedMentor AI Service", version="1.0.0")
+# Endpoints that return plain values still go through jsonable_encoder; hot ones return FastJSONResponse
+app = FastAPI(title="MedMentor AI Service", version="1.0.0", default_response_class=FastJSONResponse)
 
 # CORS configuration
 app.add_middleware(
@@ -36,34 +65,245 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-medgemma_service = MedGemmaService()
-bge_service = BGEService()
+# gzip/brotli for complete JSON/text responses; streams and audio pass through
+app.add_middleware(CompressionMiddleware)
+
+# Per-request time budget (X-Request-Timeout-Ms header or REQUEST_DEADLINE_SECONDS)
+app.add_middleware(DeadlineMiddleware)
+
+# Request latency histograms per route for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Per-request stack/torch profiles for requests sent with X-Profile (only when PROFILE_TOKEN is set)
+if profiling.enabled():
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+# Request id for log correlation (outermost, so every log line of the request carries it)
+app.add_middleware(RequestIdMiddleware)
+
+# Lightweight services are ready at import time
 drug_service = DrugService()
-stt_service = STTService()
-tts_service = TTSService()
 translation_service = TranslationService()
 
 
+# Heavy subsystems import and load in the background (ENABLE_STT/TTS/LLM/EMBEDDINGS=false skips them)
+def _load_stt():
+    from services.stt_service import STTService
+    return STTService()
+
+
+def _load_tts():
+    from services.tts_service import TTSService
+    service = TTSService()
+    if os.getenv("PHRASE_BANK_PRERENDER", "true").lower() == "true":
+        # Reminder template segments; drug names (one TTS call per drug and language) only on request
+        drug_names = []
+        if os.getenv("PHRASE_BANK_PRERENDER_DRUGS", "false").lower() == "true":
+            drug_names = [drug["name"] for drug in drug_service.drugs]
+        service.phrase_bank.start_prerender(drug_names)
+    return service
+
+
+def _warm_up_enabled() -> bool:
+    # Load the Ollama models before reporting ready so the first request is not a cold start
+    return os.getenv("OLLAMA_WARMUP", "true").lower() == "true"
+
+
+def _load_llm():
+    from services.medgemma_service import MedGemmaService
+    service = MedGemmaService()
+    if _warm_up_enabled():
+        service.warm_up()
+    return service
+
+
+def _load_embeddings():
+    from services.bge_service import BGEService
+    service = BGEService()
+    if _warm_up_enabled():
+        service.warm_up()
+    return service
+
+
+capabilities = CapabilityRegistry()
+capabilities.register("stt", _load_stt)
+capabilities.register("tts", _load_tts)
+capabilities.register("llm", _load_llm)
+capabilities.register("embeddings", _load_embeddings)
+
+
+@app.on_event("startup")
+async def load_capabilities():
+    """
+    Start loading models without blocking startup; /health/ready reports progress
+    """
+    capabilities.load_in_background()
+
+
+@app.exception_handler(CapabilityUnavailable)
+async def capability_unavailable_handler(request: Request, exc: CapabilityUnavailable):
+    headers = {"Retry-After": "5"} if exc.state == LOADING else None
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers=headers)
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(status_code=504, content={"detail": f"Request abandoned: {exc.reason}"})
+
+
 @app.get("/")
 async def root():
     return {"message": "MedMentor AI Service", "status": "running"}
 
 
+@app.get("/health/live")
+async def health_live():
+    """
+    Liveness: the process is up and serving (models may still be loading)
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """
+    Readiness: 200 once every enabled capability has loaded, 503 before that or if one failed
+    """
+    ready = capabilities.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "capabilities": capabilities.status()}
+    )
+
+
+@app.get("/stats")
+async def stats():
+    """
+    Runtime counters (abandoned upstream work, LLM output quality, ...)
+    """
+    result = {"deadlines": abandoned_work.snapshot()}
+    result["translation"] = translation_service.get_stats()
+    medgemma_service = capabilities.get_if_ready("llm")
+    if medgemma_service is not None:
+        result["medgemma"] = medgemma_service.get_stats()
+        if medgemma_service.cache.enabled:
+            result["llm_cache"] = medgemma_service.cache.get_stats()
+    result["prompts"] = prompt_registry.versions()
+    tts_service = capabilities.get_if_ready("tts")
+    if tts_service is not None:
+        result["tts_cache"] = tts_service.cache.get_stats()
+        result["phrase_bank"] = tts_service.phrase_bank.get_stats()
+        result["audio_delivery"] = tts_service.transcoder.get_stats()
+    stt_service = capabilities.get_if_ready("stt")
+    if stt_service is not None:
+        result["stt"] = stt_service.get_stats()
+        result["stt_preprocess"] = stt_service.preprocessor.get_stats()
+        result["stt_batching"] = stt_service.batcher.get_stats()
+        result["stt_cache"] = stt_service.cache.get_stats()
+    return FastJSONResponse(result)
+
+
+def _collect_service_metrics():
+    """Cache hit ratios and service counters, read from the services' own stats at scrape time"""
+    translation = translation_service.get_stats()
+    caches = []
+    for pair, counters in translation["pairs"].items():
+        source, target = pair.split("->", 1)
+        caches.append(({"cache": "translation_memory", "source": source, "target": target}, counters))
+    tts_service = capabilities.get_if_ready("tts")
+    if tts_service is not None:
+        caches.append(({"cache": "tts_audio"}, tts_service.cache.get_stats()))
+    stt_service = capabilities.get_if_ready("stt")
+    if stt_service is not None:
+        caches.append(({"cache": "stt_transcripts"}, stt_service.cache.get_stats()))
+    medgemma_service = capabilities.get_if_ready("llm")
+    if medgemma_service is not None and medgemma_service.cache.enabled:
+        caches.append(({"cache": "llm_analysis"}, medgemma_service.cache.get_stats()))
+    yield from cache_metrics(caches)
+
+    abandoned = abandoned_work.snapshot()["abandoned"]
+    yield ("medmentor_abandoned_work_total", "counter", "Upstream work cut short by deadlines or disconnects",
+           [({"work": work}, count) for work, count in abandoned.items()])
+    medgemma_service = capabilities.get_if_ready("llm")
+    if medgemma_service is not None:
+        yield ("medmentor_llm_responses_total", "counter", "LLM responses by how usable they were",
+               [({"result": result}, count) for result, count in medgemma_service.get_stats().items()])
+    yield ("medmentor_capability_ready", "gauge", "1 when an enabled capability has loaded",
+           [({"capability": name}, 1 if status["state"] == READY else 0) for name, status in capabilities.status().items() if capabilities.is_enabled(name)])
+
+
+metrics.register_collector(_collect_service_metrics)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Prometheus metrics of this worker process: request, stage and upstream latency
+    histograms, in-flight gauges, error/fallback counters and cache hit ratios
+    """
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+def _require_profile_token(request: Request):
+    # Without PROFILE_TOKEN the profiling endpoints do not exist
+    if not profiling.enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiling.token_matches(request.headers.get(profiling.PROFILE_HEADER)):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+@app.post("/admin/profile")
+async def start_profile(request: Request, seconds: float = 30, torch_ops: bool = True):
+    """
+    Sample every busy thread of this worker for `seconds` (max PROFILE_MAX_SECONDS)
+    The profile is saved when the window closes and listed by /admin/profiles.
+    """
+    _require_profile_token(request)
+    seconds = min(max(seconds, 1.0), float(os.getenv("PROFILE_MAX_SECONDS", "300")))
+    session = profiling.sampler.start_window(seconds, collect_torch=torch_ops)
+    return {"name": session.name, "seconds": seconds, "pid": os.getpid()}
+
+
+@app.get("/admin/profiles")
+async def list_profiles(request: Request):
+    """Saved profiles of this host, newest first"""
+    _require_profile_token(request)
+    return {"profiles": profiling.sampler.list_profiles()}
+
+
+@app.get("/admin/profiles/{name}")
+async def get_profile(name: str, request: Request, kind: str = "folded"):
+    """
+    A saved profile: folded stacks (flamegraph.pl, speedscope) or, with kind=torch,
+    the IndicConformer torch op table
+    """
+    _require_profile_token(request)
+    if not profiling.PROFILE_NAME.match(name) or kind not in ("folded", "torch"):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    path = profiling.sampler.directory / (f"{name}.folded" if kind == "folded" else f"{name}.torch.txt")
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=path.name)
+
+
 @app.post("/analyze_skip", response_model=RiskAnalysisResponse)
-async def analyze_skip(request: SkipDoseRequest):
+async def analyze_skip(request: SkipDoseRequest, http_request: Request):
     """
     Analyze risk of skipping medication
     """
     try:
         # Get drug information
-        drug_info = drug_service.get_drug(request.drug_name)
+        with span("get_drug"):
+            drug_info = drug_service.get_drug(request.drug_name)
         
         if not drug_info:
             raise HTTPException(status_code=404, detail=f"Drug '{request.drug_name}' not found in dataset")
         
         # Analyze risk using MedGemma
-        analysis = medgemma_service.analyze_skip_risk(
+        analysis = await run_cancellable(
+            http_request,
+            capabilities.get("llm").analyze_skip_risk,
+            work="analyze_skip",
             drug_name=request.drug_name,
             skips=request.skips,
             patient_age=request.patient_age,
@@ -71,20 +311,25 @@ async def analyze_skip(request: SkipDoseRequest):
             drug_info=drug_info
         )
         
-        # Find similar drugs using BGE
-        similar_drugs = bge_service.find_similar_drugs(
-            request.drug_name,
-            drug_service.drugs,
-            top_k=3
-        )
+        # Find similar drugs using BGE (omitted on instances without embeddings)
+        similar_drugs = []
+        if capabilities.is_enabled("embeddings"):
+            similar_drugs = await run_cancellable(
+                http_request,
+                capabilities.get("embeddings").find_similar_drugs,
+                request.drug_name,
+                drug_service.drugs,
+                top_k=3,
+                work="similar_drugs"
+            )
         
-        return RiskAnalysisResponse(
+        return FastJSONResponse(RiskAnalysisResponse(
             risk_level=analysis["risk_level"],
             message=analysis["message"],
             ai_explanation=analysis["ai_explanation"],
             similar_drugs=similar_drugs
-        )
-    except HTTPException:
+        ))
+    except (HTTPException, DeadlineExceeded, CapabilityUnavailable):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing skip risk: {str(e)}")
@@ -92,6 +337,7 @@ async def analyze_skip(request: SkipDoseRequest):
 
 @app.post("/voice/transcribe", response_model=VoiceTranscribeResponse)
 async def transcribe_audio(
+    http_request: Request,
     file: UploadFile = File(...),
     language: str = "hi",
     decoding: str = "ctc"
@@ -125,54 +371,325 @@ async def transcribe_audio(
             decoding = "ctc"
         
         # Transcribe using IndicConformer
-        result = stt_service.transcribe_audio(audio_data, language, decoding)
+        result = await run_cancellable(
+            http_request,
+            capabilities.get("stt").transcribe_audio,
+            audio_data,
+            language,
+            decoding,
+            work="transcribe"
+        )
         
         if not result["text"]:
             raise HTTPException(status_code=500, detail="Transcription failed or returned empty result")
         
-        return VoiceTranscribeResponse(
+        return FastJSONResponse(VoiceTranscribeResponse(
             text=result["text"],
             language=result["language"]
-        )
-    except HTTPException:
+        ))
+    except (HTTPException, DeadlineExceeded, CapabilityUnavailable):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error transcribing audio: {str(e)}")
 
 
+@app.websocket("/voice/stream")
+async def stream_transcription(websocket: WebSocket, language: str = "hi", decoding: str = "ctc"):
+    """
+    Real-time transcription over WebSocket
+    
+    Protocol:
+        client -> server: binary frames of 16 kHz mono 16-bit little-endian PCM,
+                          then a text frame "end" when the user stops talking
+        server -> client: {"type": "partial", "segment", "text", "start_s", "end_s", "transcript"}
+                          for every speech segment finalized by VAD while audio is still arriving,
+                          then {"type": "final", "text"} and the socket is closed
+    
+    Each segment is transcribed as soon as VAD closes it, so after the user stops speaking
+    only the last segment's inference remains.
+    """
+    stt_service = capabilities.get_if_ready("stt")
+    if stt_service is None:
+        # 1013: try again later
+        await websocket.close(code=1013)
+        return
+    from services.vad import StreamingSegmenter
+
+    await websocket.accept()
+    if decoding not in ["ctc", "rnnt"]:
+        decoding = "ctc"
+
+    segmenter = StreamingSegmenter()
+    pending: asyncio.Queue = asyncio.Queue()
+    deadlines = []
+
+    def start_segment(segment):
+        # Every segment gets its own budget; the stream itself may last much longer
+        deadline = Deadline(get_default_budget())
+        deadlines.append(deadline)
+        task = asyncio.ensure_future(run_in_threadpool(
+            call_with_deadline, deadline, stt_service.transcribe_waveform, segment.wav, language, decoding
+        ))
+        pending.put_nowait((segment, task))
+
+    async def send_results():
+        # Results are sent in segment order even though segments are transcribed concurrently
+        texts = []
+        index = 0
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            segment, task = item
+            try:
+                text = (await task)["text"]
+            except Exception as e:
+                await websocket.send_json({"type": "error", "segment": index, "detail": str(e)})
+                index += 1
+                continue
+            if text:
+                texts.append(text)
+            await websocket.send_json({
+                "type": "partial",
+                "segment": index,
+                "text": text,
+                "start_s": round(segment.start_s, 2),
+                "end_s": round(segment.end_s, 2),
+                "transcript": " ".join(texts)
+            })
+            index += 1
+        await websocket.send_json({"type": "final", "text": " ".join(texts)})
+
+    sender = asyncio.ensure_future(send_results())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                for segment in segmenter.push(message["bytes"]):
+                    start_segment(segment)
+            elif (message.get("text") or "").strip().lower() == "end":
+                break
+
+        for segment in segmenter.flush():
+            start_segment(segment)
+        pending.put_nowait(None)
+        await sender
+        await websocket.close()
+    except WebSocketDisconnect:
+        # Drop queued and in-flight segment work for the departed client
+        for deadline in deadlines:
+            deadline.cancel("client_disconnected")
+        sender.cancel()
+
+
 @app.post("/voice/synthesize", response_model=VoiceSynthesizeResponse)
-async def synthesize_speech(request: VoiceSynthesizeRequest):
+async def synthesize_speech(request: VoiceSynthesizeRequest, http_request: Request):
     """
     Synthesize text to speech in specified language using Sarvam TTS
     """
     try:
-        audio_path = tts_service.synthesize_speech(request.text, request.language)
+        audio_path = await run_cancellable(
+            http_request,
+            capabilities.get("tts").synthesize_speech,
+            request.text,
+            request.language,
+            work="synthesize"
+        )
+        
+        # Compact variants are prepared while the client is still receiving the URL
+        capabilities.get("tts").transcoder.schedule(audio_path)
         
         # Return relative path that can be served
-        return VoiceSynthesizeResponse(
+        return FastJSONResponse(VoiceSynthesizeResponse(
             audio_url=f"/voice/audio/{os.path.basename(audio_path)}"
-        )
+        ))
+    except (DeadlineExceeded, CapabilityUnavailable):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error synthesizing speech: {str(e)}")
+
+
+@app.post("/voice/synthesize/stream")
+async def synthesize_speech_stream(request: VoiceSynthesizeRequest):
+    """
+    Stream synthesized speech as one chunked 16-bit mono WAV
+    The text is split into sentences that are synthesized concurrently (TTS_STREAM_CONCURRENCY)
+    and sent in order, so playback can start once the first sentence is ready.
+    """
+    tts_service = capabilities.get("tts")
+    # numpy is not in the text-only image; TTS being ready means it is installed
+    from services.wav_utils import pcm16, resample, streaming_wav_header
+    sentences = split_sentences(request.text)
+    if not sentences:
+        raise HTTPException(status_code=400, detail="No text to synthesize")
+
+    pending: deque = deque()
+    next_sentence = 0
+
+    def fill():
+        # Keep up to stream_concurrency sentences in flight ahead of the one being sent
+        nonlocal next_sentence
+        while next_sentence < len(sentences) and len(pending) < tts_service.stream_concurrency:
+            pending.append(asyncio.ensure_future(run_in_threadpool(
+                profiling.bind(tts_service.synthesize_samples), sentences[next_sentence], request.language
+            )))
+            next_sentence += 1
+
+    def cancel_pending():
+        for task in pending:
+            task.cancel()
+        pending.clear()
+
+    # The first sentence is awaited before responding so its failure is still a proper 500
+    fill()
+    try:
+        first_samples, sample_rate = await pending.popleft()
+    except DeadlineExceeded:
+        cancel_pending()
+        raise
     except Exception as e:
+        cancel_pending()
         raise HTTPException(status_code=500, detail=f"Error synthesizing speech: {str(e)}")
 
+    async def audio_stream():
+        completed = False
+        try:
+            yield streaming_wav_header(sample_rate) + pcm16(first_samples)
+            fill()
+            while pending:
+                try:
+                    samples, rate = await pending.popleft()
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    # Headers are already sent: skip the sentence rather than break the stream
+                    logger.error("Error synthesizing streamed sentence: %s", e)
+                    fill()
+                    continue
+                fill()
+                yield pcm16(resample(samples, rate, sample_rate))
+            completed = True
+        finally:
+            if not completed:
+                # Client went away (or the budget ran out): stop queued sentences
+                cancel_pending()
+                deadline = current_deadline()
+                if deadline is not None:
+                    deadline.cancel("client_disconnected")
+
+    return StreamingResponse(
+        audio_stream(),
+        media_type="audio/wav",
+        headers={"X-Sentence-Count": str(len(sentences)), "Cache-Control": "no-store"}
+    )
+
+
+@app.post("/voice/reminder", response_model=VoiceSynthesizeResponse)
+async def synthesize_reminder(request: ReminderAudioRequest, http_request: Request):
+    """
+    Spoken medication reminder for a drug
+    Stitched from pre-rendered template audio and the cached drug-name segment; only an
+    unseen drug name needs a TTS call.
+    """
+    try:
+        audio_path = await run_cancellable(
+            http_request,
+            capabilities.get("tts").phrase_bank.reminder_audio,
+            request.drug_name,
+            request.language,
+            work="reminder"
+        )
+        capabilities.get("tts").transcoder.schedule(audio_path)
+        return FastJSONResponse(VoiceSynthesizeResponse(
+            audio_url=f"/voice/audio/{os.path.basename(audio_path)}"
+        ))
+    except (DeadlineExceeded, CapabilityUnavailable):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error synthesizing reminder: {str(e)}")
+
+
+# Generated audio is named <content hash>.<format>; nothing else is served
+AUDIO_FILENAME = re.compile(r"^([0-9a-f]{32})\.(wav|mp3|opus)$")
+AUDIO_MEDIA_TYPES = {"wav": "audio/wav", "mp3": "audio/mpeg", "opus": CODECS["opus"]["media_type"]}
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
 
 @app.get("/voice/audio/{filename}")
-async def get_audio_file(filename: str):
+async def get_audio_file(filename: str, request: Request):
     """
     Serve generated audio files
+    File names are content hashes, so responses are immutable: strong ETag, year-long caching,
+    Range requests. Clients that accept Opus/MP3 get the compact variant once it is transcoded.
     """
+    match = AUDIO_FILENAME.match(filename)
+    if not match:
+        raise HTTPException(status_code=404, detail="Audio file not found")
+    key, ext = match.groups()
+    tts_service = capabilities.get("tts")
     audio_path = os.path.join(tts_service.output_dir, filename)
-    if not os.path.exists(audio_path):
+    try:
+        original = os.stat(audio_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Audio file not found")
-    return FileResponse(audio_path)
+
+    headers = {"Cache-Control": "public, max-age=31536000, immutable"}
+    serve_path, stat_result, served_ext = audio_path, original, ext
+    transcoder = tts_service.transcoder
+    if ext == "wav" and transcoder.enabled:
+        headers["Vary"] = "Accept"
+        accepted = transcoder.accepted_codecs(request.headers.get("accept"))
+        for codec in accepted:
+            variant_path = transcoder.variant_path(key, codec)
+            try:
+                stat_result = os.stat(variant_path)
+            except FileNotFoundError:
+                continue
+            serve_path, served_ext = variant_path, codec
+            break
+        if accepted and serve_path == audio_path:
+            transcoder.schedule(audio_path)
+
+    etag = f'"{key}.{served_ext}"'
+    headers["ETag"] = etag
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if serve_path != audio_path and "range" not in request.headers:
+        transcoder.record_served(original.st_size, stat_result.st_size)
+
+    media_type = AUDIO_MEDIA_TYPES[served_ext]
+    accel_prefix = os.getenv("AUDIO_ACCEL_REDIRECT_PREFIX")
+    if accel_prefix:
+        # Let the reverse proxy (nginx internal location) send the file with sendfile
+        headers["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{os.path.basename(serve_path)}"
+        return Response(headers=headers, media_type=media_type)
+    return FileResponse(serve_path, stat_result=stat_result, media_type=media_type, headers=headers)
+
+
+# (drug list, its JSON body and compressed variants) for /drugs
+_drugs_body: Optional[Tuple[List[Dict], PrecompressedBody]] = None
 
 
 @app.get("/drugs")
-async def list_drugs():
+async def list_drugs(request: Request):
     """
     List all drugs in dataset
+    The dataset is loaded once, so its serialized and compressed bodies are reused until
+    the list is replaced
     """
-    return {"drugs": drug_service.drugs, "count": len(drug_service.drugs)}
+    global _drugs_body
+    drugs = drug_service.drugs
+    if _drugs_body is None or _drugs_body[0] is not drugs:
+        _drugs_body = (drugs, PrecompressedBody(dumps({"drugs": drugs, "count": len(drugs)})))
+    return _drugs_body[1].response(request.headers.get("accept-encoding", ""))
 
 
 @app.get("/drugs/{drug_name}")
@@ -183,11 +700,12 @@ async def get_drug(drug_name: str):
     drug = drug_service.get_drug(drug_name)
     if not drug:
         raise HTTPException(status_code=404, detail=f"Drug '{drug_name}' not found")
-    return drug
+    return FastJSONResponse(drug)
 
 
 @app.post("/voice/transcribe-and-translate", response_model=VoiceTranscribeWithTranslationResponse)
 async def transcribe_and_translate(
+    http_request: Request,
     file: UploadFile = File(...),
     source_language: str = "hi",
     target_language: str = "English",
@@ -216,55 +734,180 @@ async def transcribe_and_translate(
         if decoding not in ["ctc", "rnnt"]:
             decoding = "ctc"
         
-        stt_result = stt_service.transcribe_audio(audio_data, source_language, decoding)
+        stt_result = await run_cancellable(
+            http_request,
+            capabilities.get("stt").transcribe_audio,
+            audio_data,
+            source_language,
+            decoding,
+            work="transcribe"
+        )
         original_text = stt_result["text"]
         
         if not original_text:
             raise HTTPException(status_code=500, detail="Transcription failed or returned empty result")
         
         # Step 2: Translate text to target language
-        translation_result = translation_service.translate(
+        translation_result = await run_cancellable(
+            http_request,
+            translation_service.translate,
+            work="translate",
             text=original_text,
             target_language=target_language,
             source_language=source_language
         )
         
-        return VoiceTranscribeWithTranslationResponse(
+        return FastJSONResponse(VoiceTranscribeWithTranslationResponse(
             original_text=original_text,
             translated_text=translation_result["text"],
             source_language=source_language,
             target_language=target_language
-        )
-    except HTTPException:
+        ))
+    except (HTTPException, DeadlineExceeded, CapabilityUnavailable):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in transcribe and translate: {str(e)}")
 
 
+@app.post("/voice/query")
+async def voice_query(
+    http_request: Request,
+    file: UploadFile = File(...),
+    language: str = "hi",
+    response_language: Optional[str] = None,
+    patient_age: int = 60,
+    skips: int = 1,
+    conditions: List[str] = Query(default=[]),
+    decoding: str = "ctc"
+):
+    """
+    Answer a spoken question about a skipped dose in one call, streamed as NDJSON
+    Chains STT -> translation -> drug resolution (fuzzy) -> risk analysis -> translation -> TTS
+    in-process. One JSON object per line is sent as each stage completes ("transcribe",
+    "translate_query", "resolve_drug", "analyze", "similar_drugs", "translate_response",
+    "synthesize"), each with its duration in ms, then "done" with all stage timings.
+    A failure after the first line is reported as an "error" line.
+
+    Args:
+        file: Audio file (WAV, FLAC, MP3, etc.)
+        language: Language of the audio (hi, ta, te, en, etc.)
+        response_language: Language of the answer (default: same as the audio)
+    """
+    if not file.filename.endswith(('.wav', '.mp3', '.m4a', '.ogg', '.flac')):
+        raise HTTPException(status_code=400, detail="Unsupported audio format")
+    if decoding not in ["ctc", "rnnt"]:
+        decoding = "ctc"
+
+    pipeline = VoiceQueryPipeline(
+        http_request,
+        stt=capabilities.get("stt"),
+        llm=capabilities.get("llm"),
+        drug_service=drug_service,
+        translation_service=translation_service,
+        tts=capabilities.get("tts") if capabilities.is_enabled("tts") else None,
+        embeddings=capabilities.get("embeddings") if capabilities.is_enabled("embeddings") else None
+    )
+
+    # Transcription is awaited before responding so an unusable recording is still a proper error
+    try:
+        transcript = await pipeline.transcribe(await file.read(), language, decoding)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error transcribing audio: {str(e)}")
+    if not transcript["text"]:
+        raise HTTPException(status_code=422, detail="No speech recognized in the recording")
+
+    async def event_stream():
+        completed = False
+        try:
+            yield dumps(transcript) + b"\n"
+            async for event in pipeline.events(
+                transcript, response_language or language, patient_age, skips, conditions
+            ):
+                yield dumps(event) + b"\n"
+            completed = True
+        except DeadlineExceeded as e:
+            yield dumps({"stage": "error", "detail": str(e), "timings": pipeline.timings}) + b"\n"
+        except Exception as e:
+            logger.exception("Error in voice query pipeline: %s", e)
+            yield dumps({"stage": "error", "detail": str(e), "timings": pipeline.timings}) + b"\n"
+        finally:
+            if not completed:
+                # Stop upstream work still running for this request
+                deadline = current_deadline()
+                if deadline is not None:
+                    deadline.cancel("client_disconnected")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-store"}
+    )
+
+
 @app.post("/translate", response_model=TranslationResponse)
-async def translate_text(request: TranslationRequest):
+async def translate_text(request: TranslationRequest, http_request: Request):
     """
     Translate text using Sarvam Translation API
     Supports translation between English and Indian languages (Hindi, Tamil, Telugu, etc.)
     Uses Sarvam translation service at http://10.11.7.65:8092
     """
     try:
-        result = translation_service.translate(
+        result = await run_cancellable(
+            http_request,
+            translation_service.translate,
+            work="translate",
             text=request.text,
             target_language=request.target_language,
             source_language=request.source_language
         )
         
-        return TranslationResponse(
+        return FastJSONResponse(TranslationResponse(
             text=result["text"],
             source_language=result["source_language"],
             target_language=result["target_language"]
-        )
+        ))
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error translating text: {str(e)}")
 
 
+@app.post("/translate/batch", response_model=BatchTranslationResponse)
+async def translate_batch(request: BatchTranslationRequest, http_request: Request):
+    """
+    Translate several texts (e.g. a risk message and its explanation) in one call
+    Sentences are deduplicated across the batch and translated concurrently; results
+    come back in request order with paragraph breaks preserved.
+    """
+    try:
+        result = await run_cancellable(
+            http_request,
+            translation_service.translate_many,
+            work="translate_batch",
+            texts=request.texts,
+            target_language=request.target_language,
+            source_language=request.source_language
+        )
+        return FastJSONResponse(BatchTranslationResponse(**result))
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error translating texts: {str(e)}")
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    port = int(os.getenv("PORT", "8000"))
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers > 1 and os.getenv("PRELOAD_MODELS", "true").lower() == "true":
+        # Load models once in this process and fork workers that share them copy-on-write
+        from services.prefork import serve_preforked
+        serve_preforked(app, capabilities, host="0.0.0.0", port=port, workers=workers)
+    elif workers > 1:
+        # Every worker imports main and loads its own copy of the models
+        uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers, log_config=None)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port, log_config=None)
 
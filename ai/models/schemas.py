@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Literal, Optional, List
 
 
 class SkipDoseRequest(BaseModel):
@@ -16,6 +16,18 @@ class RiskAnalysisResponse(BaseModel):
     similar_drugs: Optional[List[str]] = None
 
 
+class RiskAssessment(BaseModel):
+    """
+    Structured output requested from the LLM for /analyze_skip
+    Its JSON schema is sent as Ollama's `format`, so generation is constrained to this shape
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    risk_level: Literal["Low", "Medium", "High"]
+    message: str = Field(..., min_length=1)
+    ai_explanation: str = Field(..., min_length=1)
+
+
 class VoiceTranscribeRequest(BaseModel):
     audio_data: str  # Base64 encoded audio
     language: Optional[str] = "en"
@@ -31,6 +43,11 @@ class VoiceSynthesizeRequest(BaseModel):
     language: str = "en"
 
 
+class ReminderAudioRequest(BaseModel):
+    drug_name: str
+    language: str = "hi"
+
+
 class VoiceSynthesizeResponse(BaseModel):
     audio_url: str  # Path to generated audio file
 
@@ -47,6 +64,20 @@ class TranslationResponse(BaseModel):
     target_language: str
 
 
+class BatchTranslationRequest(BaseModel):
+    texts: List[str]
+    target_language: str
+    source_language: str = "auto"
+
+
+class BatchTranslationResponse(BaseModel):
+    texts: List[str]  # Translations, in request order
+    source_language: str
+    target_language: str
+    segments: int  # Sentences across all texts
+    unique_segments: int  # Sentences actually translated (after dedup)
+
+
 class VoiceTranscribeWithTranslationResponse(BaseModel):
     original_text: str  # Text in original language (from STT)
     translated_text: str  # Translated text
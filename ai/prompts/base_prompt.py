@@ -19,6 +19,28 @@ class BasePrompt(BaseModel, ABC):
         """Return dictionary of variables to format into the template"""
         pass
     
+    def get_options(self) -> Dict[str, Any]:
+        """
+        Return Ollama generation options tuned for this template
+        (e.g. num_predict, num_ctx); empty means model defaults
+        """
+        return {}
+    
+    def get_format(self) -> Optional[Dict[str, Any]]:
+        """
+        Return a JSON schema for Ollama's structured output `format`
+        None means free-text generation
+        """
+        return None
+    
+    def get_static_prefix(self) -> str:
+        """
+        Return the part of the template before the first variable
+        Templates that keep per-request data at the end share this prefix across requests,
+        so Ollama can reuse its cached evaluation of it.
+        """
+        return self.get_template().split("{", 1)[0]
+    
     def format(self) -> str:
         """
         Format the prompt template with variables
@@ -1,16 +1,15 @@
-import os
-from pathlib import Path
-from typing import Dict
+from prompts.registry import PromptRegistry, registry
 
 
 class PromptLoader:
-    """Utility class to load and format prompts from files"""
+    """
+    Utility class to load and format prompts from files
+    Backed by a PromptRegistry, so edited files are reloaded instead of served stale.
+    """
     
     def __init__(self, prompts_dir: str = None):
-        if prompts_dir is None:
-            prompts_dir = os.path.join(Path(__file__).parent)
-        self.prompts_dir = Path(prompts_dir)
-        self._cache: Dict[str, str] = {}
+        self.registry = registry if prompts_dir is None else PromptRegistry(prompts_dir)
+        self.prompts_dir = self.registry.prompts_dir
     
     def load_prompt(self, filename: str) -> str:
         """
@@ -22,21 +21,7 @@ class PromptLoader:
         Returns:
             Prompt text as string
         """
-        # Check cache first
-        if filename in self._cache:
-            return self._cache[filename]
-        
-        # Load from file
-        prompt_path = self.prompts_dir / filename
-        if not prompt_path.exists():
-            raise FileNotFoundError(f"Prompt file not found: {prompt_path}")
-        
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            prompt = f.read().strip()
-        
-        # Cache it
-        self._cache[filename] = prompt
-        return prompt
+        return self.registry.get(filename).text
     
     def format_prompt(self, filename: str, **kwargs) -> str:
         """
@@ -49,10 +34,9 @@ class PromptLoader:
         Returns:
             Formatted prompt string
         """
-        prompt_template = self.load_prompt(filename)
-        return prompt_template.format(**kwargs)
+        return self.registry.get(filename).render(kwargs)
     
     def clear_cache(self):
         """Clear the prompt cache"""
-        self._cache.clear()
+        self.registry.clear()
 
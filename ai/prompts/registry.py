@@ -0,0 +1,118 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from operator import itemgetter
+from pathlib import Path
+from string import Formatter
+from typing import Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rough tokens per character for budget checks (Gemma's tokenizer averages ~4 chars per token in English)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for prompt budgeting; no tokenizer round trip"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class CompiledTemplate:
+    """
+    A prompt template parsed once into static segments and field names
+    render() fills a precompiled %-format string from an itemgetter instead of re-parsing the
+    template with str.format on every request. The version (a hash of the text) changes
+    whenever the template does, so it can be part of cache keys.
+    """
+
+    def __init__(self, name: str, text: str, mtime: float = 0.0):
+        self.name = name
+        self.text = text
+        self.mtime = mtime
+        self.version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        # segments[i] precedes fields[i]; the last segment follows the last field
+        self.segments: List[str] = []
+        self.fields: List[str] = []
+        literal_run = ""
+        for literal, field, spec, conversion in Formatter().parse(text):
+            # Escaped braces ({{ and }}) come back from parse() already unescaped
+            literal_run += literal
+            if field is None:
+                continue
+            if spec or conversion or not field.isidentifier():
+                raise ValueError(f"Prompt {name}: only plain {{name}} fields are supported, got {{{field}}}")
+            self.segments.append(literal_run)
+            self.fields.append(field)
+            literal_run = ""
+        self.segments.append(literal_run)
+        self.static_prefix = self.segments[0]
+        self.static_tokens = estimate_tokens("".join(self.segments))
+        self._format = "%s".join(segment.replace("%", "%%") for segment in self.segments)
+        # itemgetter returns a bare value (not a tuple) for a single field
+        getter = itemgetter(*self.fields) if self.fields else (lambda values: ())
+        self._values = getter if len(self.fields) != 1 else (lambda values: (values[self.fields[0]],))
+
+    def render(self, values: Mapping[str, object]) -> str:
+        """Fill every field; missing values raise KeyError like str.format"""
+        return self._format % self._values(values)
+
+
+class PromptRegistry:
+    """
+    Prompt templates from the prompts directory, compiled once and reloaded when edited
+    A template's file is stat()ed at most every PROMPT_RELOAD_SECONDS (0 disables reloading);
+    an edit that fails to compile keeps the previous version in service.
+    """
+
+    def __init__(self, prompts_dir: Optional[str] = None, reload_seconds: Optional[float] = None):
+        self.prompts_dir = Path(prompts_dir or os.getenv("PROMPTS_DIR") or Path(__file__).parent)
+        self.reload_seconds = reload_seconds if reload_seconds is not None else float(os.getenv("PROMPT_RELOAD_SECONDS", "2"))
+        self._templates: Dict[str, Tuple[CompiledTemplate, float]] = {}  # name -> (template, next check)
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> Path:
+        return self.prompts_dir / (name if Path(name).suffix else f"{name}.txt")
+
+    def get(self, name: str) -> CompiledTemplate:
+        """The current compiled template `name` (risk_analysis -> risk_analysis.txt)"""
+        entry = self._templates.get(name)
+        if entry is not None and (self.reload_seconds <= 0 or time.monotonic() < entry[1]):
+            return entry[0]
+        with self._lock:
+            entry = self._templates.get(name)
+            if entry is not None and time.monotonic() < entry[1]:
+                return entry[0]
+            template = self._load(name, entry[0] if entry else None)
+            self._templates[name] = (template, time.monotonic() + self.reload_seconds)
+            return template
+
+    def _load(self, name: str, current: Optional[CompiledTemplate]) -> CompiledTemplate:
+        path = self._path(name)
+        try:
+            mtime = path.stat().st_mtime
+            if current is not None and mtime == current.mtime:
+                return current
+            template = CompiledTemplate(name, path.read_text(encoding="utf-8").strip(), mtime)
+        except (OSError, ValueError) as e:
+            if current is None:
+                if isinstance(e, FileNotFoundError):
+                    raise FileNotFoundError(f"Prompt file not found: {path}") from e
+                raise
+            logger.warning("Keeping prompt %s version %s: %s", name, current.version, e)
+            return current
+        if current is not None:
+            logger.info("Reloaded prompt %s: version %s -> %s", name, current.version, template.version)
+        return template
+
+    def versions(self) -> Dict[str, str]:
+        """Loaded templates and their versions"""
+        return {name: template.version for name, (template, _) in self._templates.items()}
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+registry = PromptRegistry()
@@ -1,14 +1,58 @@
+import logging
 from prompts.base_prompt import BasePrompt
+from prompts.registry import CHARS_PER_TOKEN, CompiledTemplate, estimate_tokens, registry
+from models.schemas import RiskAssessment
 from pydantic import Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Template file in this directory (risk_analysis.txt); edits are picked up without a restart
+TEMPLATE_NAME = "risk_analysis"
+
+# Generation options: short bounded JSON answer, small context window
+OPTIONS: Dict[str, Any] = {
+    "temperature": 0.1,
+    "top_p": 0.9,
+    "num_predict": 256,
+    "num_ctx": 2048
+}
+
+# The prompt must leave room for the answer in the context window
+MAX_PROMPT_TOKENS = OPTIONS["num_ctx"] - OPTIONS["num_predict"]
+
+NO_CONDITIONS = "no specific conditions"
+
+# Generating the JSON schema takes ~0.2 ms, so it is built once
+_RISK_FORMAT = RiskAssessment.model_json_schema()
+
+
+def _fit_conditions(conditions: List[str], budget_tokens: int) -> str:
+    """Comma-separated conditions, cut to the token budget with a count of those left out"""
+    if not conditions:
+        return NO_CONDITIONS
+    text = ", ".join(conditions)
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+
+    budget_chars = budget_tokens * CHARS_PER_TOKEN - len(" (and 9999 more)")
+    kept, used = [], 0
+    for condition in conditions:
+        used += len(condition) + 2
+        if used > budget_chars:
+            break
+        kept.append(condition)
+    omitted = len(conditions) - len(kept)
+    logger.info("Trimmed %d of %d conditions to fit the prompt budget", omitted, len(conditions), extra={"sampled": True})
+    return f"{', '.join(kept)} (and {omitted} more)" if kept else f"{len(conditions)} conditions"
 
 
 class RiskAnalysisPrompt(BasePrompt):
     """
     Prompt for analyzing medication skip risk
-    Uses structured data with validation
+    Uses structured data with validation; render() is the per-request fast path
     """
-    
+
     # Input fields with validation
     patient_age: int = Field(..., description="Patient age in years", gt=0, lt=150)
     conditions: List[str] = Field(default_factory=list, description="List of medical conditions")
@@ -16,41 +60,97 @@ class RiskAnalysisPrompt(BasePrompt):
     drug_category: str = Field(default="Unknown", description="Category of the medication")
     skips: int = Field(..., description="Number of skipped doses", ge=0)
     risk_info: str = Field(default="Unknown risk", description="Known risk if medication is skipped")
-    
+
+    @staticmethod
+    def template() -> CompiledTemplate:
+        """
+        The compiled template (risk_analysis.txt)
+        The instruction block is an invariant prefix; drug data and then patient data come last
+        so consecutive requests share as long a cached prefix as possible.
+        """
+        return registry.get(TEMPLATE_NAME)
+
     def get_template(self) -> str:
         """Return the prompt template"""
-        return """You are a medical AI assistant. Analyze the risk of a patient skipping their medication.
-
-Patient Information:
-- Age: {patient_age} years
-- Medical Conditions: {conditions_str}
-- Medication: {drug_name} ({drug_category})
-- Number of skipped doses: {skips}
-- Known risk if skipped: {risk_info}
-
-Please provide:
-1. Risk Level: "Low", "Medium", or "High"
-2. A brief message explaining the immediate concern
-3. A detailed AI explanation of what could happen
-
-Format your response as:
-RISK_LEVEL: [Low/Medium/High]
-MESSAGE: [brief message]
-EXPLANATION: [detailed explanation]"""
-    
+        return self.template().text
+
+    def get_static_prefix(self) -> str:
+        return self.template().static_prefix
+
+    def get_options(self) -> Dict[str, Any]:
+        """Generation options: short bounded JSON answer, small context window"""
+        return dict(OPTIONS)
+
+    def get_format(self) -> Dict[str, Any]:
+        """Constrain the answer to the RiskAssessment schema"""
+        return _RISK_FORMAT
+
     def get_variables(self) -> Dict[str, Any]:
         """Return formatted variables for the template"""
-        conditions_str = ", ".join(self.conditions) if self.conditions else "no specific conditions"
-        
-        return {
-            "patient_age": self.patient_age,
-            "conditions_str": conditions_str,
-            "drug_name": self.drug_name,
-            "drug_category": self.drug_category,
-            "skips": self.skips,
-            "risk_info": self.risk_info
+        return self._variables(
+            self.template(), self.patient_age, self.conditions, self.drug_name,
+            self.drug_category, self.skips, self.risk_info
+        )
+
+    def format(self) -> str:
+        return self.template().render(self.get_variables())
+
+    @staticmethod
+    def _variables(
+        template: CompiledTemplate,
+        patient_age: int,
+        conditions: List[str],
+        drug_name: str,
+        drug_category: str,
+        skips: int,
+        risk_info: str
+    ) -> Dict[str, Any]:
+        variables = {
+            "patient_age": patient_age,
+            "drug_name": drug_name,
+            "drug_category": drug_category,
+            "skips": skips,
+            "risk_info": risk_info
         }
-    
+        # Numbers are a few characters each; the free-text values are what varies
+        variable_chars = len(drug_name) + len(drug_category) + len(risk_info) + 8
+        budget = MAX_PROMPT_TOKENS - template.static_tokens - variable_chars // CHARS_PER_TOKEN
+        variables["conditions_str"] = _fit_conditions(conditions, budget)
+        return variables
+
+    @classmethod
+    def render(
+        cls,
+        patient_age: int,
+        drug_name: str,
+        skips: int,
+        conditions: List[str] = None,
+        drug_info: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, str]:
+        """
+        Prompt text and template version, without building a pydantic model
+        Applies the same constraints as the fields (ValueError instead of ValidationError).
+        """
+        if not isinstance(patient_age, int) or not 0 < patient_age < 150:
+            raise ValueError(f"patient_age must be an integer between 1 and 149, got {patient_age!r}")
+        if not isinstance(skips, int) or skips < 0:
+            raise ValueError(f"skips must be a non-negative integer, got {skips!r}")
+        if not isinstance(drug_name, str) or not drug_name:
+            raise ValueError("drug_name must be a non-empty string")
+
+        drug_info = drug_info or {}
+        template = cls.template()
+        variables = cls._variables(
+            template,
+            patient_age,
+            [str(condition) for condition in conditions or []],
+            drug_name,
+            str(drug_info.get("category", "Unknown")),
+            skips,
+            str(drug_info.get("risk_if_skipped", "Unknown risk"))
+        )
+        return template.render(variables), template.version
+
     @classmethod
     def from_drug_info(
         cls,
@@ -65,14 +165,14 @@ EXPLANATION: [detailed explanation]"""
         """
         if conditions is None:
             conditions = []
-        
+
         drug_category = "Unknown"
         risk_info = "Unknown risk"
-        
+
         if drug_info:
             drug_category = drug_info.get("category", "Unknown")
             risk_info = drug_info.get("risk_if_skipped", "Unknown risk")
-        
+
         return cls(
             patient_age=patient_age,
             conditions=conditions,
@@ -81,4 +181,3 @@ EXPLANATION: [detailed explanation]"""
             skips=skips,
             risk_info=risk_info
         )
-
@@ -0,0 +1,127 @@
+import struct
+import warnings
+import wave
+from io import BytesIO
+from typing import Optional, Tuple
+
+import torch
+import torchaudio
+
+
+# WAVE format tags
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def sniff_format(data: bytes) -> Optional[str]:
+    """
+    Detect the container format from the leading magic bytes
+    Returns "wav", "flac", "ogg", "mp3", "m4a" or None if unknown
+    """
+    head = data[:12]
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"fLaC":
+        return "flac"
+    if head[:4] == b"OggS":
+        return "ogg"
+    if head[4:8] == b"ftyp":
+        return "m4a"
+    if head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and (head[1] & 0xE0) == 0xE0):
+        return "mp3"
+    return None
+
+
+def _parse_wav_header(data: bytes) -> Optional[Tuple[int, int, int, int, int, int]]:
+    """
+    Walk the RIFF chunks of a WAV file
+    Returns (format_tag, channels, sample_rate, bits_per_sample, data_offset, data_size) or None
+    """
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        (chunk_size,) = struct.unpack_from("<I", data, offset + 4)
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            if chunk_size < 16:
+                return None
+            format_tag, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                # The real format tag is the first two bytes of the SubFormat GUID
+                (format_tag,) = struct.unpack_from("<H", data, body + 24)
+            fmt = (format_tag, channels, sample_rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            # Streaming writers leave the size as 0 or 0xFFFFFFFF; clamp to what we have
+            data_size = min(chunk_size, len(data) - body) if chunk_size else len(data) - body
+            return fmt + (body, data_size)
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def decode_pcm_wav(data: bytes) -> Optional[Tuple[torch.Tensor, int]]:
+    """
+    Zero-copy fast path for 16-bit PCM and 32-bit float WAV
+    The sample data is mapped straight from the request buffer into a tensor and copied out
+    exactly once: by the int16 -> float32 conversion, or by a clone for float32 input, so the
+    result never aliases the read-only bytes. Returns None for layouts it does not handle.
+    """
+    header = _parse_wav_header(data)
+    if header is None:
+        return None
+    format_tag, channels, sample_rate, bits, data_offset, data_size = header
+
+    if format_tag == WAVE_FORMAT_PCM and bits == 16:
+        dtype, scale = torch.int16, 1.0 / 32768.0
+    elif format_tag == WAVE_FORMAT_IEEE_FLOAT and bits == 32:
+        dtype, scale = torch.float32, None
+    else:
+        return None
+
+    frame_bytes = channels * bits // 8
+    if channels == 0 or frame_bytes == 0:
+        return None
+    frames = data_size // frame_bytes
+    if frames == 0:
+        return None
+
+    with warnings.catch_warnings():
+        # bytes are read-only; this view is only read, by the conversion or clone below
+        warnings.simplefilter("ignore", UserWarning)
+        samples = torch.frombuffer(data, dtype=dtype, count=frames * channels, offset=data_offset)
+
+    # Interleaved frames -> (channels, frames)
+    wav = samples.view(frames, channels).t()
+    if scale is not None:
+        wav = wav.to(torch.float32) * scale
+    else:
+        wav = wav.clone()
+    return wav, sample_rate
+
+
+def decode_audio(data: bytes) -> Tuple[torch.Tensor, int]:
+    """
+    Decode an uploaded audio file from memory
+    Returns (waveform [channels, frames] float32, sample_rate); no temporary files are written.
+    """
+    fmt = sniff_format(data)
+    if fmt == "wav":
+        decoded = decode_pcm_wav(data)
+        if decoded is not None:
+            return decoded
+    return torchaudio.load(BytesIO(data), format=fmt)
+
+
+def encode_wav(wav: torch.Tensor, sample_rate: int) -> bytes:
+    """Encode a float waveform [channels, frames] as 16-bit PCM WAV bytes"""
+    pcm = (wav.clamp(-1.0, 1.0) * 32767).to(torch.int16).t().contiguous()
+    buffer = BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(wav.shape[0])
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes(pcm.numpy().tobytes())
+    return buffer.getvalue()
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import torch
+import torchaudio
+
+from services.audio_io import decode_audio
+
+
+class AudioPreprocessor:
+    """
+    Audio preparation stage for IndicConformer: decode -> downmix -> resample -> (normalize)
+    Resampler kernels are cached per source sample rate, so the sinc kernel for
+    8 / 44.1 / 48 kHz phone recordings is computed once instead of on every request.
+    """
+
+    def __init__(
+        self,
+        target_sample_rate: int = 16000,
+        normalize_loudness: bool = None,
+        target_dbfs: float = None,
+        torch_threads: int = None
+    ):
+        self.target_sample_rate = target_sample_rate
+        self.normalize_loudness = normalize_loudness if normalize_loudness is not None else (
+            os.getenv("STT_NORMALIZE_LOUDNESS", "false").lower() == "true"
+        )
+        self.target_dbfs = target_dbfs if target_dbfs is not None else float(os.getenv("STT_TARGET_DBFS", "-20"))
+
+        # Intra-op threads used by torch for preprocessing and inference (0 = torch default)
+        torch_threads = torch_threads if torch_threads is not None else int(os.getenv("STT_TORCH_THREADS", "0"))
+        if torch_threads > 0:
+            torch.set_num_threads(torch_threads)
+
+        self._resamplers: Dict[int, torchaudio.transforms.Resample] = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, float] = {
+            "requests": 0, "decode_ms": 0.0, "downmix_ms": 0.0, "resample_ms": 0.0, "normalize_ms": 0.0
+        }
+
+    def _get_resampler(self, orig_sample_rate: int) -> torchaudio.transforms.Resample:
+        """Return the cached resampler for this source rate, building its kernel on first use"""
+        resampler = self._resamplers.get(orig_sample_rate)
+        if resampler is None:
+            with self._lock:
+                resampler = self._resamplers.get(orig_sample_rate)
+                if resampler is None:
+                    resampler = torchaudio.transforms.Resample(
+                        orig_freq=orig_sample_rate,
+                        new_freq=self.target_sample_rate
+                    )
+                    self._resamplers[orig_sample_rate] = resampler
+        return resampler
+
+    def prepare(self, audio_data: bytes) -> Tuple[torch.Tensor, Dict[str, float]]:
+        """
+        Decode an uploaded file and prepare it for the model
+        Returns (mono 16 kHz waveform [1, frames], per-stage timings in ms)
+        """
+        start = time.perf_counter()
+        wav, sample_rate = decode_audio(audio_data)
+        decode_ms = (time.perf_counter() - start) * 1000
+        return self.process(wav, sample_rate, {"decode_ms": decode_ms})
+
+    def process(
+        self,
+        wav: torch.Tensor,
+        sample_rate: int,
+        timings: Optional[Dict[str, float]] = None
+    ) -> Tuple[torch.Tensor, Dict[str, float]]:
+        """
+        Prepare a decoded waveform [channels, frames] for the model
+        Returns (mono 16 kHz waveform [1, frames], per-stage timings in ms)
+        """
+        timings = dict(timings or {})
+
+        # Downmix first so the resampler only convolves a single channel
+        start = time.perf_counter()
+        if wav.shape[0] > 1:
+            wav = wav.mean(dim=0, keepdim=True)
+        timings["downmix_ms"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        if sample_rate != self.target_sample_rate:
+            wav = self._get_resampler(sample_rate)(wav)
+        timings["resample_ms"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        if self.normalize_loudness:
+            wav = self._normalize(wav)
+        timings["normalize_ms"] = (time.perf_counter() - start) * 1000
+
+        self._record(timings)
+        return wav, timings
+
+    def _normalize(self, wav: torch.Tensor) -> torch.Tensor:
+        """RMS loudness normalization to target_dbfs, limited so peaks do not clip"""
+        rms = wav.pow(2).mean().sqrt()
+        if rms <= 1e-6:
+            return wav
+        gain = (10 ** (self.target_dbfs / 20)) / rms
+        peak = wav.abs().max()
+        if peak * gain > 1.0:
+            gain = 1.0 / peak
+        return wav * gain
+
+    def _record(self, timings: Dict[str, float]):
+        with self._stats_lock:
+            self._stats["requests"] += 1
+            for stage, value in timings.items():
+                self._stats[stage] += value
+
+    def get_stats(self) -> Dict[str, Optional[float]]:
+        """Average per-stage preprocessing cost and the source rates with cached kernels"""
+        with self._stats_lock:
+            requests = self._stats["requests"]
+            stats = {"requests": requests, "cached_sample_rates": sorted(self._resamplers)}
+            for stage in ("decode_ms", "downmix_ms", "resample_ms", "normalize_ms"):
+                stats[f"avg_{stage}"] = self._stats[stage] / requests if requests else None
+            stats["torch_threads"] = torch.get_num_threads()
+            return stats
@@ -0,0 +1,120 @@
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Speech-tuned, low-bitrate encodings for slow mobile links
+CODECS = {
+    "opus": {
+        "media_type": "audio/ogg",
+        "accept": ("audio/ogg", "audio/opus", "audio/webm"),
+        "args": ["-c:a", "libopus", "-b:a", "16k", "-application", "voip", "-ac", "1"],
+        "format": "ogg",
+    },
+    "mp3": {
+        "media_type": "audio/mpeg",
+        "accept": ("audio/mpeg", "audio/mp3"),
+        "args": ["-c:a", "libmp3lame", "-b:a", "24k", "-ac", "1", "-ar", "22050"],
+        "format": "mp3",
+    },
+}
+
+
+class AudioTranscoder:
+    """
+    Background ffmpeg transcoding of generated WAV files into compact variants
+    Variants live next to the original as <key>.<codec> (and are evicted with it by size/age).
+    Requests never wait for a transcode: until the variant exists the original is served.
+    """
+
+    def __init__(self, directory: str, codecs: str = None):
+        self.directory = directory
+        requested = [c.strip() for c in (codecs if codecs is not None else os.getenv("AUDIO_TRANSCODE", "")).split(",") if c.strip()]
+        self.ffmpeg = shutil.which("ffmpeg") if requested else None
+        if requested and not self.ffmpeg:
+            logger.warning("AUDIO_TRANSCODE is set but ffmpeg was not found; serving original audio only")
+        self.codecs = [c for c in requested if c in CODECS] if self.ffmpeg else []
+
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {"transcoded": 0, "failed": 0, "variants_served": 0, "bytes_served": 0, "bytes_saved": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.codecs)
+
+    def variant_path(self, key: str, codec: str) -> str:
+        return os.path.join(self.directory, f"{key}.{codec}")
+
+    def accepted_codecs(self, accept: str) -> List[str]:
+        """Configured codecs the client's Accept header allows, in preference order"""
+        accept = (accept or "").lower()
+        return [c for c in self.codecs if any(media_type in accept for media_type in CODECS[c]["accept"])]
+
+    def schedule(self, source_path: str):
+        """Queue missing variants of a WAV file"""
+        if not self.enabled or not source_path.endswith(".wav"):
+            return
+        with self._lock:
+            if source_path in self._queued:
+                return
+            self._queued.add(source_path)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="audio-transcode", daemon=True)
+                self._worker.start()
+        self._queue.put(source_path)
+
+    def _run(self):
+        while True:
+            source_path = self._queue.get()
+            try:
+                self.transcode(source_path)
+            finally:
+                with self._lock:
+                    self._queued.discard(source_path)
+
+    def transcode(self, source_path: str):
+        """Create every configured variant of source_path that does not exist yet"""
+        key = os.path.splitext(os.path.basename(source_path))[0]
+        for codec in self.codecs:
+            target = self.variant_path(key, codec)
+            if os.path.exists(target):
+                continue
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            command = [self.ffmpeg, "-nostdin", "-loglevel", "error", "-y", "-i", source_path]
+            command += CODECS[codec]["args"] + ["-f", CODECS[codec]["format"], tmp_path]
+            try:
+                subprocess.run(command, check=True, capture_output=True, timeout=120)
+                os.replace(tmp_path, target)
+                self._count("transcoded")
+            except (subprocess.SubprocessError, OSError) as e:
+                logger.error("Error transcoding %s to %s: %s", os.path.basename(source_path), codec, e)
+                self._count("failed")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def record_served(self, original_size: int, served_size: int):
+        with self._lock:
+            self._stats["variants_served"] += 1
+            self._stats["bytes_served"] += served_size
+            self._stats["bytes_saved"] += max(0, original_size - served_size)
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def get_stats(self) -> Dict:
+        """Transcodes, compressed variants served and the bytes they saved"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["codecs"] = self.codecs
+        served = stats["variants_served"]
+        stats["avg_bytes_saved_per_variant"] = stats["bytes_saved"] / served if served else None
+        return stats
@@ -1,53 +1,87 @@
+import logging
 import requests
 from typing import List, Dict
 import os
+from services.deadline import DeadlineExceeded, upstream_timeout
+from services.metrics import count_fallback, span, upstream
+
+logger = logging.getLogger(__name__)
 
 
 class BGEService:
     def __init__(self, ollama_base_url: str = None):
         self.ollama_base_url = ollama_base_url or os.getenv("OLLAMA_BASE_URL", "http://10.11.7.65:11434")
         self.model_name = os.getenv("BGE_MODEL", "bge-m3:latest")
+        # How long Ollama keeps the model resident after a request ("-1m" pins it)
+        self.keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
 
-    def get_embedding(self, text: str) -> List[float]:
-        """Get embedding for text using Ollama BGE model"""
+    def warm_up(self) -> bool:
+        """Load the embedding model into Ollama ahead of the first request"""
         try:
             response = requests.post(
                 f"{self.ollama_base_url}/api/embeddings",
                 json={
                     "model": self.model_name,
-                    "prompt": text
+                    "prompt": "medication drug",
+                    "keep_alive": self.keep_alive
                 },
-                timeout=30
+                timeout=300
             )
             response.raise_for_status()
-            data = response.json()
+            logger.info("Warmed up %s (keep_alive=%s)", self.model_name, self.keep_alive)
+            return True
+        except Exception as e:
+            logger.warning("Could not warm up %s: %s", self.model_name, e)
+            return False
+
+    def get_embedding(self, text: str) -> List[float]:
+        """Get embedding for text using Ollama BGE model"""
+        try:
+            with upstream("ollama_embeddings"):
+                response = requests.post(
+                    f"{self.ollama_base_url}/api/embeddings",
+                    json={
+                        "model": self.model_name,
+                        "prompt": text,
+                        "keep_alive": self.keep_alive
+                    },
+                    timeout=upstream_timeout(30, "ollama_embeddings")
+                )
+                response.raise_for_status()
+                data = response.json()
             return data.get("embedding", [])
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"Error getting embedding: {e}")
+            logger.error("Error getting embedding: %s", e)
+            count_fallback("embeddings", "zero_vector")
             # Return zero vector as fallback
             return [0.0] * 1024
 
     def find_similar_drugs(self, drug_name: str, drug_list: List[Dict], top_k: int = 3) -> List[str]:
         """Find similar drugs using BGE embeddings"""
         try:
-            # Get embedding for the query drug
-            query_embedding = self.get_embedding(f"medication drug {drug_name}")
+            with span("similar_drugs"):
+                # Get embedding for the query drug
+                query_embedding = self.get_embedding(f"medication drug {drug_name}")
             
-            # Get embeddings for all drugs and compute similarity
-            similarities = []
-            for drug in drug_list:
-                drug_text = f"medication drug {drug.get('name', '')} {drug.get('category', '')}"
-                drug_embedding = self.get_embedding(drug_text)
+                # Get embeddings for all drugs and compute similarity
+                similarities = []
+                for drug in drug_list:
+                    drug_text = f"medication drug {drug.get('name', '')} {drug.get('category', '')}"
+                    drug_embedding = self.get_embedding(drug_text)
                 
-                # Cosine similarity
-                similarity = self._cosine_similarity(query_embedding, drug_embedding)
-                similarities.append((drug.get('name'), similarity))
+                    # Cosine similarity
+                    similarity = self._cosine_similarity(query_embedding, drug_embedding)
+                    similarities.append((drug.get('name'), similarity))
             
-            # Sort by similarity and return top k
-            similarities.sort(key=lambda x: x[1], reverse=True)
-            return [name for name, _ in similarities[:top_k] if name != drug_name]
+                # Sort by similarity and return top k
+                similarities.sort(key=lambda x: x[1], reverse=True)
+                return [name for name, _ in similarities[:top_k] if name != drug_name]
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"Error finding similar drugs: {e}")
+            logger.error("Error finding similar drugs: %s", e)
             return []
 
     def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
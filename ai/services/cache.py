@@ -0,0 +1,316 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(data: bytes, *parts: str) -> str:
+    """Fast 128-bit hash of a payload plus the parameters that change its result"""
+    digest = hashlib.blake2b(data, digest_size=16)
+    for part in parts:
+        digest.update(b"\0" + part.encode())
+    return digest.hexdigest()
+
+
+def _remove_file(path: str) -> int:
+    """1 if the file was removed, 0 if it was already gone"""
+    try:
+        os.remove(path)
+        return 1
+    except FileNotFoundError:
+        return 0
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU with an entry cap and an optional JSON disk tier
+    Disk entries survive restarts and are promoted back into memory on a hit. The disk tier
+    is bounded like AudioFileCache: entries unused for disk_max_age_seconds are removed, then
+    the least recently used ones (by mtime, refreshed on every hit) above disk_max_bytes.
+    Values must be JSON-serializable when a disk tier is configured.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 256 * 1024 * 1024,
+        disk_max_age_seconds: float = 30 * 86400
+    ):
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_max_age_seconds = disk_max_age_seconds
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+        self._disk_bytes = 0
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self.evict_disk()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._entries[key]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+        self._put_memory(key, value)
+        return value
+
+    def put(self, key: str, value: Any):
+        self._put_memory(key, value)
+        if self.disk_dir:
+            self._write_disk(key, value)
+
+    def _put_memory(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _read_disk(self, key: str) -> Optional[Any]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+            # Refresh mtime: it is the recency eviction goes by
+            os.utime(path)
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, value: Any):
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            # Write-then-rename so readers never see a partial file
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write cache entry %s: %s", key, e)
+            return
+        with self._lock:
+            self._disk_bytes += size
+            over_budget = self._disk_bytes > self.disk_max_bytes
+        if over_budget:
+            self.evict_disk()
+
+    def evict_disk(self):
+        """Drop expired disk entries, then the least recently used ones until under disk_max_bytes"""
+        now = time.time()
+        files = []
+        removed = 0
+        for path in self.disk_dir.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            age = now - stat.st_mtime
+            if path.suffix == ".tmp":
+                if age > AudioFileCache.STALE_TMP_SECONDS:
+                    _remove_file(str(path))
+                continue
+            if age > self.disk_max_age_seconds:
+                removed += _remove_file(str(path))
+                continue
+            files.append((stat.st_mtime, stat.st_size, str(path)))
+
+        total = sum(size for _, size, _ in files)
+        # Evict down to 90% of the cap so the next few writes do not rescan immediately
+        target = self.disk_max_bytes * 0.9
+        files.sort()
+        for _, size, path in files:
+            if total <= target:
+                break
+            if _remove_file(path):
+                total -= size
+                removed += 1
+
+        with self._lock:
+            self._disk_bytes = total
+            self._stats["disk_evictions"] += removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and the share of lookups answered from memory or disk"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["disk_bytes"] = self._disk_bytes
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["max_entries"] = self.max_entries
+        stats["disk"] = str(self.disk_dir) if self.disk_dir else None
+        stats["disk_max_bytes"] = self.disk_max_bytes if self.disk_dir else None
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else None
+        return stats
+
+
+class AudioFileCache:
+    """
+    Content-addressed audio files in one directory, bounded by total size and age
+    A file is named after the hash of everything that determines its audio, so identical
+    requests map to the same file. Files are written under a temporary name and renamed into
+    place; concurrent requests for the same key wait for one synthesis instead of repeating it.
+    Eviction removes files past max_age_seconds, then the least recently used ones (by mtime,
+    refreshed on every hit) until the directory is back under max_bytes.
+    """
+
+    LOCK_STRIPES = 64
+    # Unfinished temporary files older than this are leftovers of a crashed write
+    STALE_TMP_SECONDS = 3600
+
+    def __init__(self, directory: str, max_bytes: int, max_age_seconds: float):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._key_locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "deduplicated": 0, "writes": 0, "evicted_files": 0}
+        self._bytes = 0
+        self._files = 0
+        self.evict()
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:32]
+
+    def path(self, key: str, ext: str) -> Path:
+        return self.directory / f"{key}.{ext}"
+
+    def _lookup(self, key: str, ext: str) -> Optional[str]:
+        path = self.path(key, ext)
+        try:
+            # Refresh mtime: it is the recency eviction goes by
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return str(path)
+
+    def get_or_create(self, key: str, ext: str, create: Callable[[str], bool]) -> Optional[str]:
+        """
+        Path of the cached file, or create(tmp_path) it first
+        create writes the audio to tmp_path and returns False if it could not; None is returned then.
+        """
+        path = self._lookup(key, ext)
+        if path is not None:
+            self._count("hits")
+            return path
+
+        with self._key_locks[int(key[:8], 16) % self.LOCK_STRIPES]:
+            path = self._lookup(key, ext)
+            if path is not None:
+                # Produced by a concurrent request for the same audio while we waited
+                self._count("deduplicated")
+                return path
+            self._count("misses")
+
+            final_path = self.path(key, ext)
+            tmp_path = f"{final_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            created = False
+            try:
+                created = create(tmp_path)
+                if created:
+                    size = os.path.getsize(tmp_path)
+                    os.replace(tmp_path, final_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            if not created:
+                return None
+
+        with self._lock:
+            self._stats["writes"] += 1
+            self._bytes += size
+            self._files += 1
+            over_budget = self._bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+        return str(final_path)
+
+    def evict(self):
+        """Drop expired files, then the least recently used ones until under max_bytes"""
+        now = time.time()
+        files = []
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            age = now - stat.st_mtime
+            if entry.name.endswith(".tmp"):
+                if age > self.STALE_TMP_SECONDS:
+                    self._remove(entry.path)
+                continue
+            if age > self.max_age_seconds:
+                removed += self._remove(entry.path)
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        # Evict down to 90% of the cap so the next few writes do not rescan immediately
+        target = self.max_bytes * 0.9
+        files.sort()
+        kept = len(files)
+        for _, size, path in files:
+            if total <= target:
+                break
+            if self._remove(path):
+                total -= size
+                kept -= 1
+                removed += 1
+
+        with self._lock:
+            self._bytes = total
+            self._files = kept
+            self._stats["evicted_files"] += removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        return _remove_file(path)
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit ratio, writes, evictions and disk usage"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["files"] = self._files
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["deduplicated"] + stats["misses"]
+        stats["max_bytes"] = self.max_bytes
+        stats["hit_ratio"] = (stats["hits"] + stats["deduplicated"]) / lookups if lookups else None
+        return stats
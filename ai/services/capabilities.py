@@ -0,0 +1,132 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Capability states reported by /health/ready
+DISABLED = "disabled"
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class CapabilityUnavailable(Exception):
+    """Raised when a request needs a subsystem that is disabled, still loading or failed to load"""
+
+    def __init__(self, name: str, state: str, error: Optional[str] = None):
+        super().__init__(f"{name} is {state}" + (f": {error}" if error else ""))
+        self.name = name
+        self.state = state
+        self.error = error
+
+
+class Capability:
+    """One switchable subsystem (stt, tts, llm, embeddings) and its loading state"""
+
+    def __init__(self, name: str, factory: Callable[[], Any], enabled: bool):
+        self.name = name
+        self.factory = factory
+        self.enabled = enabled
+        self.state = PENDING if enabled else DISABLED
+        self.instance: Any = None
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+
+class CapabilityRegistry:
+    """
+    Builds heavy services off the request path
+    Each enabled capability is constructed on its own background thread, so the app serves
+    lightweight endpoints immediately and a slow model load never delays the others.
+    ENABLE_<NAME>=false turns a capability off entirely; its imports never happen.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._capabilities: Dict[str, Capability] = {}
+
+    def register(self, name: str, factory: Callable[[], Any], default_enabled: bool = True):
+        """Register a capability; the factory should do its own (heavy) imports"""
+        default = "true" if default_enabled else "false"
+        enabled = os.getenv(f"ENABLE_{name.upper()}", default).lower() == "true"
+        self._capabilities[name] = Capability(name, factory, enabled)
+
+    def load_in_background(self):
+        """Start loading every enabled capability that has not been started yet"""
+        for capability in self._capabilities.values():
+            with self._lock:
+                if capability.state != PENDING:
+                    continue
+                capability.state = LOADING
+            threading.Thread(
+                target=self._load, args=(capability,), name=f"load-{capability.name}", daemon=True
+            ).start()
+
+    def load(self, name: str) -> Any:
+        """Load a capability on the calling thread (scripts and benchmarks)"""
+        capability = self._capabilities[name]
+        with self._lock:
+            if capability.state == PENDING:
+                capability.state = LOADING
+            else:
+                return self.get(name)
+        self._load(capability)
+        return self.get(name)
+
+    def load_all(self):
+        """Load every enabled capability on the calling thread (preforking parent)"""
+        for name in self._capabilities:
+            if self._capabilities[name].enabled:
+                try:
+                    self.load(name)
+                except CapabilityUnavailable:
+                    # Load failure is reported by /health/ready
+                    pass
+
+    def _load(self, capability: Capability):
+        start = time.perf_counter()
+        try:
+            instance = capability.factory()
+        except Exception as e:
+            logger.error("Error loading %s: %s", capability.name, e)
+            with self._lock:
+                capability.state = FAILED
+                capability.error = str(e)
+            return
+        with self._lock:
+            capability.instance = instance
+            capability.load_seconds = round(time.perf_counter() - start, 3)
+            capability.state = READY
+        logger.info("%s ready in %ss", capability.name, capability.load_seconds)
+
+    def get(self, name: str) -> Any:
+        """The service instance, or CapabilityUnavailable if it cannot serve yet"""
+        capability = self._capabilities[name]
+        if capability.state != READY:
+            raise CapabilityUnavailable(name, capability.state, capability.error)
+        return capability.instance
+
+    def get_if_ready(self, name: str) -> Any:
+        """The service instance, or None if it is not ready"""
+        capability = self._capabilities[name]
+        return capability.instance if capability.state == READY else None
+
+    def is_enabled(self, name: str) -> bool:
+        return self._capabilities[name].enabled
+
+    def is_ready(self) -> bool:
+        """True when every enabled capability has loaded"""
+        return all(c.state == READY for c in self._capabilities.values() if c.enabled)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-capability state, load time and load error"""
+        with self._lock:
+            return {
+                name: {"state": c.state, "load_seconds": c.load_seconds, "error": c.error}
+                for name, c in self._capabilities.items()
+            }
@@ -0,0 +1,143 @@
+import gzip
+import os
+from typing import Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # in requirements; without it only gzip is offered
+    brotli = None
+
+# Text-like payloads; audio (already compressed, and served with Range) never matches
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/xml", "application/javascript")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Preferred encoding we can produce from an Accept-Encoding header: br, then gzip"""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        token, _, params = item.partition(";")
+        name, _, value = params.partition("=")
+        try:
+            weight = float(value) if name.strip() == "q" else 1.0
+        except ValueError:
+            weight = 0.0
+        if weight > 0:
+            accepted.add(token.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 5, brotli_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def _settings():
+    """(enabled, minimum size, gzip level, brotli quality) from the COMPRESSION_* variables"""
+    return (
+        os.getenv("COMPRESSION", "true").lower() == "true",
+        int(os.getenv("COMPRESSION_MIN_BYTES", "1024")),
+        int(os.getenv("COMPRESSION_GZIP_LEVEL", "5")),
+        int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    )
+
+
+class PrecompressedBody:
+    """
+    A body that is served unchanged many times, with each encoding compressed once
+    response() returns it already encoded for the request's Accept-Encoding, so the
+    middleware passes it through instead of compressing the same bytes on every request.
+    """
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        self.enabled, self.minimum_size, self.gzip_level, self.brotli_quality = _settings()
+        self._variants: Dict[str, Optional[bytes]] = {}  # encoding -> body, None when not smaller
+
+    def encoded(self, encoding: str) -> Optional[bytes]:
+        if encoding not in self._variants:
+            compressed = compress(self.body, encoding, self.gzip_level, self.brotli_quality)
+            self._variants[encoding] = compressed if len(compressed) < len(self.body) else None
+        return self._variants[encoding]
+
+    def response(self, accept_encoding: str) -> Response:
+        headers = {"Vary": "Accept-Encoding"}
+        encoding = negotiate(accept_encoding) if self.enabled and accept_encoding else None
+        if encoding is not None and len(self.body) >= self.minimum_size:
+            body = self.encoded(encoding)
+            if body is not None:
+                headers["Content-Encoding"] = encoding
+                return Response(body, media_type=self.media_type, headers=headers)
+        return Response(self.body, media_type=self.media_type, headers=headers)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete text/JSON responses with brotli (if installed) or gzip
+    Only single-body responses of at least COMPRESSION_MIN_BYTES are compressed: streamed bodies
+    (NDJSON events, chunked WAV) pass through untouched so each chunk is delivered as soon as it
+    is produced, and so do audio, partial (206) and already-encoded responses (PrecompressedBody).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled, self.minimum_size, self.gzip_level, self.brotli_quality = _settings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        accept = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+        encoding = negotiate(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held until the first body message shows whether the response is streamed
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            held, start = start, None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._compressible(held, body):
+                await send(held)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            held["headers"] = list(held.get("headers", []))
+            headers = MutableHeaders(raw=held["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if len(compressed) < len(body):
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(compressed))
+                body = compressed
+            await send(held)
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _compressible(self, start, body: bytes) -> bool:
+        if len(body) < self.minimum_size or start["status"] in (204, 206, 304):
+            return False
+        headers = {key.lower(): value for key, value in start.get("headers", [])}
+        if b"content-encoding" in headers:
+            return False
+        content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES) or content_type.split(";")[0].endswith("+json")
@@ -0,0 +1,202 @@
+import asyncio
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import HTTPConnection
+
+from services import profiling
+
+
+# Relative budget in milliseconds sent by callers (e.g. the NestJS AIService)
+DEADLINE_HEADER = "x-request-timeout-ms"
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request ran out of time or its client went away"""
+
+    def __init__(self, work: str, reason: str):
+        super().__init__(f"{work} abandoned: {reason}")
+        self.work = work
+        self.reason = reason
+
+
+class AbandonedWorkCounter:
+    """Thread-safe counters of requests whose work was cut short (each request counted once)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._abandoned: Dict[str, int] = {}
+        self._reasons: Dict[str, int] = {}
+
+    def record(self, work: str, reason: str):
+        with self._lock:
+            self._abandoned[work] = self._abandoned.get(work, 0) + 1
+            self._reasons[reason] = self._reasons.get(reason, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                "abandoned": dict(self._abandoned),
+                "reasons": dict(self._reasons)
+            }
+
+
+abandoned_work = AbandonedWorkCounter()
+
+
+class Deadline:
+    """
+    Time budget for a single request
+    Shared between the event loop and worker threads, so cancellation is a threading.Event
+    """
+
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+        self._cancelled = threading.Event()
+        self.reason: Optional[str] = None
+        self._recorded = False
+        self._record_lock = threading.Lock()
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self._cancelled.is_set() or time.monotonic() >= self.expires_at
+
+    def cancel(self, reason: str = "client_disconnected"):
+        """Mark the request as abandoned; in-flight work stops at its next checkpoint"""
+        if not self._cancelled.is_set():
+            self.reason = reason
+            self._cancelled.set()
+
+    def record_abandoned(self, work: str) -> str:
+        """Count this request as abandoned under `work`, unless it already was; returns the reason"""
+        reason = self.reason or "deadline_exceeded"
+        with self._record_lock:
+            if self._recorded:
+                return reason
+            self._recorded = True
+        abandoned_work.record(work, reason)
+        return reason
+
+    def check(self, work: str):
+        """Raise DeadlineExceeded (and count it) if this request should stop working"""
+        if self.expired():
+            raise DeadlineExceeded(work, self.record_abandoned(work))
+
+    def timeout(self, cap: float, work: str) -> float:
+        """Timeout for an upstream call: the remaining budget, capped at the call's own limit"""
+        self.check(work)
+        return min(cap, self.remaining())
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("current_deadline", default=None)
+
+
+def get_default_budget() -> float:
+    return float(os.getenv("REQUEST_DEADLINE_SECONDS", "60"))
+
+
+def get_max_budget() -> float:
+    return float(os.getenv("REQUEST_DEADLINE_MAX_SECONDS", "300"))
+
+
+def budget_from_headers(headers) -> float:
+    """
+    Read the request budget from the X-Request-Timeout-Ms header
+    Falls back to REQUEST_DEADLINE_SECONDS and is clamped to REQUEST_DEADLINE_MAX_SECONDS
+    """
+    raw = headers.get(DEADLINE_HEADER)
+    budget = get_default_budget()
+    if raw:
+        try:
+            budget = float(raw) / 1000.0
+        except ValueError:
+            pass
+    if budget <= 0:
+        budget = get_default_budget()
+    return min(budget, get_max_budget())
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def upstream_timeout(cap: float, work: str) -> float:
+    """Timeout for an upstream call made on behalf of the current request (cap if there is none)"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return cap
+    return deadline.timeout(cap, work)
+
+
+def check_deadline(work: str):
+    """Checkpoint for long-running work: stop if the current request was abandoned"""
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check(work)
+
+
+def call_with_deadline(deadline: Optional[Deadline], func: Callable, *args, **kwargs) -> Any:
+    """Call func with `deadline` as the current deadline (for work that is not an HTTP request)"""
+    token = _current_deadline.set(deadline)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _current_deadline.reset(token)
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware that attaches a Deadline to every HTTP request
+    WebSocket streams are long-lived, so they budget each unit of work themselves.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline(budget_from_headers(HTTPConnection(scope).headers))
+        token = _current_deadline.set(deadline)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_deadline.reset(token)
+
+
+async def run_cancellable(request, func: Callable, *args, work: str = "request", **kwargs) -> Any:
+    """
+    Run a blocking service call in the threadpool while watching the client and the deadline
+    On disconnect or timeout the deadline is cancelled so the worker abandons its upstream
+    calls at the next checkpoint, and DeadlineExceeded is raised here immediately.
+    """
+    deadline = _current_deadline.get()
+    task = asyncio.ensure_future(run_in_threadpool(profiling.bind(func), *args, **kwargs))
+    if deadline is None:
+        return await task
+
+    poll_interval = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.25"))
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=min(poll_interval, max(deadline.remaining(), 0.01)))
+        if task in done:
+            return task.result()
+
+        if await request.is_disconnected():
+            deadline.cancel("client_disconnected")
+        elif deadline.expired():
+            deadline.cancel("deadline_exceeded")
+
+        if deadline.expired():
+            # Swallow the eventual DeadlineExceeded from the worker thread
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            raise DeadlineExceeded(work, deadline.record_abandoned(work))
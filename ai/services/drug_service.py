@@ -1,8 +1,13 @@
+import difflib
 import json
+import logging
 import os
-from typing import List, Dict, Optional
+import re
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 
 class DrugService:
     def __init__(self, data_path: str = None):
@@ -15,10 +20,13 @@ class DrugService:
         self.data_path = data_path
         self.drugs: List[Dict] = []
         self.raw_drugs: List[Dict] = []  # Store original format for reference
+        self._name_index: Optional[Dict[str, Dict]] = None  # Spoken-name lookup, built on first use
+        self.fuzzy_cutoff = float(os.getenv("DRUG_MATCH_CUTOFF", "0.8"))
         self.load_drugs()
 
     def load_drugs(self):
         """Load drug dataset from JSON file, convert to standard format, fallback to sample drugs if not found"""
+        self._name_index = None
         try:
             if os.path.exists(self.data_path):
                 with open(self.data_path, 'r', encoding='utf-8') as f:
@@ -34,23 +42,20 @@ class DrugService:
                 if len(self.raw_drugs) > 0:
                     # Convert to standard format
                     self.drugs = [self._convert_to_standard_format(drug) for drug in self.raw_drugs]
-                    print(f"✅ Loaded {len(self.drugs)} drugs from {self.data_path}")
+                    logger.info("Loaded %d drugs from %s", len(self.drugs), self.data_path)
                     return
             else:
-                print(f"Warning: Drug dataset not found at {self.data_path}")
+                logger.warning("Drug dataset not found at %s", self.data_path)
             
             # Fallback to sample drugs if dataset not found or empty
-            print("📋 Using sample drug data as fallback")
             self.drugs = self._get_sample_drugs()
             self.raw_drugs = self.drugs
-            print(f"✅ Loaded {len(self.drugs)} sample drugs")
+            logger.warning("Using %d sample drugs as fallback", len(self.drugs))
         except Exception as e:
-            print(f"Error loading drugs: {e}")
             # Fallback to sample drugs on error
-            print("📋 Using sample drug data as fallback due to error")
             self.drugs = self._get_sample_drugs()
             self.raw_drugs = self.drugs
-            print(f"✅ Loaded {len(self.drugs)} sample drugs")
+            logger.error("Error loading drugs, using %d sample drugs as fallback: %s", len(self.drugs), e)
 
     def _convert_to_standard_format(self, raw_drug: Dict) -> Dict:
         """
@@ -253,6 +258,42 @@ class DrugService:
         
         return None
 
+    def _names(self) -> Dict[str, Dict]:
+        """Lowercase full names, brand names and first salts -> drug (first drug wins)"""
+        if self._name_index is None:
+            index: Dict[str, Dict] = {}
+            for drug in self.drugs:
+                salt = drug.get("original_data", {}).get("salt_composition") or ""
+                keys = [drug["name"], drug["name"].split()[0] if drug["name"].split() else "", salt.split("(")[0]]
+                for key in keys:
+                    key = key.strip().lower()
+                    if len(key) >= 4:
+                        index.setdefault(key, drug)
+            self._name_index = index
+        return self._name_index
+
+    def resolve_drug(self, text: str) -> Optional[Tuple[Dict, str, float]]:
+        """
+        Find the drug mentioned in free text (e.g. a transcribed question)
+        Every 1-3 word phrase is fuzzy-matched (difflib) against drug, brand and salt names,
+        so small transcription errors still resolve. Returns (drug, matched phrase, score).
+        """
+        words = re.findall(r"[a-z0-9][a-z0-9\-]*", text.lower())
+        names = self._names()
+        best: Optional[Tuple[Dict, str, float]] = None
+        for size in (3, 2, 1):
+            for start in range(len(words) - size + 1):
+                phrase = " ".join(words[start:start + size])
+                if len(phrase) < 4:
+                    continue
+                if phrase in names:
+                    return names[phrase], phrase, 1.0
+                for name in difflib.get_close_matches(phrase, names, n=1, cutoff=self.fuzzy_cutoff):
+                    score = difflib.SequenceMatcher(None, phrase, name).ratio()
+                    if best is None or score > best[2]:
+                        best = (names[name], phrase, score)
+        return best
+
     def get_critical_drugs(self) -> List[Dict]:
         """Get all critical drugs"""
         return [drug for drug in self.drugs if drug.get("critical", False)]
@@ -0,0 +1,191 @@
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from services.metrics import registry as metrics
+
+# Correlates every log line of one HTTP request (X-Request-Id header, or generated)
+REQUEST_ID_HEADER = "x-request-id"
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+LOG_RECORDS_DROPPED = metrics.counter(
+    "medmentor_log_records_dropped_total", "Log records dropped because the log queue was full"
+)
+
+# Attributes every LogRecord has; anything else was passed with extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_lock = threading.Lock()
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Runs in the calling thread, before the queue: stamps the request id and applies sampling
+    Records logged with extra={"sampled": True} pass once per LOG_SAMPLE_EVERY occurrences of
+    the same message template and carry the occurrence count.
+    """
+
+    def __init__(self, sample_every: int):
+        super().__init__()
+        self.sample_every = max(1, sample_every)
+        self._counters: Dict[tuple, "itertools.count"] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        if getattr(record, "sampled", False):
+            key = (record.name, record.msg)
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = self._counters.setdefault(key, itertools.count())
+            # next() on itertools.count is atomic under the GIL
+            occurrence = next(counter)
+            if occurrence % self.sample_every:
+                return False
+            record.occurrence = occurrence + 1
+            record.sample_every = self.sample_every
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread without formatting them or waiting for I/O
+    Beyond max_size queued records new ones are dropped (and counted) instead of blocking.
+    """
+
+    def __init__(self, log_queue: "queue.SimpleQueue", max_size: int):
+        super().__init__(log_queue)
+        self.max_size = max_size
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Message formatting happens on the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        # SimpleQueue has no lock/condition pair to contend on; the size check is approximate
+        if self.queue.qsize() >= self.max_size:
+            LOG_RECORDS_DROPPED.inc()
+            return
+        self.queue.put_nowait(record)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, message, request_id, extras, exception"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.request_id:
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key not in ("request_id", "sampled"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development (LOG_FORMAT=text)"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s%(request_suffix)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.request_suffix = f" [{record.request_id}]" if record.request_id else ""
+        return super().format(record)
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    """LOG_LEVELS="services.stt_service=WARNING,services.cache=DEBUG" -> {logger: level}"""
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _start_listener():
+    """Queue handler on the root logger, drained by one background thread writing to stdout"""
+    global _listener
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(TextFormatter() if os.getenv("LOG_FORMAT", "json").lower() == "text" else JSONFormatter())
+
+    handler = NonBlockingQueueHandler(log_queue, int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    handler.addFilter(RequestContextFilter(int(os.getenv("LOG_SAMPLE_EVERY", "100"))))
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, NonBlockingQueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+
+
+def flush_logging():
+    """Write out queued records and stop the writer thread (at exit, or before os._exit)"""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def configure_logging():
+    """
+    Route all logging through a bounded queue to a background writer (idempotent)
+    LOG_LEVEL sets the default level, LOG_LEVELS per-logger overrides, LOG_FORMAT json or text.
+    """
+    with _lock:
+        if _listener is not None:
+            return
+        # Skip per-record work nobody reads: caller stack walk, process/thread name lookups
+        logging._srcfile = None
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        logging.getLogger().setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        for name, level in _parse_levels(os.getenv("LOG_LEVELS", "")).items():
+            logging.getLogger(name).setLevel(level)
+        _start_listener()
+        atexit.register(flush_logging)
+        # A forked worker does not inherit the listener thread: give it its own queue and writer
+        os.register_at_fork(after_in_child=_start_listener)
+
+
+class RequestIdMiddleware:
+    """ASGI middleware that sets the request id for log correlation and echoes it as X-Request-Id"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(REQUEST_ID_HEADER.encode())
+        value = incoming.decode("latin-1")[:64] if incoming else uuid.uuid4().hex[:16]
+        token = request_id.set(value)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", value.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id.reset(token)
@@ -1,13 +1,117 @@
+import json
+import logging
+import threading
 import requests
 import os
-from typing import Dict
+from typing import Any, Dict, Optional, Tuple
+from pydantic import ValidationError
+from models.schemas import RiskAssessment
 from prompts.risk_analysis_prompt import RiskAnalysisPrompt
+from services.cache import LRUCache, content_key
+from services.deadline import DeadlineExceeded, check_deadline, upstream_timeout
+from services.metrics import count_fallback, span, upstream
+
+logger = logging.getLogger(__name__)
 
 
 class MedGemmaService:
     def __init__(self, ollama_base_url: str = None):
         self.ollama_base_url = ollama_base_url or os.getenv("OLLAMA_BASE_URL", "http://10.11.7.65:11434")
         self.model_name = os.getenv("GEMMA_MODEL", "gemma3:4b")
+        # How long Ollama keeps the model resident after a request ("-1m" pins it)
+        self.keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, int] = {"responses": 0, "malformed": 0, "truncated": 0, "upstream_errors": 0}
+        # Assessments for identical prompts (off by default); keys include model and template version
+        self.cache = LRUCache(int(os.getenv("LLM_CACHE_SIZE", "0")))
+        # Generation options and output schema of the risk prompt (identical for every request)
+        self._risk_prompt = RiskAnalysisPrompt.model_construct()
+
+    def warm_up(self) -> bool:
+        """
+        Load the model into Ollama and evaluate the static prompt prefix
+        so the first real request pays neither the model load nor the prefix evaluation
+        """
+        prefix = RiskAnalysisPrompt.model_construct().get_static_prefix()
+        try:
+            response = requests.post(
+                f"{self.ollama_base_url}/api/generate",
+                json={
+                    "model": self.model_name,
+                    "prompt": prefix,
+                    "stream": False,
+                    "keep_alive": self.keep_alive,
+                    "options": {**RiskAnalysisPrompt.model_construct().get_options(), "num_predict": 1}
+                },
+                timeout=300
+            )
+            response.raise_for_status()
+            logger.info("Warmed up %s (keep_alive=%s)", self.model_name, self.keep_alive)
+            return True
+        except Exception as e:
+            logger.warning("Could not warm up %s: %s", self.model_name, e)
+            return False
+
+    def _generate(self, prompt: str, options: Dict, response_format: Optional[Dict] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Stream a completion from Ollama, checking the request deadline between chunks
+        Closing the stream early makes Ollama stop generating for abandoned requests.
+        Returns the generated text and the final (done) chunk with Ollama's metadata.
+        """
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            "options": options
+        }
+        if response_format is not None:
+            payload["format"] = response_format
+
+        parts = []
+        final_chunk: Dict[str, Any] = {}
+        with upstream("ollama_generate"):
+            response = requests.post(
+                f"{self.ollama_base_url}/api/generate",
+                json=payload,
+                stream=True,
+                timeout=upstream_timeout(60, "ollama_generate")
+            )
+            with response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    check_deadline("ollama_generate")
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    parts.append(chunk.get("response", ""))
+                    if chunk.get("done"):
+                        final_chunk = chunk
+                        break
+        return "".join(parts), final_chunk
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """Counters for generated responses and how many could not be used"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _parse_response(self, ai_response: str, final_chunk: Dict[str, Any]) -> Optional[RiskAssessment]:
+        """
+        Strictly validate the model output against the RiskAssessment schema
+        Returns None (and counts it) for truncated or malformed output instead of guessing.
+        """
+        if final_chunk.get("done_reason") == "length":
+            self._count("truncated")
+        try:
+            return RiskAssessment.model_validate_json(ai_response)
+        except ValidationError as e:
+            self._count("malformed")
+            logger.warning("Malformed MedGemma response (%d errors): %r", e.error_count(), ai_response[:200])
+            return None
 
     def analyze_skip_risk(
         self,
@@ -21,74 +125,56 @@ class MedGemmaService:
         Analyze risk of skipping medication using Ollama Gemma model
         Returns: {risk_level, message, ai_explanation}
         """
-        # Create prompt using class-based approach with validation
-        prompt_obj = RiskAnalysisPrompt.from_drug_info(
+        # Compiled template with cheap field checks; no pydantic model per request
+        prompt, template_version = RiskAnalysisPrompt.render(
             patient_age=patient_age,
             drug_name=drug_name,
             skips=skips,
             conditions=conditions,
             drug_info=drug_info
         )
-        
-        # Format the prompt (validates and formats automatically)
-        prompt = prompt_obj.format()
 
-        try:
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
-                json={
-                    "model": self.model_name,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.1,
-                        "top_p": 0.9
-                    }
-                },
-                timeout=60
-            )
-            response.raise_for_status()
-            data = response.json()
-            ai_response = data.get("response", "")
-
-            # Parse the response
-            risk_level = "Medium"  # Default
-            message = "Please consult your doctor about missed doses."
-            explanation = ai_response
-
-            # Extract structured information from response
-            lines = ai_response.split("\n")
-            for line in lines:
-                if "RISK_LEVEL:" in line:
-                    risk_part = line.split("RISK_LEVEL:")[1].strip()
-                    if "High" in risk_part:
-                        risk_level = "High"
-                    elif "Low" in risk_part:
-                        risk_level = "Low"
-                    else:
-                        risk_level = "Medium"
-                elif "MESSAGE:" in line:
-                    message = line.split("MESSAGE:")[1].strip()
-                elif "EXPLANATION:" in line:
-                    explanation = line.split("EXPLANATION:")[1].strip()
-
-            # If drug is critical, boost risk level
-            if drug_info and drug_info.get("critical", False) and risk_level == "Low":
-                risk_level = "Medium"
-            if drug_info and drug_info.get("critical", False) and skips >= 2:
-                risk_level = "High"
-
-            return {
-                "risk_level": risk_level,
-                "message": message if message else "Please consult your doctor about missed doses.",
-                "ai_explanation": explanation if explanation else ai_response
-            }
-        except Exception as e:
-            print(f"Error in MedGemma analysis: {e}")
-            # Fallback response
-            return {
-                "risk_level": "Medium",
-                "message": "Unable to analyze risk. Please consult your doctor immediately.",
-                "ai_explanation": f"Skipping {drug_name} {skips} time(s) may have health implications. Please contact your healthcare provider."
-            }
+        # Fallback response when the model is unreachable or its output is unusable
+        fallback = {
+            "risk_level": "Medium",
+            "message": "Unable to analyze risk. Please consult your doctor immediately.",
+            "ai_explanation": f"Skipping {drug_name} {skips} time(s) may have health implications. Please contact your healthcare provider."
+        }
+
+        cache_key = content_key(prompt.encode("utf-8"), self.model_name, template_version) if self.cache.enabled else None
+        cached = self.cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            assessment = RiskAssessment.model_construct(**cached)
+        else:
+            try:
+                with span("llm_analyze"):
+                    ai_response, final_chunk = self._generate(prompt, self._risk_prompt.get_options(), self._risk_prompt.get_format())
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                self._count("upstream_errors")
+                count_fallback("medgemma", "upstream_error")
+                logger.error("Error in MedGemma analysis: %s", e)
+                return fallback
+
+            self._count("responses")
+            assessment = self._parse_response(ai_response, final_chunk)
+            if assessment is None:
+                count_fallback("medgemma", "unusable_output")
+                return fallback
+            if cache_key:
+                self.cache.put(cache_key, assessment.model_dump())
+
+        risk_level = assessment.risk_level
+
+        # If drug is critical, boost risk level
+        if drug_info and drug_info.get("critical", False) and risk_level == "Low":
+            risk_level = "Medium"
+        if drug_info and drug_info.get("critical", False) and skips >= 2:
+            risk_level = "High"
 
+        return {
+            "risk_level": risk_level,
+            "message": assessment.message,
+            "ai_explanation": assessment.ai_explanation
+        }
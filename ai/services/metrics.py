@@ -0,0 +1,299 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from services.deadline import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans cover sub-millisecond lookups up to minute-long LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (name, type, help, [(labels, value), ...]) produced at scrape time
+CollectedMetric = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Label values -> state, updated under one lock per metric (a few hundred ns per update)"""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        lines = self._header()
+        for labelvalues, value in values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues: str):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    render = Counter.render
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: str):
+        # Per-bucket (non-cumulative) counts; the last slot is +Inf, then sum
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = {labelvalues: list(state) for labelvalues, state in self._values.items()}
+        lines = self._header()
+        for labelvalues, state in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Metrics of this process in the Prometheus text exposition format
+    Hot-path metrics are updated in place; derived values (cache hit ratios, service counters)
+    come from collectors that run only when /metrics is scraped.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[CollectedMetric]]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        metric = Gauge(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[CollectedMetric]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                collected = list(collector())
+            except Exception as e:
+                logger.warning("Metrics collector failed: %s", e)
+                continue
+            for name, kind, help_text, samples in collected:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "medmentor_http_request_duration_seconds", "HTTP request latency, including streamed bodies",
+    ("endpoint", "method", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge("medmentor_http_requests_in_flight", "HTTP requests being handled")
+STAGE_SECONDS = registry.histogram(
+    "medmentor_stage_duration_seconds", "Latency of service methods", ("stage", "language")
+)
+STAGES_IN_FLIGHT = registry.gauge("medmentor_stages_in_flight", "Service method calls in progress", ("stage",))
+STAGE_ERRORS = registry.counter(
+    "medmentor_stage_errors_total", "Service method calls that raised", ("stage", "error")
+)
+UPSTREAM_SECONDS = registry.histogram(
+    "medmentor_upstream_request_duration_seconds", "Latency of calls to upstream services", ("upstream", "outcome")
+)
+UPSTREAM_IN_FLIGHT = registry.gauge("medmentor_upstream_requests_in_flight", "Upstream calls in progress", ("upstream",))
+FALLBACKS = registry.counter(
+    "medmentor_fallbacks_total", "Degraded answers (fallback responses, secondary providers)", ("component", "reason")
+)
+
+
+class Span:
+    """
+    Times a block into a histogram while counting it in an in-flight gauge
+    The outcome label is "ok", "abandoned" (DeadlineExceeded), "error", or what fail() set.
+    """
+
+    __slots__ = ("_histogram", "_gauge", "_key", "_labels", "_start", "outcome")
+
+    def __init__(self, histogram: Histogram, gauge: Gauge, key: str, labels: Tuple[str, ...]):
+        self._histogram = histogram
+        self._gauge = gauge
+        self._key = key
+        self._labels = labels
+        self.outcome: Optional[str] = None
+
+    def fail(self, reason: str):
+        """Mark a call that returned normally as failed (e.g. a non-200 status that is not raised)"""
+        self.outcome = reason
+
+    def __enter__(self) -> "Span":
+        self._gauge.inc(self._key)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        self._gauge.dec(self._key)
+        if exc_type is not None and self.outcome is None:
+            self.outcome = "abandoned" if issubclass(exc_type, DeadlineExceeded) else "error"
+        self._record(elapsed, exc_type)
+        return False
+
+    def _record(self, elapsed: float, exc_type):
+        self._histogram.observe(elapsed, *self._labels, self.outcome or "ok")
+
+
+class StageSpan(Span):
+    __slots__ = ()
+
+    def _record(self, elapsed: float, exc_type):
+        self._histogram.observe(elapsed, *self._labels)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(self._key, exc_type.__name__)
+
+
+def span(stage: str, language: str = "") -> Span:
+    """Time a service method (stage_duration_seconds, stages_in_flight, stage_errors_total)"""
+    return StageSpan(STAGE_SECONDS, STAGES_IN_FLIGHT, stage, (stage, language or ""))
+
+
+def upstream(name: str) -> Span:
+    """Time a call to an upstream service (upstream_request_duration_seconds by outcome)"""
+    return Span(UPSTREAM_SECONDS, UPSTREAM_IN_FLIGHT, name, (name,))
+
+
+def count_fallback(component: str, reason: str):
+    FALLBACKS.inc(component, reason)
+
+
+def cache_metrics(caches: List[Tuple[Dict[str, str], Dict]]) -> List[CollectedMetric]:
+    """
+    Collector output for caches that report hits/misses (LRUCache, AudioFileCache and
+    TranslationMemory stats), as (labels, stats) pairs; labels include at least "cache"
+    """
+    hits, misses, ratios = [], [], []
+    for labels, stats in caches:
+        cache_hits = stats.get("hits", 0) + stats.get("disk_hits", 0) + stats.get("persistent_hits", 0)
+        hits.append((labels, cache_hits))
+        misses.append((labels, stats.get("misses", 0)))
+        lookups = cache_hits + stats.get("misses", 0)
+        ratios.append((labels, cache_hits / lookups if lookups else None))
+    return [
+        ("medmentor_cache_hits_total", "counter", "Cache hits (any tier)", hits),
+        ("medmentor_cache_misses_total", "counter", "Cache misses", misses),
+        ("medmentor_cache_hit_ratio", "gauge", "Cache hits / lookups since start", ratios),
+    ]
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency per route template (not raw path) and status
+    The route is only known after routing, so requests that match no route are "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint, scope["method"], status)
@@ -0,0 +1,130 @@
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.cache import AudioFileCache
+from services.wav_utils import concat_wav, read_wav
+
+logger = logging.getLogger(__name__)
+
+# Medication reminder templates; keep in sync with generateReminderText in
+# backend/src/services/patient-notifications.service.ts
+REMINDER_TEMPLATES = {
+    "en": "Please take your {drug_name} medication now. It's time for your scheduled dose.",
+    "hi": "कृपया अभी अपनी {drug_name} दवा लें। यह आपकी निर्धारित खुराक का समय है।",
+    "ta": "தயவுசெய்து இப்போது உங்கள் {drug_name} மருந்தை எடுத்துக் கொள்ளுங்கள். இது உங்கள் திட்டமிடப்பட்ட மருந்தின் நேரம்.",
+    "te": "దయచేసి ఇప్పుడు మీ {drug_name} మందును తీసుకోండి. ఇది మీ షెడ్యూల్ చేసిన మోతాదు సమయం.",
+}
+# Bump when the templates change so stitched audio is not reused
+TEMPLATE_VERSION = "1"
+
+Segment = Tuple[np.ndarray, int]
+
+
+class PhraseBank:
+    """
+    Pre-rendered audio for the static parts of the reminder templates
+    A reminder is stitched from the template's pre-rendered prefix and suffix around a
+    separately synthesized (and cached) drug-name segment, resampled to the prefix's rate.
+    Languages whose segments cannot be decoded as WAV (e.g. gTTS MP3 fallback) are
+    synthesized as whole sentences instead, and their segments are tried again next time.
+    """
+
+    def __init__(self, tts_service):
+        self.tts = tts_service
+        self.gap_ms = int(os.getenv("PHRASE_BANK_GAP_MS", "60"))
+        self._segments: Dict[str, Tuple[Segment, Segment]] = {}
+        # One lock per language: a slow render only holds up reminders in its own language
+        self._language_locks = {language: threading.Lock() for language in REMINDER_TEMPLATES}
+        self._prerender_thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {"stitched": 0, "full_sentence": 0}
+
+    @staticmethod
+    def reminder_text(drug_name: str, language: str) -> str:
+        return REMINDER_TEMPLATES.get(language, REMINDER_TEMPLATES["en"]).format(drug_name=drug_name)
+
+    def _template_segments(self, language: str) -> Optional[Tuple[Segment, Segment]]:
+        """Decoded (prefix, suffix) audio for a language, rendered on first use; None if not WAV"""
+        segments = self._segments.get(language)
+        if segments is not None:
+            return segments
+        with self._language_locks[language]:
+            segments = self._segments.get(language)
+            if segments is not None:
+                return segments
+            prefix_text, suffix_text = REMINDER_TEMPLATES[language].split("{drug_name}")
+            prefix = read_wav(self.tts.synthesize_speech(prefix_text.strip(), language))
+            suffix = read_wav(self.tts.synthesize_speech(suffix_text.strip(), language))
+            if prefix is None or suffix is None:
+                # Usually a transient Sarvam failure (gTTS MP3 fallback): not remembered
+                logger.warning("Reminder template audio for '%s' is not PCM WAV, using whole-sentence TTS", language)
+                return None
+            self._segments[language] = (prefix, suffix)
+            return self._segments[language]
+
+    def prerender(self, drug_names: List[str] = ()):
+        """Render every template's static segments, then the drug-name segments of any drug_names given"""
+        for language in REMINDER_TEMPLATES:
+            try:
+                self._template_segments(language)
+            except Exception as e:
+                logger.warning("Could not pre-render reminder template for '%s': %s", language, e)
+        for language in REMINDER_TEMPLATES:
+            if self._segments.get(language) is None:
+                continue
+            for drug_name in drug_names:
+                try:
+                    self.tts.synthesize_speech(drug_name, language)
+                except Exception as e:
+                    logger.warning("Could not pre-render '%s' (%s): %s", drug_name, language, e)
+                    break
+        logger.info("Reminder phrase bank ready (%d drug names)", len(drug_names))
+
+    def start_prerender(self, drug_names: List[str] = ()):
+        self._prerender_thread = threading.Thread(target=self.prerender, args=(list(drug_names),), name="phrase-bank", daemon=True)
+        self._prerender_thread.start()
+
+    def wait_prerender(self):
+        """Block until a background prerender has finished (nothing to wait for if none was started)"""
+        if self._prerender_thread is not None:
+            self._prerender_thread.join()
+
+    def reminder_audio(self, drug_name: str, language: str) -> str:
+        """Path of the spoken reminder for a drug, stitched from pre-rendered segments when possible"""
+        language = language if language in REMINDER_TEMPLATES else "en"
+        segments = self._template_segments(language)
+        if segments is not None:
+            # Synthesized (or found in the TTS cache) before taking the stitched entry's lock
+            drug = read_wav(self.tts.synthesize_speech(drug_name, language))
+            if drug is not None:
+                prefix, suffix = segments
+                key = AudioFileCache.key(
+                    "reminder", TEMPLATE_VERSION, drug_name, language, str(self.gap_ms),
+                    self.tts.sarvam_voice, self.tts.sarvam_model, "wav"
+                )
+
+                def _stitch(path: str) -> bool:
+                    with open(path, "wb") as f:
+                        f.write(concat_wav([prefix, drug, suffix], target_rate=prefix[1], gap_ms=self.gap_ms))
+                    return True
+
+                self._count("stitched")
+                return self.tts.cache.get_or_create(key, "wav", _stitch)
+
+        self._count("full_sentence")
+        return self.tts.synthesize_speech(self.reminder_text(drug_name, language), language)
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def get_stats(self) -> Dict:
+        """Reminders stitched from segments vs. synthesized as whole sentences"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["languages"] = sorted(self._segments)
+        return stats
@@ -0,0 +1,106 @@
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict
+
+import uvicorn
+
+from services.capabilities import CapabilityRegistry
+from services.logging_config import flush_logging
+
+logger = logging.getLogger(__name__)
+
+
+def preload(capabilities: CapabilityRegistry):
+    """
+    Load every enabled capability in this (parent) process before workers are forked
+    Their background startup work (wait_startup) is finished too, and afterwards all live
+    objects are frozen out of the cyclic GC so collections in the workers do not write to
+    (and thereby copy) the pages holding them. Model weights are shared the same way,
+    copy-on-write, since inference never writes to them.
+    """
+    start = time.perf_counter()
+    capabilities.load_all()
+    # Background startup work must be done before forking: a child would inherit the locks it
+    # holds (phrase bank, audio cache stripes) locked, with no thread left to release them
+    for name in capabilities.status():
+        wait_startup = getattr(capabilities.get_if_ready(name), "wait_startup", None)
+        if wait_startup is not None:
+            wait_startup()
+    gc.collect()
+    gc.freeze()
+    logger.info("Preloaded capabilities in %.1fs", time.perf_counter() - start)
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _spawn(app: Any, sock: socket.socket, host: str, port: int) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    # Worker: default signal handling, uvicorn installs its own graceful shutdown
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    code = 0
+    try:
+        server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, workers=1, log_config=None))
+        server.run(sockets=[sock])
+    except BaseException as e:
+        logger.exception("Worker %d crashed: %s", os.getpid(), e)
+        code = 1
+    finally:
+        # os._exit skips atexit handlers
+        flush_logging()
+        os._exit(code)
+
+
+def serve_preforked(app: Any, capabilities: CapabilityRegistry, host: str, port: int, workers: int):
+    """
+    Preload models once, then fork `workers` uvicorn servers sharing one listening socket
+    Workers share the parent's model and drug data pages copy-on-write; a worker that dies
+    is replaced by a fresh fork of the (still preloaded) parent.
+    """
+    preload(capabilities)
+    sock = _bind(host, port)
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    for slot in range(workers):
+        children[_spawn(app, sock, host, port)] = slot
+    logger.info("Serving on http://%s:%d with %d preforked workers (parent %d)", host, port, workers, os.getpid())
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        logger.warning("Worker %d exited with status %d, restarting", pid, status)
+        children[_spawn(app, sock, host, port)] = slot
+    sock.close()
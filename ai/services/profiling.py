@@ -0,0 +1,274 @@
+import hmac
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Profiling is only available when a token is configured; it is compared in constant time
+PROFILE_HEADER = "x-profile"
+PROFILE_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Leaf frames of threads that are only waiting (skipped when sampling every thread)
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "base_events.py")
+_IDLE_FUNCTIONS = {"wait", "select", "get", "_wait_for_tstate_lock", "_worker", "_run_once"}
+
+
+def get_token() -> str:
+    return os.getenv("PROFILE_TOKEN", "")
+
+
+def enabled() -> bool:
+    return bool(get_token())
+
+
+def token_matches(value: Optional[str]) -> bool:
+    token = get_token()
+    return bool(token and value) and hmac.compare_digest(value, token)
+
+
+class ProfileSession:
+    """
+    Stack samples (folded, flamegraph-compatible) and torch op timings for one profile
+    A request session samples only the threads doing that request's work (registered while
+    they run it); a window session samples every busy thread in the process.
+    """
+
+    def __init__(self, name: str, all_threads: bool, collect_torch: bool = True):
+        self.name = name
+        self.all_threads = all_threads
+        self.collect_torch = collect_torch
+        self.started = time.time()
+        self.samples: Counter = Counter()
+        self.torch_ops: Dict[str, List[float]] = {}  # op -> [calls, self cpu us, total cpu us]
+        self._threads: Dict[int, int] = {}  # thread ident -> nesting count
+        self._lock = threading.Lock()
+
+    def track(self, ident: int):
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+
+    def untrack(self, ident: int):
+        with self._lock:
+            count = self._threads.get(ident, 0) - 1
+            if count > 0:
+                self._threads[ident] = count
+            else:
+                self._threads.pop(ident, None)
+
+    def threads(self) -> Optional[Set[int]]:
+        if self.all_threads:
+            return None
+        with self._lock:
+            return set(self._threads)
+
+    def add_sample(self, stack: str):
+        with self._lock:
+            self.samples[stack] += 1
+
+    def sample_count(self) -> int:
+        with self._lock:
+            return sum(self.samples.values())
+
+    def snapshot(self) -> Tuple[List[Tuple[str, int]], Dict[str, List[float]]]:
+        """Samples (most common first) and torch op totals, copied while nothing is being added"""
+        with self._lock:
+            return self.samples.most_common(), {op: list(totals) for op, totals in self.torch_ops.items()}
+
+    def add_torch_ops(self, key_averages):
+        with self._lock:
+            for event in key_averages:
+                totals = self.torch_ops.setdefault(event.key, [0, 0.0, 0.0])
+                totals[0] += event.count
+                totals[1] += event.self_cpu_time_total
+                totals[2] += event.cpu_time_total
+
+    def save(self, directory: Path) -> Path:
+        """Write <name>.folded (flamegraph.pl / speedscope input) and <name>.torch.txt"""
+        samples, torch_ops = self.snapshot()
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{self.name}.folded"
+        with open(path, "w") as f:
+            for stack, count in samples:
+                f.write(f"{stack} {count}\n")
+        if torch_ops:
+            with open(directory / f"{self.name}.torch.txt", "w") as f:
+                f.write(f"{'op':<48}{'calls':>8}{'self cpu ms':>14}{'total cpu ms':>14}\n")
+                for op, (calls, self_us, total_us) in sorted(torch_ops.items(), key=lambda item: -item[1][1]):
+                    f.write(f"{op[:47]:<48}{calls:>8}{self_us / 1000:>14.2f}{total_us / 1000:>14.2f}\n")
+        return path
+
+
+_current_session: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+
+
+class StackSampler:
+    """
+    One background thread sampling sys._current_frames() while any session is active
+    Nothing runs (and nothing is checked on the request path) when no session exists.
+    """
+
+    def __init__(self):
+        self.interval = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+        self.directory = Path(os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "output", "profiles")))
+        self.window: Optional[ProfileSession] = None
+        self._sessions: List[ProfileSession] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, session: ProfileSession):
+        with self._lock:
+            self._sessions.append(session)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def stop(self, session: ProfileSession) -> Path:
+        """Stop sampling the session and write its files (blocking; run off the event loop)"""
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+            if self.window is session:
+                self.window = None
+        path = session.save(self.directory)
+        logger.info("Saved profile %s (%d samples)", session.name, session.sample_count())
+        return path
+
+    def start_window(self, seconds: float, collect_torch: bool = True) -> ProfileSession:
+        """Sample every thread for `seconds`, then save the profile"""
+        with self._lock:
+            if self.window is not None:
+                return self.window
+            session = ProfileSession(f"window-{int(time.time())}", all_threads=True, collect_torch=collect_torch)
+            self.window = session
+        self.start(session)
+        timer = threading.Timer(seconds, self.stop, args=(session,))
+        timer.daemon = True
+        timer.start()
+        return session
+
+    def _run(self):
+        own = threading.get_ident()
+        names: Dict[int, str] = {}
+        while True:
+            with self._lock:
+                sessions = list(self._sessions)
+            if not sessions:
+                with self._lock:
+                    if not self._sessions:
+                        self._thread = None
+                        return
+                continue
+            frames = sys._current_frames()
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for session in sessions:
+                wanted = session.threads()
+                for ident, frame in frames.items():
+                    if ident == own or (wanted is not None and ident not in wanted):
+                        continue
+                    stack = _fold(frame, names.get(ident, str(ident)), skip_idle=wanted is None)
+                    if stack:
+                        session.add_sample(stack)
+            del frames
+            time.sleep(self.interval)
+
+    def list_profiles(self) -> List[Dict]:
+        if not self.directory.exists():
+            return []
+        return [
+            {"name": path.stem, "bytes": path.stat().st_size, "created": path.stat().st_mtime}
+            for path in sorted(self.directory.glob("*.folded"), key=lambda p: p.stat().st_mtime, reverse=True)
+        ]
+
+
+def _fold(frame, thread_name: str, skip_idle: bool) -> Optional[str]:
+    """Root-to-leaf 'thread;file:function;...' for one thread's current stack"""
+    if skip_idle:
+        code = frame.f_code
+        if code.co_filename.endswith(_IDLE_FILES) and code.co_name in _IDLE_FUNCTIONS:
+            return None
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    parts.append(thread_name)
+    return ";".join(reversed(parts))
+
+
+sampler = StackSampler()
+
+
+def current_session() -> Optional[ProfileSession]:
+    """The profile collecting for this request (or the open window), if any"""
+    return _current_session.get() or sampler.window
+
+
+def bind(func: Callable) -> Callable:
+    """
+    Make the thread that runs func count as this request's while it runs it
+    Used where request work is handed to pool threads; returns func itself when not profiling.
+    """
+    session = _current_session.get()
+    if session is None:
+        return func
+
+    @wraps(func)
+    def tracked(*args, **kwargs):
+        ident = threading.get_ident()
+        session.track(ident)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            session.untrack(ident)
+
+    return tracked
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests sent with `X-Profile: <PROFILE_TOKEN>`
+    The event loop thread and every thread that runs the request's work are sampled until
+    the response (including a streamed body) is complete; the response carries X-Profile-Id,
+    the name to fetch from /admin/profiles/{name}. Only added when PROFILE_TOKEN is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # The admin endpoints authenticate with the same header; they are not profiled
+        if scope["type"] != "http" or scope["path"].startswith("/admin/"):
+            await self.app(scope, receive, send)
+            return
+        header = dict(scope["headers"]).get(PROFILE_HEADER.encode())
+        if header is None or not token_matches(header.decode("latin-1")):
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(f"request-{time.strftime('%Y%m%d-%H%M%S')}-{os.urandom(3).hex()}", all_threads=False)
+        session.track(threading.get_ident())
+        token = _current_session.set(session)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", session.name.encode())]
+            await send(message)
+
+        sampler.start(session)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_session.reset(token)
+            await run_in_threadpool(sampler.stop, session)
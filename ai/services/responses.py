@@ -0,0 +1,35 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # in requirements; the stdlib fallback is compatible JSON, not byte-identical
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Compact UTF-8 JSON: orjson when installed, stdlib json otherwise
+    Both are compact, but they differ at the edges: orjson writes NaN/Infinity as null where
+    the stdlib raises, and the two stringify some non-str keys and floats differently.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response that serializes pydantic models with pydantic-core and everything else with dumps()
+    Returning one from an endpoint bypasses FastAPI's jsonable_encoder pass and the re-validation
+    of the value against response_model (which still documents the schema); the data must
+    already have the declared shape.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return dumps(content)
@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+# STT_BACKEND values
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def _find_onnx_sessions(model: Any) -> List[Tuple[Any, str, Any]]:
+    """
+    onnxruntime sessions held by the (remote-code) model: (owner, attribute or key, session)
+    The IndicConformer release runs parts of its graph through onnxruntime rather than torch modules.
+    """
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return []
+
+    found = []
+    seen = set()
+    owners = [model] + list(model.modules()) if isinstance(model, torch.nn.Module) else [model]
+    for owner in owners:
+        for name, value in list(vars(owner).items()):
+            if isinstance(value, ort.InferenceSession) and id(value) not in seen:
+                seen.add(id(value))
+                found.append((owner, name, value))
+            elif isinstance(value, dict):
+                for key, item in value.items():
+                    if isinstance(item, ort.InferenceSession) and id(item) not in seen:
+                        seen.add(id(item))
+                        found.append((value, key, item))
+    return found
+
+
+def _session_options(threads: int):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    if threads > 0:
+        options.intra_op_num_threads = threads
+    return options
+
+
+def _rebuild_session(session: Any, quantize: bool, cache_dir: Path, threads: int) -> Any:
+    """Re-create an onnxruntime session with full graph optimizations, optionally on int8 weights"""
+    import onnxruntime as ort
+
+    model_path = getattr(session, "_model_path", None)
+    if not model_path:
+        # Session built from in-memory bytes: nothing on disk to quantize or re-optimize
+        return session
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        digest = hashlib.blake2b(str(Path(model_path).resolve()).encode(), digest_size=8).hexdigest()
+        quantized_path = cache_dir / f"{Path(model_path).stem}-{digest}.int8.onnx"
+        if not quantized_path.exists():
+            logger.info("Quantizing %s to int8 (cached in %s)", Path(model_path).name, cache_dir)
+            tmp_path = quantized_path.with_suffix(".tmp")
+            quantize_dynamic(str(model_path), str(tmp_path), weight_type=QuantType.QInt8)
+            os.replace(tmp_path, quantized_path)
+        model_path = str(quantized_path)
+
+    return ort.InferenceSession(
+        str(model_path),
+        sess_options=_session_options(threads),
+        providers=["CPUExecutionProvider"]
+    )
+
+
+def optimize_for_cpu(model: Any, backend: str, cache_dir: str = None, threads: int = None) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Apply the STT_BACKEND CPU optimization to a loaded IndicConformer model
+    - torch: unchanged fp32 model
+    - int8:  torch dynamic int8 quantization of nn.Linear layers, plus int8 weights for
+             any onnxruntime sessions inside the model
+    - onnx:  onnxruntime sessions inside the model rebuilt with all graph optimizations
+    Returns (model, info) where info describes what was converted.
+    """
+    info: Dict[str, Any] = {"backend": backend, "quantized_linear": 0, "onnx_sessions": 0}
+    if backend == "torch":
+        return model, info
+    if backend not in BACKENDS:
+        logger.warning("Unknown STT_BACKEND '%s', using torch fp32", backend)
+        info["backend"] = "torch"
+        return model, info
+
+    if backend == "int8" and isinstance(model, torch.nn.Module):
+        linear = sum(1 for module in model.modules() if isinstance(module, torch.nn.Linear))
+        if linear:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+            info["quantized_linear"] = linear
+
+    sessions = _find_onnx_sessions(model)
+    if sessions:
+        cache = Path(cache_dir or os.getenv("STT_ONNX_CACHE_DIR", "onnx_cache"))
+        cache.mkdir(parents=True, exist_ok=True)
+        threads = threads if threads is not None else int(os.getenv("STT_TORCH_THREADS", "0"))
+        for owner, key, session in sessions:
+            rebuilt = _rebuild_session(session, backend == "int8", cache, threads)
+            if rebuilt is session:
+                continue
+            if isinstance(owner, dict):
+                owner[key] = rebuilt
+            else:
+                setattr(owner, key, rebuilt)
+            info["onnx_sessions"] += 1
+
+    if not info["quantized_linear"] and not info["onnx_sessions"]:
+        logger.warning("STT_BACKEND=%s: nothing to optimize in this model, running fp32", backend)
+    return model, info
@@ -0,0 +1,255 @@
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import torch
+
+from services import profiling
+from services.deadline import Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+# torch.profiler (Kineto) supports one active profiler per process; workers take turns
+_profiler_lock = threading.Lock()
+
+
+class InferenceJob:
+    """One utterance waiting for the inference worker"""
+
+    __slots__ = ("wav", "language", "decoding", "length_bucket", "deadline", "profile", "future", "enqueued_at")
+
+    def __init__(self, wav: torch.Tensor, language: str, decoding: str, deadline: Optional[Deadline], length_bucket: int):
+        self.wav = wav
+        self.language = language
+        self.decoding = decoding
+        self.length_bucket = length_bucket
+        self.deadline = deadline
+        # Profile of the submitting request (or open window) that wants torch op timings
+        self.profile = profiling.current_session()
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def key(self) -> Tuple[str, str, int]:
+        return (self.language, self.decoding, self.length_bucket)
+
+
+class IndicBatchWorker:
+    """
+    Dedicated inference thread(s) for IndicConformer fed by a queue
+    Pending utterances are grouped by (language, decoding, length) and run as batches once a
+    group reaches max_batch_size or its oldest job has waited max_wait_ms. The model takes no
+    lengths, so only utterances in the same max_pad_ms length bucket share a batch (250 ms by
+    default, a trailing silence the decoder tolerates; 0 batches equal lengths only). If the
+    first batch shows the model cannot take [B, T] input, every job runs on its own from then
+    on without waiting for batch-mates.
+    Results are delivered through futures, so callers never run the model on the event loop.
+    """
+
+    def __init__(
+        self,
+        model: Callable,
+        device: str = "cpu",
+        max_batch_size: int = None,
+        max_wait_ms: float = None,
+        num_workers: int = None,
+        max_pad_ms: float = None
+    ):
+        self.model = model
+        self.device = device
+        self.max_batch_size = max_batch_size or int(os.getenv("STT_BATCH_MAX_SIZE", "4"))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else float(os.getenv("STT_BATCH_MAX_WAIT_MS", "20"))) / 1000
+        # Concurrent forward passes; also how many chunks of one long recording run at once
+        self.num_workers = num_workers or int(os.getenv("STT_INFERENCE_WORKERS", "2"))
+        max_pad_ms = max_pad_ms if max_pad_ms is not None else float(os.getenv("STT_BATCH_MAX_PAD_MS", "250"))
+        self.max_pad_frames = int(max_pad_ms * 16)  # 16 kHz input
+        # None until the first multi-utterance batch shows whether the model accepts [B, T] input
+        self.batched_supported: Optional[bool] = None
+
+        self._queue: "queue.Queue[InferenceJob]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._started_pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, float] = {"jobs": 0, "batches": 0, "dropped": 0, "queue_ms": 0.0}
+        self._batch_ids = itertools.count()
+
+    def submit(self, wav: torch.Tensor, language: str, decoding: str, deadline: Optional[Deadline] = None) -> Future:
+        """Queue a mono 16 kHz waveform [1, frames]; the future resolves to {text, queue_ms, batch_id, batch_size, inference_ms}"""
+        self._ensure_started()
+        frames = wav.shape[-1]
+        bucket = frames // self.max_pad_frames if self.max_pad_frames > 0 else frames
+        job = InferenceJob(wav, language, decoding, deadline, bucket)
+        self._queue.put(job)
+        return job.future
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so (re)start them in whichever process submits
+        if self._started_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._started_pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"indic-inference-{i}", daemon=True)
+                for i in range(self.num_workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._started_pid = os.getpid()
+
+    def _run(self):
+        pending: Dict[Tuple[str, str, int], Deque[InferenceJob]] = {}
+        while True:
+            # Nothing to wait for once the model turned out to take one utterance per call
+            max_wait = 0.0 if self.batched_supported is False else self.max_wait
+            # Block until work arrives, or until the oldest pending group's window closes
+            timeout = None
+            if pending:
+                oldest = min(jobs[0].enqueued_at for jobs in pending.values())
+                timeout = max(0.0, oldest + max_wait - time.monotonic())
+            try:
+                job = self._queue.get(timeout=timeout)
+                pending.setdefault(job.key, deque()).append(job)
+                # Unbatched, each worker takes one job at a time so the others get the rest
+                while self.batched_supported is not False:
+                    job = self._queue.get_nowait()
+                    pending.setdefault(job.key, deque()).append(job)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            for key in list(pending):
+                jobs = pending[key]
+                while jobs and (len(jobs) >= self.max_batch_size or now - jobs[0].enqueued_at >= max_wait):
+                    batch = [jobs.popleft() for _ in range(min(len(jobs), self.max_batch_size))]
+                    self._run_batch(batch)
+                if not jobs:
+                    del pending[key]
+
+    def _run_batch(self, batch: List[InferenceJob]):
+        started = time.monotonic()
+        live = []
+        for job in batch:
+            if not job.future.set_running_or_notify_cancel():
+                self._count("dropped")
+                continue
+            if job.deadline is not None:
+                try:
+                    # Request abandoned while queued: skip the inference entirely
+                    job.deadline.check("stt_indic")
+                except DeadlineExceeded as e:
+                    self._count("dropped")
+                    job.future.set_exception(e)
+                    continue
+            live.append(job)
+        if not live:
+            return
+
+        language, decoding, _ = live[0].key
+        sessions = {job.profile for job in live if job.profile is not None and job.profile.collect_torch}
+        try:
+            start = time.perf_counter()
+            if sessions:
+                texts = self._infer_profiled(live, language, decoding, sessions)
+            else:
+                texts = self._infer(live, language, decoding)
+            inference_ms = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            for job in live:
+                job.future.set_exception(e)
+            return
+
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["jobs"] += len(live)
+            self._stats["queue_ms"] += sum((started - job.enqueued_at) * 1000 for job in live)
+
+        batch_id = next(self._batch_ids)
+        for job, text in zip(live, texts):
+            job.future.set_result({
+                "text": text,
+                "queue_ms": (started - job.enqueued_at) * 1000,
+                "batch_id": batch_id,
+                "batch_size": len(live),
+                "inference_ms": inference_ms
+            })
+
+    def _infer(self, jobs: List[InferenceJob], language: str, decoding: str) -> List[str]:
+        with torch.no_grad():
+            if len(jobs) == 1 or self.batched_supported is False:
+                return [self._as_text(self.model(job.wav.to(self.device), language, decoding)) for job in jobs]
+
+            # Zero-pad to the longest utterance (at most max_pad_ms): [B, T]
+            # A failed probe costs one wasted batched pass per process; after it jobs run alone
+            lengths = [job.wav.shape[-1] for job in jobs]
+            padded = torch.zeros(len(jobs), max(lengths))
+            for i, job in enumerate(jobs):
+                padded[i, :lengths[i]] = job.wav.reshape(-1)
+            try:
+                outputs = self.model(padded.to(self.device), language, decoding)
+            except Exception as e:
+                logger.warning("Batched IndicConformer inference failed, falling back to per-utterance: %s", e)
+                outputs = None
+
+            if isinstance(outputs, (list, tuple)) and len(outputs) == len(jobs):
+                self.batched_supported = True
+                return [self._as_text(output) for output in outputs]
+
+            # The model only handles one utterance per call
+            self.batched_supported = False
+            return [self._as_text(self.model(job.wav.to(self.device), language, decoding)) for job in jobs]
+
+    def _infer_profiled(self, jobs: List[InferenceJob], language: str, decoding: str, sessions) -> List[str]:
+        """
+        _infer under torch.profiler, with this thread's stacks sampled into the requests' profiles
+        Profiled batches run one at a time across all workers, since profilers cannot overlap.
+        """
+        ident = threading.get_ident()
+        for session in sessions:
+            session.track(ident)
+        try:
+            with _profiler_lock, torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU]) as prof:
+                texts = self._infer(jobs, language, decoding)
+        finally:
+            for session in sessions:
+                session.untrack(ident)
+        ops = prof.key_averages()
+        for session in sessions:
+            session.add_torch_ops(ops)
+        return texts
+
+    @staticmethod
+    def _as_text(output: Any) -> str:
+        if isinstance(output, (list, tuple)):
+            output = output[0] if output else ""
+        return output.strip() if output else ""
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batching counters: jobs, batches, average batch size and queue wait"""
+        with self._stats_lock:
+            jobs, batches = self._stats["jobs"], self._stats["batches"]
+            return {
+                "jobs": jobs,
+                "batches": batches,
+                "dropped": self._stats["dropped"],
+                "avg_batch_size": jobs / batches if batches else None,
+                "avg_queue_ms": self._stats["queue_ms"] / jobs if jobs else None,
+                "queued": self._queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "max_pad_ms": self.max_pad_frames / 16,
+                "workers": self.num_workers,
+                "batched_supported": self.batched_supported
+            }
@@ -1,15 +1,43 @@
+import logging
 import os
+import threading
 import torch
-import torchaudio
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from io import BytesIO
-import tempfile
 import requests
 from dotenv import load_dotenv
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from services.audio_io import encode_wav
+from services.audio_preprocess import AudioPreprocessor
+from services.cache import LRUCache, content_key
+from services.deadline import DeadlineExceeded, current_deadline, upstream_timeout
+from services.metrics import span, upstream
+from services.stt_backends import optimize_for_cpu
+from services.stt_batcher import IndicBatchWorker
+from services.vad import EnergyVAD
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+def stitch_transcripts(texts: List[str], max_overlap_words: int = 20) -> str:
+    """
+    Join transcripts of overlapping chunks, dropping the words repeated across each boundary
+    The overlap is the longest run of words that ends one chunk and starts the next.
+    """
+    words: List[str] = []
+    for text in texts:
+        next_words = text.split()
+        overlap = 0
+        for size in range(min(max_overlap_words, len(words), len(next_words)), 0, -1):
+            if words[-size:] == next_words[:size]:
+                overlap = size
+                break
+        words.extend(next_words[overlap:])
+    return " ".join(words)
+
 
 class STTService:
     """
@@ -23,7 +51,30 @@ class STTService:
         self.model_name = model_name or os.getenv("INDIC_CONFORMER_MODEL", "ai4bharat/indic-conformer-600m-multilingual")
         self.use_gpu = use_gpu if use_gpu is not None else (torch.cuda.is_available() and os.getenv("USE_GPU", "false").lower() == "true")
         self.indic_model = None
+        # CPU inference backend: torch (fp32), int8 or onnx
+        self.backend = os.getenv("STT_BACKEND", "torch").lower()
+        self.backend_info = {"backend": "torch"}
+        # Decode/downmix/resample stage (also applies STT_TORCH_THREADS before the model loads)
+        self.preprocessor = AudioPreprocessor()
         self._load_indic_model()
+        # Inference runs on dedicated worker thread(s) that batch concurrent utterances
+        self.batcher = IndicBatchWorker(self._run_model, device="cuda" if self.use_gpu else "cpu")
+        
+        # Silence trimming and chunking of long recordings before inference
+        self.vad = EnergyVAD()
+        self.vad_trim = os.getenv("STT_VAD_TRIM", "true").lower() == "true"
+        self.chunk_seconds = float(os.getenv("STT_CHUNK_SECONDS", "30"))
+        self.chunk_overlap_seconds = float(os.getenv("STT_CHUNK_OVERLAP_SECONDS", "1.0"))
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "audio_seconds_in": 0.0, "audio_seconds_trimmed": 0.0, "chunked_requests": 0, "chunks": 0}
+        
+        # Transcripts of repeated uploads (client retries), keyed by audio hash + settings + model
+        self.cache = LRUCache(
+            int(os.getenv("STT_CACHE_SIZE", "256")),
+            os.getenv("STT_CACHE_DIR") or None,
+            disk_max_bytes=int(float(os.getenv("STT_CACHE_DISK_MAX_MB", "256")) * 1024 * 1024),
+            disk_max_age_seconds=float(os.getenv("STT_CACHE_MAX_AGE_DAYS", "30")) * 86400
+        )
         
         # Whisper API configuration (for English)
         self.whisper_api_url = whisper_api_url or os.getenv("WHISPER_API_URL", "http://10.10.110.24:40004")
@@ -61,7 +112,7 @@ class STTService:
             from transformers import AutoModel
             import os
             
-            print(f"Loading IndicConformer model: {self.model_name}")
+            logger.info("Loading IndicConformer model: %s", self.model_name)
             
             # Get Hugging Face token from environment
             hf_token = os.getenv("HF_TOKEN") or os.getenv("HUGGINGFACE_TOKEN")
@@ -74,9 +125,9 @@ class STTService:
             # Add token if available
             if hf_token:
                 model_kwargs["token"] = hf_token
-                print("✅ Using Hugging Face token for authentication")
+                logger.info("Using Hugging Face token for authentication")
             else:
-                print("⚠️  No HF_TOKEN found. Make sure you have access to the model.")
+                logger.warning("No HF_TOKEN found. Make sure you have access to the model.")
             
             device = "cuda" if self.use_gpu else "cpu"
             self.indic_model = AutoModel.from_pretrained(
@@ -85,16 +136,25 @@ class STTService:
             )
             self.indic_model.to(device)
             self.indic_model.eval()
-            print(f"✅ IndicConformer model loaded on {device}")
+            if self.use_gpu:
+                if self.backend != "torch":
+                    logger.warning("STT_BACKEND=%s is CPU-only, ignored on GPU", self.backend)
+            else:
+                self.indic_model, self.backend_info = optimize_for_cpu(self.indic_model, self.backend)
+            logger.info("IndicConformer model loaded on %s (backend: %s)", device, self.backend_info["backend"])
         except Exception as e:
-            print(f"Error loading IndicConformer model: {e}")
+            logger.error("Error loading IndicConformer model: %s", e)
             if "403" in str(e) or "gated" in str(e).lower():
-                print("\n⚠️  Access denied. Please:")
-                print("   1. Visit https://huggingface.co/ai4bharat/indic-conformer-600m-multilingual")
-                print("   2. Accept the model terms")
-                print("   3. Set HF_TOKEN in your .env file")
+                logger.error(
+                    "Access denied. Please: 1. Visit https://huggingface.co/ai4bharat/indic-conformer-600m-multilingual"
+                    " 2. Accept the model terms 3. Set HF_TOKEN in your .env file"
+                )
             self.indic_model = None
     
+    def _run_model(self, wav: torch.Tensor, language: str, decoding: str):
+        """Single IndicConformer forward pass (called on the inference worker thread)"""
+        return self.indic_model(wav, language, decoding)
+    
     def _transcribe_whisper_api(self, audio_data: bytes, language: str) -> Dict[str, str]:
         """Transcribe using Whisper API (for English)"""
         try:
@@ -107,14 +167,15 @@ class STTService:
                 'language': language
             }
             
-            response = requests.post(
-                f"{self.whisper_api_url}/v1/audio/transcriptions",
-                files=files,
-                data=data,
-                timeout=60
-            )
-            response.raise_for_status()
-            result = response.json()
+            with upstream("whisper"):
+                response = requests.post(
+                    f"{self.whisper_api_url}/v1/audio/transcriptions",
+                    files=files,
+                    data=data,
+                    timeout=upstream_timeout(60, "whisper")
+                )
+                response.raise_for_status()
+                result = response.json()
             
             # Extract text from response
             text = result.get("text", "") or result.get("transcription", "") or result.get("transcript", "")
@@ -123,8 +184,10 @@ class STTService:
                 "text": text,
                 "language": language
             }
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"Error in Whisper API transcription: {e}")
+            logger.error("Error in Whisper API transcription: %s", e)
             raise Exception(f"Whisper API transcription failed: {str(e)}")
     
     def _transcribe_indic_conformer(self, audio_data: bytes, language: str, decoding: str) -> Dict[str, str]:
@@ -133,61 +196,96 @@ class STTService:
             raise Exception("IndicConformer model not loaded. Please check model installation.")
         
         try:
-            # Map language code
-            indic_lang = self.language_map.get(language.lower(), "hi")
-            
-            # Save audio to temporary file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-                tmp_file.write(audio_data)
-                tmp_path = tmp_file.name
-            
-            try:
-                # Load audio file
-                wav, sr = torchaudio.load(tmp_path)
-                
-                # Convert to mono if stereo
-                if wav.shape[0] > 1:
-                    wav = torch.mean(wav, dim=0, keepdim=True)
-                
-                # Resample to 16kHz if needed (IndicConformer expects 16kHz)
-                target_sample_rate = 16000
-                if sr != target_sample_rate:
-                    resampler = torchaudio.transforms.Resample(
-                        orig_freq=sr,
-                        new_freq=target_sample_rate
-                    )
-                    wav = resampler(wav)
-                
-                # Move to appropriate device
-                device = "cuda" if self.use_gpu else "cpu"
-                wav = wav.to(device)
-                
-                # Perform ASR
-                with torch.no_grad():
-                    transcription = self.indic_model(wav, indic_lang, decoding)
-                
-                # Clean up transcription
-                text = transcription.strip() if transcription else ""
-                
-                return {
-                    "text": text,
-                    "language": indic_lang
-                }
-            
-            finally:
-                # Clean up temp file
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-                    
+            # Decode from memory, downmix and resample with cached kernels
+            wav, timings = self.preprocessor.prepare(audio_data)
+            return self._transcribe_indic_waveform(wav, language, decoding, timings)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"Error in IndicConformer transcription: {e}")
+            logger.error("Error in IndicConformer transcription: %s", e)
             raise Exception(f"IndicConformer transcription failed: {str(e)}")
     
+    def _transcribe_indic_waveform(self, wav: torch.Tensor, language: str, decoding: str, timings: Dict) -> Dict[str, str]:
+        """
+        Run a prepared 16 kHz mono waveform through the IndicConformer inference worker
+        Leading/trailing silence is trimmed first; long inputs are split at pauses into
+        overlapping chunks that are transcribed in parallel (STT_INFERENCE_WORKERS at a time)
+        and stitched back together.
+        """
+        # Map language code
+        indic_lang = self.language_map.get(language.lower(), "hi")
+        
+        input_seconds = wav.shape[-1] / 16000
+        if self.vad_trim:
+            wav = self.vad.trim(wav)
+        chunks = self.vad.split(wav, self.chunk_seconds, self.chunk_overlap_seconds)
+        self._record(input_seconds, input_seconds - wav.shape[-1] / 16000, len(chunks))
+        
+        # Hand the chunks to the inference worker and wait for their batches
+        deadline = current_deadline()
+        futures = [self.batcher.submit(chunk, indic_lang, decoding, deadline) for chunk in chunks]
+        try:
+            with span("stt_inference", indic_lang):
+                results = [self._wait_for_inference(future) for future in futures]
+        finally:
+            for future in futures:
+                future.cancel()
+        
+        timings["queue_ms"] = max(result["queue_ms"] for result in results)
+        # Chunks that shared a batch share one inference
+        timings["inference_ms"] = sum({result["batch_id"]: result["inference_ms"] for result in results}.values())
+        timings["batch_size"] = max(result["batch_size"] for result in results)
+        timings["chunks"] = len(chunks)
+        timings["audio_seconds_trimmed"] = round(input_seconds - wav.shape[-1] / 16000, 3)
+        
+        # Clean up transcription
+        text = stitch_transcripts([result["text"] for result in results])
+        
+        return {
+            "text": text,
+            "language": indic_lang,
+            "timings": timings
+        }
+    
+    def _record(self, input_seconds: float, trimmed_seconds: float, chunks: int):
+        with self._stats_lock:
+            self._stats["requests"] += 1
+            self._stats["audio_seconds_in"] += input_seconds
+            self._stats["audio_seconds_trimmed"] += trimmed_seconds
+            self._stats["chunks"] += chunks
+            if chunks > 1:
+                self._stats["chunked_requests"] += 1
+    
+    def get_stats(self) -> Dict:
+        """Audio seconds received vs. saved by silence trimming, and how often inputs were chunked"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["backend"] = self.backend_info
+        stats["trimmed_ratio"] = stats["audio_seconds_trimmed"] / stats["audio_seconds_in"] if stats["audio_seconds_in"] else None
+        return stats
+    
+    def _wait_for_inference(self, future) -> Dict:
+        """Wait for a queued inference job, cancelling it if the request is abandoned meanwhile"""
+        while True:
+            try:
+                return future.result(timeout=0.25)
+            except FutureTimeoutError:
+                deadline = current_deadline()
+                if deadline is not None and deadline.expired():
+                    future.cancel()
+                    deadline.check("stt_indic")
+    
+    def _cache_key(self, audio_data: bytes, language: str, decoding: str) -> str:
+        if language == "en":
+            return content_key(audio_data, "en", "whisper", self.whisper_model)
+        return content_key(audio_data, language, decoding, self.model_name, self.backend_info["backend"])
+    
     def transcribe_audio(self, audio_data: bytes, language: str = "hi", decoding: str = "ctc") -> Dict[str, str]:
         """
         Transcribe audio using hybrid approach:
         - Whisper API for English
         - IndicConformer for 22 Indian languages
+        Identical uploads are answered from the transcript cache.
         
         Args:
             audio_data: Audio file bytes (WAV, FLAC, etc.)
@@ -195,8 +293,24 @@ class STTService:
             decoding: "ctc" or "rnnt" for IndicConformer (default: "ctc")
         
         Returns:
-            {text, language}
+            {text, language} (+ per-stage timings in ms for IndicConformer, cached=True on a cache hit)
         """
+        if not self.cache.enabled:
+            with span("stt", language.lower()):
+                return self._transcribe_uncached(audio_data, language, decoding)
+        
+        key = self._cache_key(audio_data, language.lower(), decoding)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return dict(cached, cached=True)
+        
+        with span("stt", language.lower()):
+            result = self._transcribe_uncached(audio_data, language, decoding)
+        if result.get("text"):
+            self.cache.put(key, {"text": result["text"], "language": result["language"]})
+        return result
+    
+    def _transcribe_uncached(self, audio_data: bytes, language: str, decoding: str) -> Dict[str, str]:
         language_lower = language.lower()
         
         # Route to appropriate service
@@ -204,25 +318,41 @@ class STTService:
             # English: Use Whisper API
             if not self.use_whisper_api:
                 raise Exception("Whisper API not configured. Set WHISPER_API_URL in .env")
-            print("🌐 Using Whisper API for English transcription")
+            logger.debug("Using Whisper API for English transcription", extra={"sampled": True})
             return self._transcribe_whisper_api(audio_data, "en")
         
         elif language_lower in self.indic_languages:
             # Indian languages: Use IndicConformer
             if self.indic_model is None:
                 raise Exception("IndicConformer model not loaded. Please check model installation.")
-            print(f"🇮🇳 Using IndicConformer for {language} transcription")
-            print(f"   ⚠️  WARNING: Make sure audio is actually in {language}!")
-            print(f"   ⚠️  If audio is in a different language, transcription will be poor/incorrect.")
+            # The language must match the audio: a mismatch gives poor/incorrect transcripts
+            logger.info("Using IndicConformer for %s transcription", language, extra={"sampled": True})
             return self._transcribe_indic_conformer(audio_data, language, decoding)
         
         else:
             # Unknown language: Try IndicConformer with Hindi as fallback
-            print(f"⚠️  Unknown language '{language}', using IndicConformer with Hindi fallback")
+            logger.warning("Unknown language '%s', using IndicConformer with Hindi fallback", language, extra={"sampled": True})
             if self.indic_model is None:
                 raise Exception(f"Language '{language}' not supported and IndicConformer not available")
             return self._transcribe_indic_conformer(audio_data, "hi", decoding)
     
+    def transcribe_waveform(self, wav: torch.Tensor, language: str = "hi", decoding: str = "ctc") -> Dict[str, str]:
+        """
+        Transcribe an already prepared 16 kHz mono waveform [1, frames]
+        Used for VAD segments of streamed audio, which never exist as an uploaded file.
+        """
+        language_lower = language.lower()
+        if language_lower == "en":
+            if not self.use_whisper_api:
+                raise Exception("Whisper API not configured. Set WHISPER_API_URL in .env")
+            return self._transcribe_whisper_api(encode_wav(wav, 16000), "en")
+        
+        if self.indic_model is None:
+            raise Exception("IndicConformer model not loaded. Please check model installation.")
+        if language_lower not in self.indic_languages:
+            language_lower = "hi"
+        return self._transcribe_indic_waveform(wav, language_lower, decoding, {})
+    
     def get_supported_languages(self) -> list:
         """Get list of supported language codes"""
         return ["en"] + list(self.indic_languages)
@@ -0,0 +1,65 @@
+import re
+from typing import List
+
+# Sentence-final punctuation per script: Latin . ! ?, Devanagari/Bengali/Odia/Gurmukhi danda,
+# Urdu full stop and question mark. Tamil, Telugu, Kannada, Malayalam use Latin punctuation.
+SENTENCE_END = r"[.!?।॥۔؟]"
+
+# Abbreviations whose period does not end a sentence
+ABBREVIATIONS = {"dr", "mr", "mrs", "ms", "vs", "e.g", "i.e", "approx"}
+
+_SENTENCE_RE = re.compile(rf"(.+?(?:{SENTENCE_END})+[\"'”’)\]]*)(?=\s|$)|(.+?)$", re.S)
+
+
+def _ends_with_abbreviation(sentence: str) -> bool:
+    if not sentence.endswith("."):
+        return False
+    word = sentence[:-1].rsplit(None, 1)[-1].lower() if sentence[:-1].split() else ""
+    return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Break an over-long sentence at clause punctuation, then at spaces"""
+    parts: List[str] = []
+    current = ""
+    for piece in re.split(r"(?<=[,;:，、])\s+|\s+", sentence):
+        candidate = f"{current} {piece}".strip()
+        if current and len(candidate) > max_chars:
+            parts.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_sentences(text: str, max_chars: int = 250, min_chars: int = 8) -> List[str]:
+    """
+    Split text into sentence-sized chunks for speech synthesis
+    Handles Latin and Indic sentence punctuation, keeps abbreviations and decimals intact,
+    merges fragments shorter than min_chars into the next sentence and breaks sentences
+    longer than max_chars at clause boundaries.
+    """
+    text = re.sub(r"\s+", " ", text).strip()
+    if not text:
+        return []
+
+    sentences: List[str] = []
+    carry = ""
+    for match in _SENTENCE_RE.finditer(text):
+        sentence = (match.group(1) or match.group(2) or "").strip()
+        if not sentence:
+            continue
+        sentence = f"{carry} {sentence}".strip() if carry else sentence
+        if _ends_with_abbreviation(sentence) or len(sentence) < min_chars:
+            carry = sentence
+            continue
+        carry = ""
+        sentences.extend(_split_long(sentence, max_chars) if len(sentence) > max_chars else [sentence])
+    if carry:
+        if sentences and len(sentences[-1]) + len(carry) < max_chars:
+            sentences[-1] = f"{sentences[-1]} {carry}"
+        else:
+            sentences.append(carry)
+    return sentences
@@ -0,0 +1,116 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, Optional
+
+from services.cache import LRUCache, content_key
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """NFC, trimmed, single-spaced: the form translations are stored under"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TranslationMemory:
+    """
+    Previously seen translations: in-process LRU in front of a SQLite table
+    Keyed by (source language, target language, normalized text). Hits, persistent hits and
+    misses are counted per language pair.
+    """
+
+    def __init__(self, max_entries: int = None, db_path: str = None):
+        self.lru = LRUCache(max_entries if max_entries is not None else int(os.getenv("TRANSLATION_CACHE_SIZE", "4096")))
+        self.db_path = db_path if db_path is not None else os.getenv(
+            "TRANSLATION_MEMORY_PATH",
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), "output", "translation_memory.db")
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pairs: Dict[str, Dict[str, int]] = {}
+        if self.db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._connection().execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " source TEXT NOT NULL, target TEXT NOT NULL, text TEXT NOT NULL,"
+                " translation TEXT NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (source, target, text))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread (and per process: connections must not cross a fork)
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _key(source: str, target: str, text: str) -> str:
+        return content_key(text.encode(), source, target)
+
+    def get(self, source: str, target: str, text: str) -> Optional[str]:
+        key = self._key(source, target, text)
+        if self.lru.enabled:
+            translation = self.lru.get(key)
+            if translation is not None:
+                self.count(source, target, "hits")
+                return translation
+
+        translation = None
+        if self.db_path:
+            try:
+                row = self._connection().execute(
+                    "SELECT translation FROM translations WHERE source = ? AND target = ? AND text = ?",
+                    (source, target, text)
+                ).fetchone()
+                translation = row[0] if row else None
+            except sqlite3.Error as e:
+                logger.warning("Translation memory lookup failed: %s", e)
+        if translation is None:
+            self.count(source, target, "misses")
+            return None
+        self.count(source, target, "persistent_hits")
+        if self.lru.enabled:
+            self.lru.put(key, translation)
+        return translation
+
+    def put(self, source: str, target: str, text: str, translation: str):
+        if self.lru.enabled:
+            self.lru.put(self._key(source, target, text), translation)
+        if self.db_path:
+            try:
+                self._connection().execute(
+                    "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                    (source, target, text, translation, time.time())
+                )
+            except sqlite3.Error as e:
+                logger.warning("Translation memory write failed: %s", e)
+
+    def count(self, source: str, target: str, counter: str):
+        pair = f"{source}->{target}"
+        with self._lock:
+            counters = self._pairs.setdefault(pair, {"hits": 0, "persistent_hits": 0, "misses": 0, "short_circuits": 0})
+            counters[counter] += 1
+
+    def get_stats(self) -> Dict:
+        """Per language pair hit rates, plus LRU and persistent tier sizes"""
+        with self._lock:
+            pairs = {pair: dict(counters) for pair, counters in self._pairs.items()}
+        for counters in pairs.values():
+            lookups = counters["hits"] + counters["persistent_hits"] + counters["misses"]
+            counters["hit_rate"] = (counters["hits"] + counters["persistent_hits"]) / lookups if lookups else None
+        persistent_entries = None
+        if self.db_path:
+            try:
+                persistent_entries = self._connection().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            except sqlite3.Error:
+                pass
+        return {"pairs": pairs, "lru": self.lru.get_stats(), "persistent_entries": persistent_entries}
@@ -1,6 +1,41 @@
+import logging
 import requests
 import os
-from typing import Dict, Optional
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Dict, List, Optional
+from services import profiling
+from services.deadline import DeadlineExceeded, check_deadline, upstream_timeout
+from services.metrics import count_fallback, span, upstream
+from services.text_segmentation import split_sentences
+from services.translation_memory import TranslationMemory, normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Language codes -> the language names Sarvam expects
+LANGUAGE_MAP = {
+    "hi": "Hindi",
+    "ta": "Tamil",
+    "te": "Telugu",
+    "kn": "Kannada",
+    "ml": "Malayalam",
+    "mr": "Marathi",
+    "gu": "Gujarati",
+    "bn": "Bengali",
+    "pa": "Punjabi",
+    "en": "English"
+}
+_LANGUAGE_NAMES = {name.lower(): name for name in LANGUAGE_MAP.values()}
+
+
+def canonical_language(language: str) -> str:
+    """Language code or name (any case) -> canonical name; unknown values pass through unchanged"""
+    lowered = language.strip().lower()
+    if lowered == "auto":
+        return "auto"
+    return LANGUAGE_MAP.get(lowered) or _LANGUAGE_NAMES.get(lowered) or language
 
 
 class TranslationService:
@@ -12,6 +47,13 @@ class TranslationService:
         # Sarvam Base URL (same for translation and TTS)
         self.sarvam_api_url = sarvam_api_url or os.getenv("SARVAM_BASE_URL", "http://10.11.7.65:8092")
         self.use_sarvam = bool(self.sarvam_api_url and self.sarvam_api_url != "http://localhost:8092")
+        # Repeated strings (reminders, risk messages, drug names) are answered from memory
+        self.memory = TranslationMemory()
+        # Cap on concurrent Sarvam translation requests across all callers
+        self.max_concurrency = int(os.getenv("TRANSLATION_MAX_CONCURRENCY", "8"))
+        self._upstream_slots = threading.BoundedSemaphore(self.max_concurrency)
+        # Shared by every batch call; more threads would only wait for a slot
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="translate")
 
     def translate(
         self,
@@ -21,6 +63,8 @@ class TranslationService:
     ) -> Dict[str, str]:
         """
         Translate text using Sarvam Translation API
+        Same-language requests and text without letters are returned as is; translations
+        already in the translation memory skip the network.
         Returns: {text, source_language, target_language}
         
         Args:
@@ -36,47 +80,136 @@ class TranslationService:
                 "target_language": target_language
             }
 
-        return self._translate_sarvam(text, target_language, source_language)
+        source_lang = canonical_language(source_language)
+        target_lang = canonical_language(target_language)
+        if source_lang == target_lang or not any(ch.isalpha() for ch in text):
+            self.memory.count(source_lang, target_lang, "short_circuits")
+            return {"text": text, "source_language": source_lang, "target_language": target_lang}
+
+        # Normalized text is only the memory key; Sarvam gets the original line breaks
+        normalized = normalize_text(text)
+        translated_text = self.memory.get(source_lang, target_lang, normalized)
+        if translated_text is None:
+            with span("translate", target_lang):
+                translated_text = self._translate_sarvam(text, target_lang, source_lang)
+            if translated_text is None:
+                # Sarvam failed: original text, and nothing remembered
+                count_fallback("translation", "untranslated")
+                return {
+                    "text": text,
+                    "source_language": source_language,
+                    "target_language": target_language
+                }
+            self.memory.put(source_lang, target_lang, normalized, translated_text)
+
+        return {
+            "text": translated_text,
+            "source_language": source_lang,
+            "target_language": target_lang
+        }
+
+    def translate_many(
+        self,
+        texts: List[str],
+        target_language: str,
+        source_language: str = "auto"
+    ) -> Dict:
+        """
+        Translate several texts at once
+        Texts are split into sentences, identical sentences are translated once, and the unique
+        ones are translated concurrently (bounded by TRANSLATION_MAX_CONCURRENCY) before being
+        reassembled in order, keeping paragraph breaks.
+        Returns: {texts, source_language, target_language, segments, unique_segments}
+        """
+        if not self.use_sarvam:
+            return {
+                "texts": list(texts),
+                "source_language": source_language,
+                "target_language": target_language,
+                "segments": 0,
+                "unique_segments": 0
+            }
+
+        # text -> paragraphs (with their line breaks) -> sentences
+        layouts = []
+        unique: Dict[str, Optional[str]] = {}
+        segments = 0
+        for text in texts:
+            layout = []
+            for part in re.split(r"(\n+)", text):
+                if not part.strip():
+                    layout.append(part)
+                    continue
+                sentences = [normalize_text(s) for s in split_sentences(part, max_chars=1000)]
+                layout.append(sentences)
+                segments += len(sentences)
+                for sentence in sentences:
+                    unique.setdefault(sentence, None)
+            layouts.append(layout)
+
+        def _translate(sentence: str) -> str:
+            return self.translate(sentence, target_language, source_language)["text"]
+
+        if unique:
+            with span("translate_batch", canonical_language(target_language)):
+                # Each task runs in a copy of this context so the request deadline still applies
+                futures = {s: self._executor.submit(copy_context().run, profiling.bind(_translate), s) for s in unique}
+                try:
+                    for sentence, future in futures.items():
+                        unique[sentence] = future.result()
+                finally:
+                    # Tasks not started yet are dropped if one failed (e.g. the deadline ran out)
+                    for future in futures.values():
+                        future.cancel()
+
+        translated = []
+        for layout in layouts:
+            translated.append("".join(
+                part if isinstance(part, str) else " ".join(unique[s] for s in part)
+                for part in layout
+            ))
+        return {
+            "texts": translated,
+            "source_language": canonical_language(source_language),
+            "target_language": canonical_language(target_language),
+            "segments": segments,
+            "unique_segments": len(unique)
+        }
+
+    def get_stats(self) -> Dict:
+        """Translation memory hit rates per language pair"""
+        return self.memory.get_stats()
 
     def _translate_sarvam(
         self,
         text: str,
-        target_language: str,
-        source_language: str
-    ) -> Dict[str, str]:
-        """Translate using Sarvam Translation API at http://10.11.7.65:8092"""
+        target_lang: str,
+        source_lang: str
+    ) -> Optional[str]:
+        """Translate using Sarvam Translation API at http://10.11.7.65:8092; None on failure"""
         try:
-            # Normalize language names to match Sarvam's expected format
-            language_map = {
-                "hi": "Hindi",
-                "ta": "Tamil",
-                "te": "Telugu",
-                "kn": "Kannada",
-                "ml": "Malayalam",
-                "mr": "Marathi",
-                "gu": "Gujarati",
-                "bn": "Bengali",
-                "pa": "Punjabi",
-                "en": "English"
-            }
-            
-            # Convert language code to full name if needed
-            target_lang = language_map.get(target_language.lower(), target_language)
-            source_lang = language_map.get(source_language.lower(), source_language) if source_language != "auto" else "auto"
-
-            response = requests.post(
-                f"{self.sarvam_api_url}/api/v1/translation/translate",
-                headers={
-                    "accept": "application/json",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "text": text,
-                    "source_language": source_lang,
-                    "target_language": target_lang
-                },
-                timeout=30
-            )
+            # Waiting for a free slot counts against the request's budget too
+            if not self._upstream_slots.acquire(timeout=upstream_timeout(30, "sarvam_translate")):
+                check_deadline("sarvam_translate")
+                logger.error("Error in Sarvam translation: no free upstream slot")
+                return None
+            try:
+                with upstream("sarvam_translate"):
+                    response = requests.post(
+                        f"{self.sarvam_api_url}/api/v1/translation/translate",
+                        headers={
+                            "accept": "application/json",
+                            "Content-Type": "application/json"
+                        },
+                        json={
+                            "text": text,
+                            "source_language": source_lang,
+                            "target_language": target_lang
+                        },
+                        timeout=upstream_timeout(30, "sarvam_translate")
+                    )
+            finally:
+                self._upstream_slots.release()
             response.raise_for_status()
             result = response.json()
             
@@ -85,23 +218,14 @@ class TranslationService:
             translated_text = (
                 result.get("translated_text", "") or
                 result.get("text", "") or
-                result.get("translation", "") or
-                text  # Fallback to original if translation fails
+                result.get("translation", "")
             )
-            
-            return {
-                "text": translated_text,
-                "source_language": source_lang,
-                "target_language": target_lang
-            }
+            return translated_text or None
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"Error in Sarvam translation: {e}")
-            # Return original text on error
-            return {
-                "text": text,
-                "source_language": source_language,
-                "target_language": target_language
-            }
+            logger.error("Error in Sarvam translation: %s", e)
+            return None
 
     def translate_to_language_code(
         self,
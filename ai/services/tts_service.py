@@ -1,8 +1,18 @@
+import logging
 import requests
 import os
 import base64
-from typing import Optional
+from typing import Optional, Tuple
 from pathlib import Path
+import numpy as np
+from services.cache import AudioFileCache
+from services.deadline import DeadlineExceeded, check_deadline, upstream_timeout
+from services.metrics import count_fallback, span, upstream
+from services.audio_transcode import AudioTranscoder
+from services.phrase_bank import PhraseBank
+from services.wav_utils import read_wav
+
+logger = logging.getLogger(__name__)
 
 
 class TTSService:
@@ -12,22 +22,61 @@ class TTSService:
         self.sarvam_api_key = sarvam_api_key or os.getenv("SARVAM_API_KEY", "")
         self.output_dir = output_dir or os.path.join(Path(__file__).parent.parent, "output", "audio")
         os.makedirs(self.output_dir, exist_ok=True)
+        self.sarvam_model = os.getenv("SARVAM_TTS_MODEL", "sarvam-ai/OpenHathi-v0.1-Base")
+        self.sarvam_voice = os.getenv("SARVAM_TTS_VOICE", "default")
+        # Generated audio is reused for identical (text, language, voice, model, format)
+        self.cache = AudioFileCache(
+            self.output_dir,
+            max_bytes=int(float(os.getenv("TTS_CACHE_MAX_MB", "1024")) * 1024 * 1024),
+            max_age_seconds=float(os.getenv("TTS_CACHE_MAX_AGE_DAYS", "30")) * 86400
+        )
+        # Compact Opus/MP3 variants of generated WAV files (AUDIO_TRANSCODE)
+        self.transcoder = AudioTranscoder(self.output_dir)
+        # Pre-rendered reminder template segments
+        self.phrase_bank = PhraseBank(self)
+        # Sentences synthesized in parallel per streaming request
+        self.stream_concurrency = int(os.getenv("TTS_STREAM_CONCURRENCY", "4"))
         # Use Sarvam if base URL is configured (API key optional for some endpoints)
         self.use_sarvam = bool(self.sarvam_base_url and self.sarvam_base_url != "http://localhost:8092")
 
+    def wait_startup(self):
+        """Wait for background startup work (the phrase bank prerender) to finish"""
+        self.phrase_bank.wait_prerender()
+
     def synthesize_speech(self, text: str, language: str = "hi") -> str:
         """
         Synthesize speech using Sarvam API (supports Indian languages)
+        Audio already generated for the same text and settings is returned from the cache.
         Returns: Path to generated audio file
         """
-        if self.use_sarvam:
-            return self._synthesize_sarvam(text, language)
-        else:
+        with span("tts", language):
+            if self.use_sarvam:
+                key = AudioFileCache.key(text, language, self.sarvam_voice, self.sarvam_model, "wav")
+                audio_path = self.cache.get_or_create(key, "wav", lambda path: self._synthesize_sarvam(text, language, path))
+                if audio_path is not None:
+                    return audio_path
+                count_fallback("tts", "gtts")
             # Fallback to gTTS
-            return self._synthesize_gtts(text, language)
+            key = AudioFileCache.key(text, language, "default", "gtts", "mp3")
+            return self.cache.get_or_create(key, "mp3", lambda path: self._synthesize_gtts(text, language, path))
+
+    def synthesize_samples(self, text: str, language: str = "hi") -> Tuple[np.ndarray, int]:
+        """
+        Synthesize (or fetch from cache) and decode to mono float32 samples and sample rate
+        Used for streaming, where audio from several sentences is sent as one PCM stream.
+        """
+        audio_path = self.synthesize_speech(text, language)
+        decoded = read_wav(audio_path)
+        if decoded is not None:
+            return decoded
+        # gTTS MP3 fallback: needs the full (torchaudio) install to decode
+        from services.audio_io import decode_audio
+        with open(audio_path, "rb") as f:
+            wav, sample_rate = decode_audio(f.read())
+        return wav.mean(dim=0).numpy(), sample_rate
 
-    def _synthesize_sarvam(self, text: str, language: str) -> str:
-        """Synthesize using Sarvam API"""
+    def _synthesize_sarvam(self, text: str, language: str, audio_path: str) -> bool:
+        """Synthesize using Sarvam API into audio_path; False if Sarvam failed (caller falls back to gTTS)"""
         try:
             # Map language codes to Sarvam supported languages
             language_map = {
@@ -51,17 +100,20 @@ class TTSService:
             if self.sarvam_api_key:
                 headers["Authorization"] = f"Bearer {self.sarvam_api_key}"
             
-            response = requests.post(
-                f"{self.sarvam_base_url}/v1/audio/speech",
-                headers=headers,
-                json={
-                    "text": text,
-                    "language": sarvam_lang,
-                    "model": "sarvam-ai/OpenHathi-v0.1-Base",
-                    "voice": "default"
-                },
-                timeout=30
-            )
+            with upstream("sarvam_tts") as call:
+                response = requests.post(
+                    f"{self.sarvam_base_url}/v1/audio/speech",
+                    headers=headers,
+                    json={
+                        "text": text,
+                        "language": sarvam_lang,
+                        "model": self.sarvam_model,
+                        "voice": self.sarvam_voice
+                    },
+                    timeout=upstream_timeout(30, "sarvam_tts")
+                )
+                if response.status_code != 200:
+                    call.fail(f"http_{response.status_code}")
             
             # Check response status
             if response.status_code != 200:
@@ -71,37 +123,29 @@ class TTSService:
                     error_msg += f": {error_detail}"
                 except:
                     error_msg += f": {response.text[:200]}"
-                print(f"Error in Sarvam TTS: {error_msg}")
-                # Fallback to gTTS
-                return self._synthesize_gtts(text, language)
+                logger.error("Error in Sarvam TTS: %s", error_msg)
+                return False
             
             response.raise_for_status()
             
             # Save audio file
-            import hashlib
-            import time
-            audio_hash = hashlib.md5(f"{text}_{language}_{time.time()}".encode()).hexdigest()
-            audio_path = os.path.join(self.output_dir, f"{audio_hash}.wav")
-            
             with open(audio_path, "wb") as f:
                 f.write(response.content)
             
-            return audio_path
+            return True
+        except DeadlineExceeded:
+            raise
         except requests.exceptions.RequestException as e:
-            print(f"Error in Sarvam TTS request: {e}")
-            # Fallback to gTTS
-            return self._synthesize_gtts(text, language)
+            logger.error("Error in Sarvam TTS request: %s", e)
+            return False
         except Exception as e:
-            print(f"Error in Sarvam TTS: {e}")
-            # Fallback to gTTS
-            return self._synthesize_gtts(text, language)
+            logger.error("Error in Sarvam TTS: %s", e)
+            return False
 
-    def _synthesize_gtts(self, text: str, language: str) -> str:
-        """Fallback: Synthesize using gTTS"""
+    def _synthesize_gtts(self, text: str, language: str, audio_path: str) -> bool:
+        """Fallback: Synthesize using gTTS into audio_path"""
         try:
             from gtts import gTTS
-            import hashlib
-            import time
             
             # Map language codes for gTTS (gTTS uses ISO 639-1 codes)
             gtts_lang_map = {
@@ -118,17 +162,18 @@ class TTSService:
             }
             gtts_lang = gtts_lang_map.get(language, "en")  # Default to English if not supported
             
-            audio_hash = hashlib.md5(f"{text}_{language}_{time.time()}".encode()).hexdigest()
-            audio_path = os.path.join(self.output_dir, f"{audio_hash}.mp3")
-            
-            tts = gTTS(text=text, lang=gtts_lang, slow=False)
-            tts.save(audio_path)
+            check_deadline("gtts")
+            with upstream("gtts"):
+                tts = gTTS(text=text, lang=gtts_lang, slow=False)
+                tts.save(audio_path)
             
-            print(f"✅ gTTS fallback: Generated audio at {audio_path}")
-            return audio_path
+            logger.info("gTTS fallback: generated audio for %s", language)
+            return True
+        except DeadlineExceeded:
+            raise
         except ImportError:
             raise Exception("gTTS is not installed. Please install it: poetry add gtts")
         except Exception as e:
-            print(f"Error in gTTS: {e}")
+            logger.error("Error in gTTS: %s", e)
             raise Exception(f"TTS synthesis failed: {str(e)}")
 
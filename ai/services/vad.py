@@ -0,0 +1,188 @@
+import os
+from typing import List, Optional
+
+import torch
+
+
+class SpeechSegment:
+    """A finalized stretch of speech: 16 kHz mono waveform [1, frames] plus its position in the stream"""
+
+    __slots__ = ("wav", "start_s", "end_s")
+
+    def __init__(self, wav: torch.Tensor, start_s: float, end_s: float):
+        self.wav = wav
+        self.start_s = start_s
+        self.end_s = end_s
+
+
+class EnergyVAD:
+    """
+    Frame-energy voice activity detection
+    A frame is speech when its level is above threshold_dbfs; speech ends after
+    min_silence_ms of non-speech frames.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        threshold_dbfs: float = None,
+        min_silence_ms: int = None,
+        min_speech_ms: int = None,
+        padding_ms: int = None
+    ):
+        self.sample_rate = sample_rate
+        self.frame_size = sample_rate * frame_ms // 1000
+        self.frame_s = self.frame_size / sample_rate
+        self.threshold_dbfs = threshold_dbfs if threshold_dbfs is not None else float(os.getenv("VAD_THRESHOLD_DBFS", "-40"))
+        self.min_silence_frames = self._frames(min_silence_ms if min_silence_ms is not None else int(os.getenv("VAD_MIN_SILENCE_MS", "500")))
+        self.min_speech_frames = self._frames(min_speech_ms if min_speech_ms is not None else int(os.getenv("VAD_MIN_SPEECH_MS", "200")))
+        self.padding_frames = self._frames(padding_ms if padding_ms is not None else int(os.getenv("VAD_PADDING_MS", "200")))
+
+    def _frames(self, ms: int) -> int:
+        return max(1, int(round(ms / 1000 / self.frame_s)))
+
+    def frame_levels_db(self, wav: torch.Tensor) -> torch.Tensor:
+        """Level in dBFS of each complete frame of a mono waveform [1, frames] or [frames]"""
+        samples = wav.reshape(-1)
+        n_frames = samples.shape[0] // self.frame_size
+        frames = samples[:n_frames * self.frame_size].reshape(n_frames, self.frame_size)
+        return 10 * torch.log10(frames.pow(2).mean(dim=1) + 1e-10)
+
+    def speech_frames(self, wav: torch.Tensor) -> torch.Tensor:
+        """Boolean speech flag per complete frame"""
+        return self.frame_levels_db(wav) > self.threshold_dbfs
+
+    def trim(self, wav: torch.Tensor) -> torch.Tensor:
+        """
+        Cut leading and trailing silence from a mono waveform [1, frames], keeping padding_ms around speech
+        Returns the input unchanged when no speech is detected (quiet recordings are left to the model).
+        """
+        speech = torch.nonzero(self.speech_frames(wav)).reshape(-1)
+        if speech.numel() == 0:
+            return wav
+        start = max(0, int(speech[0]) - self.padding_frames) * self.frame_size
+        end = min(wav.shape[-1], (int(speech[-1]) + 1 + self.padding_frames) * self.frame_size)
+        return wav[..., start:end]
+
+    def split(self, wav: torch.Tensor, max_chunk_s: float, overlap_s: float) -> List[torch.Tensor]:
+        """
+        Split a long mono waveform [1, frames] into chunks of at most max_chunk_s
+        Each cut is placed at the quietest frame in the last third of the window (a pause, when
+        there is one) and consecutive chunks overlap by overlap_s so no word is lost at a cut.
+        """
+        levels = self.frame_levels_db(wav)
+        n_frames = levels.shape[0]
+        max_frames = max(1, int(max_chunk_s / self.frame_s))
+        overlap_frames = int(overlap_s / self.frame_s)
+        if n_frames <= max_frames:
+            return [wav]
+
+        chunks = []
+        start = 0
+        while True:
+            if n_frames - start <= max_frames:
+                chunks.append(wav[..., start * self.frame_size:])
+                break
+            search_from = start + (max_frames * 2) // 3
+            search_to = start + max_frames
+            cut = search_from + int(torch.argmin(levels[search_from:search_to]))
+            chunks.append(wav[..., start * self.frame_size:cut * self.frame_size])
+            start = max(start + 1, cut - overlap_frames)
+        return chunks
+
+
+class StreamingSegmenter:
+    """
+    Cuts an incoming 16 kHz PCM stream into speech segments as it arrives
+    push() returns the segments finalized by the new audio; flush() closes the stream.
+    Segments longer than max_segment_s are cut so no single inference grows unbounded.
+    """
+
+    def __init__(self, vad: EnergyVAD = None, max_segment_s: float = None):
+        self.vad = vad or EnergyVAD()
+        max_segment_s = max_segment_s if max_segment_s is not None else float(os.getenv("VAD_MAX_SEGMENT_S", "15"))
+        self.max_segment_frames = max(1, int(max_segment_s / self.vad.frame_s))
+
+        self._remainder = torch.zeros(0)
+        self._frames: List[torch.Tensor] = []  # frames kept since the current segment's padding start
+        self._first_frame = 0                  # stream index of self._frames[0]
+        self._frame_index = 0                  # stream index of the next frame
+        self._speech_start: Optional[int] = None
+        self._last_speech = -1
+        self._speech_count = 0
+
+    def push(self, pcm16: bytes) -> List[SpeechSegment]:
+        """Feed little-endian int16 mono PCM; returns newly finalized segments"""
+        if len(pcm16) % 2:
+            pcm16 = pcm16[:-1]
+        samples = torch.frombuffer(bytearray(pcm16), dtype=torch.int16).to(torch.float32) / 32768.0
+        return self.push_samples(samples)
+
+    def push_samples(self, samples: torch.Tensor) -> List[SpeechSegment]:
+        """Feed float samples in [-1, 1]; returns newly finalized segments"""
+        samples = torch.cat([self._remainder, samples.reshape(-1)])
+        frame_size = self.vad.frame_size
+        n_frames = samples.shape[0] // frame_size
+        self._remainder = samples[n_frames * frame_size:]
+        if n_frames == 0:
+            return []
+
+        frames = samples[:n_frames * frame_size].reshape(n_frames, frame_size)
+        is_speech = self.vad.speech_frames(frames).tolist()
+
+        segments = []
+        for frame, speech in zip(frames, is_speech):
+            segment = self._step(frame, speech)
+            if segment is not None:
+                segments.append(segment)
+        return segments
+
+    def flush(self) -> List[SpeechSegment]:
+        """End of stream: finalize any open segment"""
+        if self._speech_start is None:
+            return []
+        segment = self._finalize(self._frame_index)
+        return [segment] if segment is not None else []
+
+    def _step(self, frame: torch.Tensor, speech: bool) -> Optional[SpeechSegment]:
+        index = self._frame_index
+        self._frame_index += 1
+        self._frames.append(frame)
+
+        if speech:
+            if self._speech_start is None:
+                self._speech_start = index
+                self._speech_count = 0
+            self._last_speech = index
+            self._speech_count += 1
+        elif self._speech_start is None:
+            # Only keep enough leading silence to pad the next segment
+            excess = len(self._frames) - self.vad.padding_frames
+            if excess > 0:
+                del self._frames[:excess]
+                self._first_frame += excess
+            return None
+
+        if self._speech_start is not None:
+            if index - self._last_speech >= self.vad.min_silence_frames:
+                return self._finalize(min(self._last_speech + 1 + self.vad.padding_frames, self._frame_index))
+            if index - self._speech_start + 1 >= self.max_segment_frames:
+                return self._finalize(self._frame_index)
+        return None
+
+    def _finalize(self, end_frame: int) -> Optional[SpeechSegment]:
+        start_frame = max(self._first_frame, self._speech_start - self.vad.padding_frames)
+        keep = self._frames[start_frame - self._first_frame:end_frame - self._first_frame]
+        long_enough = self._speech_count >= self.vad.min_speech_frames
+
+        # Frames after the segment end stay buffered as leading context for the next one
+        del self._frames[:end_frame - self._first_frame]
+        self._first_frame = end_frame
+        self._speech_start = None
+        self._speech_count = 0
+
+        if not keep or not long_enough:
+            return None
+        wav = torch.cat(keep).unsqueeze(0)
+        return SpeechSegment(wav, start_frame * self.vad.frame_s, end_frame * self.vad.frame_s)
@@ -0,0 +1,148 @@
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Dict, List
+
+from services.deadline import run_cancellable
+
+# Spoken when no known drug is mentioned in the question (translated to the response language)
+NO_DRUG_MESSAGE = "I could not tell which medicine you are asking about. Please say the name of the medicine."
+
+
+class VoiceQueryPipeline:
+    """
+    Spoken question -> transcript -> drug -> risk analysis -> spoken answer, in one request
+    Stages run in-process and overlap where they are independent: a drug named in the
+    transcript starts the risk analysis and similar-drug search while the transcript is still
+    being translated (which is only needed when the name was not recognized as spoken), and the
+    answer is translated back while the similar-drug search finishes. Every stage is reported
+    as an event with its duration as soon as it completes.
+    """
+
+    def __init__(self, request, stt, llm, drug_service, translation_service, tts=None, embeddings=None):
+        self.request = request
+        self.stt = stt
+        self.llm = llm
+        self.drug_service = drug_service
+        self.translation_service = translation_service
+        self.tts = tts
+        self.embeddings = embeddings
+        self.timings: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    async def _run(self, stage: str, func, *args, **kwargs):
+        """
+        Run a blocking stage in the threadpool (cancellable) and record its duration
+        A stage that runs more than once (resolve_drug retried on the English text) reports
+        the sum of its runs.
+        """
+        start = time.perf_counter()
+        try:
+            return await run_cancellable(self.request, func, *args, work=f"voice_query_{stage}", **kwargs)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.timings[stage] = round(self.timings.get(stage, 0.0) + elapsed, 1)
+
+    def _event(self, stage: str, **fields) -> Dict:
+        return {"stage": stage, **fields, "ms": self.timings.get(stage)}
+
+    async def transcribe(self, audio_data: bytes, language: str, decoding: str = "ctc") -> Dict:
+        result = await self._run("transcribe", self.stt.transcribe_audio, audio_data, language, decoding)
+        return self._event("transcribe", text=result["text"], language=result["language"])
+
+    def _start_analysis(self, drug: Dict, patient_age: int, skips: int, conditions: List[str]):
+        """Start the risk analysis and (if available) the similar-drug search side by side"""
+        analysis_task = asyncio.ensure_future(self._run(
+            "analyze", self.llm.analyze_skip_risk,
+            drug_name=drug["name"],
+            skips=skips,
+            patient_age=patient_age,
+            conditions=conditions,
+            drug_info=drug
+        ))
+        similar_task = None
+        if self.embeddings is not None:
+            similar_task = asyncio.ensure_future(self._run(
+                "similar_drugs", self.embeddings.find_similar_drugs,
+                drug["name"], self.drug_service.drugs, top_k=3
+            ))
+        return analysis_task, similar_task
+
+    async def events(
+        self,
+        transcript: Dict,
+        response_language: str,
+        patient_age: int,
+        skips: int,
+        conditions: List[str]
+    ) -> AsyncIterator[Dict]:
+        """Remaining stages after transcription, as progress events ending with "done" """
+        text = transcript["text"]
+        pending: List[asyncio.Future] = []
+
+        try:
+            # The English transcript is only needed if the drug name is not found as spoken
+            translate_task = asyncio.ensure_future(self._run(
+                "translate_query", self.translation_service.translate, text, "English", transcript["language"]
+            ))
+            pending.append(translate_task)
+            match = await self._run("resolve_drug", self.drug_service.resolve_drug, text)
+
+            query_reported = match is None
+            if match is None:
+                english = (await translate_task)["text"]
+                yield self._event("translate_query", text=english)
+                if english != text:
+                    match = await self._run("resolve_drug", self.drug_service.resolve_drug, english)
+
+            drug, phrase, score = match if match else (None, None, None)
+            analysis_task = similar_task = None
+            if drug is not None:
+                analysis_task, similar_task = self._start_analysis(drug, patient_age, skips, conditions)
+                pending += [task for task in (analysis_task, similar_task) if task is not None]
+            yield self._event(
+                "resolve_drug",
+                drug=drug["name"] if drug else None,
+                matched=phrase,
+                score=round(score, 3) if score is not None else None
+            )
+            if not query_reported:
+                # Not needed for the answer, but reported (it finishes well before the analysis)
+                yield self._event("translate_query", text=(await translate_task)["text"])
+
+            explanation = ""
+            if drug is None:
+                message = NO_DRUG_MESSAGE
+            else:
+                analysis = await analysis_task
+                yield self._event("analyze", **analysis)
+                message, explanation = analysis["message"], analysis["ai_explanation"]
+                if similar_task is not None and similar_task.done():
+                    yield self._event("similar_drugs", drugs=similar_task.result())
+                    similar_task = None
+
+            # Answer in the patient's language; the explanation is translated in the same batch
+            localized = await self._run(
+                "translate_response", self.translation_service.translate_many,
+                [message, explanation], response_language, "English"
+            )
+            message, explanation = localized["texts"]
+            yield self._event("translate_response", text=message, explanation=explanation, language=response_language)
+
+            if drug is not None and similar_task is not None:
+                yield self._event("similar_drugs", drugs=await similar_task)
+
+            if self.tts is not None:
+                audio_path = await self._run("synthesize", self.tts.synthesize_speech, message, response_language)
+                self.tts.transcoder.schedule(audio_path)
+                yield self._event("synthesize", audio_url=f"/voice/audio/{os.path.basename(audio_path)}")
+
+            yield {
+                "stage": "done",
+                "timings": self.timings,
+                "total_ms": round((time.perf_counter() - self.started) * 1000, 1)
+            }
+        finally:
+            for task in pending:
+                if not task.done():
+                    task.cancel()
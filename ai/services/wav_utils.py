@@ -0,0 +1,78 @@
+import struct
+import wave
+from io import BytesIO
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+def read_wav(path: str) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Read a PCM WAV file as mono float32 samples in [-1, 1] and its sample rate
+    Returns None for anything that is not 8/16/32-bit PCM WAV (e.g. gTTS MP3 output).
+    """
+    try:
+        with wave.open(path, "rb") as reader:
+            channels = reader.getnchannels()
+            width = reader.getsampwidth()
+            rate = reader.getframerate()
+            frames = reader.readframes(reader.getnframes())
+    except (wave.Error, EOFError, OSError):
+        return None
+
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        return None
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def resample(samples: np.ndarray, rate: int, target_rate: int) -> np.ndarray:
+    """Linear-interpolation resampling, adequate for joining TTS speech segments"""
+    if rate == target_rate or len(samples) == 0:
+        return samples
+    duration = len(samples) / rate
+    target_len = max(1, int(round(duration * target_rate)))
+    positions = np.linspace(0, len(samples) - 1, target_len)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def concat_wav(segments: List[Tuple[np.ndarray, int]], target_rate: int, gap_ms: int = 0) -> bytes:
+    """Concatenate mono segments at target_rate (optionally separated by silence) into 16-bit PCM WAV bytes"""
+    gap = np.zeros(target_rate * gap_ms // 1000, dtype=np.float32)
+    parts = []
+    for i, (samples, rate) in enumerate(segments):
+        if i and len(gap):
+            parts.append(gap)
+        parts.append(resample(samples, rate, target_rate))
+    audio = np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+    buffer = BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(target_rate)
+        writer.writeframes(pcm16(audio))
+    return buffer.getvalue()
+
+
+def pcm16(samples: np.ndarray) -> bytes:
+    """Float samples in [-1, 1] as little-endian 16-bit PCM"""
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def streaming_wav_header(sample_rate: int) -> bytes:
+    """
+    Mono 16-bit WAV header for a stream of unknown length
+    RIFF and data sizes are set to the maximum, which players treat as "read until EOF".
+    """
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
@@ -2,6 +2,14 @@ import { Injectable, HttpException, HttpStatus } from '@nestjs/common';
 import axios, { AxiosInstance } from 'axios';
 import { RiskAnalysisResponseDto } from '../dto/risk-analysis.dto';
 
+// Client-side timeout for AI calls. The AI service gets a slightly smaller
+// budget so it abandons upstream work before we give up on it.
+const AI_TIMEOUT_MS = 60000;
+const AI_DEADLINE_MARGIN_MS = 2000;
+// Reminder audio is optional: a reminder is not held back waiting for it
+const REMINDER_AUDIO_TIMEOUT_MS = 3000;
+const REMINDER_AUDIO_DEADLINE_MS = 2500;
+
 @Injectable()
 export class AIService {
   private readonly aiServiceUrl: string;
@@ -11,7 +19,10 @@ export class AIService {
     this.aiServiceUrl = process.env.AI_SERVICE_URL || 'http://localhost:8000';
     this.httpClient = axios.create({
       baseURL: this.aiServiceUrl,
-      timeout: 60000, // 60 seconds for AI processing
+      timeout: AI_TIMEOUT_MS, // 60 seconds for AI processing
+      headers: {
+        'X-Request-Timeout-Ms': String(AI_TIMEOUT_MS - AI_DEADLINE_MARGIN_MS),
+      },
     });
   }
 
@@ -110,5 +121,44 @@ export class AIService {
       );
     }
   }
+
+  /**
+   * Spoken medication reminder, stitched by the AI service from pre-rendered
+   * template audio (same templates as PatientNotificationsService).
+   * Uses a short timeout so callers can send the reminder without audio instead.
+   */
+  async synthesizeReminder(
+    drugName: string,
+    language: string = 'hi',
+  ): Promise<string> {
+    try {
+      const response = await this.httpClient.post<{ audio_url: string }>(
+        '/voice/reminder',
+        {
+          drug_name: drugName,
+          language,
+        },
+        {
+          timeout: REMINDER_AUDIO_TIMEOUT_MS,
+          headers: {
+            'X-Request-Timeout-Ms': String(REMINDER_AUDIO_DEADLINE_MS),
+          },
+        },
+      );
+
+      return `${this.aiServiceUrl}${response.data.audio_url}`;
+    } catch (error) {
+      if (axios.isAxiosError(error)) {
+        throw new HttpException(
+          `TTS service error: ${error.message}`,
+          error.response?.status || HttpStatus.INTERNAL_SERVER_ERROR,
+        );
+      }
+      throw new HttpException(
+        'Failed to synthesize reminder',
+        HttpStatus.INTERNAL_SERVER_ERROR,
+      );
+    }
+  }
 }
 
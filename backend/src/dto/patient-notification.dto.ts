@@ -46,6 +46,13 @@ export class PatientNotificationDto {
   })
   scheduled_time?: Date;
 
+  @ApiProperty({
+    description:
+      'Pre-synthesized speech for the notification text (medication reminders; absent if synthesis failed)',
+    required: false,
+  })
+  audio_url?: string;
+
   @ApiProperty({
     description: 'Doctor instruction (if from doctor)',
     required: false,
@@ -52,6 +52,15 @@ export class PatientNotificationsService {
     const language = patient.language || 'hi';
     const text = this.generateReminderText(drugName, language);
 
+    // Reminder audio is stitched by the AI service from pre-rendered template phrases;
+    // synthesizeReminder gives up after a few seconds and the reminder goes out text-only
+    let audioUrl: string | undefined;
+    try {
+      audioUrl = await this.aiService.synthesizeReminder(drugName, language);
+    } catch (error) {
+      console.warn('Reminder audio unavailable, sending text only:', error);
+    }
+
     const notification: PatientNotificationDto = {
       id: uuidv4(),
       patient_id: patientId,
@@ -59,6 +68,7 @@ export class PatientNotificationsService {
       drug_name: drugName,
       text,
       language,
+      audio_url: audioUrl,
       scheduled_time: scheduledTime,
       timestamp: new Date(),
       acknowledged: false,
@@ -188,6 +198,7 @@ export class PatientNotificationsService {
 
   /**
    * Generate reminder text in patient's language
+   * Keep in sync with REMINDER_TEMPLATES in ai/services/phrase_bank.py (pre-rendered reminder audio)
    */
   private generateReminderText(drugName: string, language: string): string {
     const reminders: Record<string, string> = {